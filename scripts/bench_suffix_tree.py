@@ -0,0 +1,62 @@
+"""Suffix tree construction time against alphabet size.
+
+Builds _suffix_tree.SuffixTree over random texts drawn uniformly from
+alphabets of increasing size (the root and shallow nodes then have a fan-out
+close to the alphabet size) and, for reference, over a real French text.
+"""
+
+import random
+import time
+
+import click
+
+import _suffix_tree
+
+
+def random_text(length, alphabet_size, seed=0):
+    rng = random.Random(seed)
+    # start after the separators chr(1)..chr(4) used by the medite code
+    alphabet = [chr(32 + i) for i in range(alphabet_size)]
+    return "".join(rng.choice(alphabet) for _ in range(length))
+
+
+def construction_time(text, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        tree = _suffix_tree.SuffixTree(text, "#")
+        elapsed = time.perf_counter() - start
+        tree.close()
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+@click.command()
+@click.option("--length", default=1_000_000, help="Number of characters per text")
+@click.option("--repeat", default=3, help="Best of this many constructions")
+@click.option(
+    "--alphabet-sizes", default="2,4,16,64,256,1024,4096", help="Comma separated"
+)
+@click.option(
+    "--text", type=click.Path(exists=True), help="Also time this text file (utf-8)"
+)
+def run(length, repeat, alphabet_sizes, text):
+    click.echo(f"{'alphabet':>10} {'chars':>10} {'seconds':>9} {'ns/char':>8}")
+    for size in [int(k) for k in alphabet_sizes.split(",")]:
+        t = random_text(length, size)
+        elapsed = construction_time(t, repeat)
+        click.echo(
+            f"{size:>10} {len(t):>10} {elapsed:>9.3f} {elapsed / len(t) * 1e9:>8.0f}"
+        )
+    if text:
+        with open(text, encoding="utf-8") as f:
+            t = f.read()
+        elapsed = construction_time(t, repeat)
+        click.echo(
+            f"{len(set(t)):>10} {len(t):>10} {elapsed:>9.3f} "
+            f"{elapsed / len(t) * 1e9:>8.0f}  {text}"
+        )
+
+
+if __name__ == "__main__":
+    run()
@@ -31,6 +31,25 @@ default = md.DEFAULT_PARAMETERS
 @click.option(
     "--diacri-sensitive/--no-diacri-sensitive", default=default.diacri_sensitive
 )
+@click.option(
+    "--algo-index", type=click.Choice(["ST", "SA", "MOT"]), default=default.algo_index
+)
+@click.option(
+    "--index-dir",
+    type=click.Path(file_okay=False, dir_okay=True),
+    default=default.index_dir,
+    help="Directory where the index of each text (SA) or of each pair (MOT) is stored and reused; ignored with ST",
+)
+@click.option(
+    "--workers",
+    default=default.workers,
+    help="Number of processes aligning the large top-level gaps in parallel",
+)
+@click.option(
+    "--lg-diff-direct",
+    default=default.lg_diff_direct,
+    help="Gaps with both sides up to this size are aligned by a word diff (0: never)",
+)
 @click.option("--output-xml", type=click.Path(exists=False), default="informations.xml")
 @click.option(
     "--xhtml-output-dir",
@@ -46,6 +65,10 @@ def run(
     sep,
     case_sensitive,
     diacri_sensitive,
+    algo_index,
+    index_dir,
+    workers,
+    lg_diff_direct,
     output_xml,
     xhtml_output_dir,
 ):
@@ -73,6 +96,10 @@ def run(
         diacri_sensitive=diacri_sensitive,
         algo=algo,
         sep=sep,
+        algo_index=algo_index,
+        index_dir=index_dir,
+        workers=workers,
+        lg_diff_direct=lg_diff_direct,
     )
 
     source_filepath = pathlib.Path(source_filename)
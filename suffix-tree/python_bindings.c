@@ -12,6 +12,14 @@
 typedef	struct SuffixTreeObject	{
 	PyObject_HEAD
 	suffix_tree_t *tree;
+
+	/* python object of each node, indexed like the arena -- needed to make
+	   sure we always get the same python object when we ask for a node */
+	struct NodeObject **python_nodes;
+
+	/* number of threads working on the tree without the GIL -- the tree
+	   cannot be closed or rebuilt while it is not 0 */
+	int busy;
 } SuffixTreeObject;
 
 typedef	struct NodeObject {
@@ -32,10 +40,19 @@ static int		 SuffixTree_init		(SuffixTreeObject		   *self,
 										 PyObject				   *kwds);
 static PyObject	*SuffixTree_root		(SuffixTreeObject		   *self);
 static PyObject	*SuffixTree_string		(SuffixTreeObject		   *self);
+static PyObject	*SuffixTree_memory_footprint(SuffixTreeObject	   *self);
+static PyObject	*SuffixTree_close		(SuffixTreeObject		   *self);
+static PyObject	*SuffixTree_enter		(SuffixTreeObject		   *self);
+static PyObject	*SuffixTree_exit		(SuffixTreeObject		   *self,
+										 PyObject				   *args);
+static void		 SuffixTree_dealloc		(SuffixTreeObject		   *self);
+static PyObject	*SuffixTree_topology	(SuffixTreeObject		   *self);
+static PyObject	*SuffixTree_seq_repeat	(SuffixTreeObject		   *self,
+										 PyObject				   *args);
 
 
 static PyObject* wrap_node				(SuffixTreeObject		   *tree,
-										 node_t					   *n);
+										 node_id					n);
 
 
 static PyObject	*Node_new				(PyTypeObject			   *type,
@@ -132,6 +149,37 @@ static PyGetSetDef SuffixTree_getseters[] = {
      "The string the tree is built over + the terminal symbol.",
      NULL /* no closure */
     },
+    {"memoryFootprint", (getter)SuffixTree_memory_footprint, NULL,
+     "Number of bytes allocated by the tree: node arena, string and node "
+     "cache (the Python node objects themselves are not counted).",
+     NULL /* no closure */
+    },
+    {NULL} /* Sentinel */
+};
+
+static PyMethodDef SuffixTree_methods[] = {
+    {"close", (PyCFunction)SuffixTree_close, METH_NOARGS,
+     "Free the tree and every node object handed out for it.  Nodes still "
+     "referenced elsewhere are detached and raise ValueError when used.  "
+     "Calling close() more than once is allowed."
+    },
+    {"__enter__", (PyCFunction)SuffixTree_enter, METH_NOARGS, NULL},
+    {"__exit__", (PyCFunction)SuffixTree_exit, METH_VARARGS,
+     "Close the tree."
+    },
+    {"topology", (PyCFunction)SuffixTree_topology, METH_NOARGS,
+     "The whole tree as flat arrays, one int32 entry per node in pre-order "
+     "(the root is node 0).  Returns a dict mapping parent, first_child, "
+     "next_sibling (-1 when missing), start, end, depth, index and "
+     "post_order (rank in a post-order traversal) to bytearrays."
+    },
+    {"seq_repeat", (PyCFunction)SuffixTree_seq_repeat, METH_VARARGS,
+     "seq_repeat(length_seq1, min_size) -> (deb, fin)\n\n"
+     "For a tree built over seq1 + seq2, two bytearrays of int32 giving for "
+     "each position of the string (terminal excluded) the bounds "
+     "[deb, fin) of the longest left-diverse repeat of length >= min_size "
+     "shared by both sequences that covers it, or deb = fin = position."
+    },
     {NULL} /* Sentinel */
 };
 
@@ -140,7 +188,7 @@ static PyTypeObject SuffixTreeType = {
     .tp_name = "_suffix_tree.SuffixTree",
     .tp_basicsize = sizeof(SuffixTreeObject),
     .tp_itemsize = 0,
-    .tp_dealloc = 0,
+    .tp_dealloc = (destructor)SuffixTree_dealloc,
     .tp_flags = Py_TPFLAGS_DEFAULT | Py_TPFLAGS_BASETYPE,
     .tp_doc = "Suffix tree object",
     .tp_traverse = 0,
@@ -149,7 +197,7 @@ static PyTypeObject SuffixTreeType = {
     .tp_weaklistoffset = 0,
     .tp_iter = 0,
     .tp_iternext = 0,
-    .tp_methods = 0,
+    .tp_methods = SuffixTree_methods,
     .tp_members = 0,
     .tp_getset = SuffixTree_getseters,
     .tp_base = 0,
@@ -420,11 +468,70 @@ PyMODINIT_FUNC PyInit__suffix_tree(void)
 /**********************************************************************/
 
 
+/* detaches the cached node objects and frees the C tree */
+static void
+release_tree(SuffixTreeObject *self)
+{
+	int i;
+	NodeObject *node;
+
+	if (self->python_nodes)
+	{
+		for (i = 0; i < self->tree->nb_nodes; i++)
+		{
+			if (!(node = self->python_nodes[i])) continue;
+			self->python_nodes[i] = NULL;
+			node->node = NULL;
+			node->tree = NULL;
+			/* the reference the cache held since wrap_node */
+			Py_DECREF(node);
+		}
+		free(self->python_nodes);
+		self->python_nodes = NULL;
+	}
+	st_free(self->tree);
+	self->tree = NULL;
+}
+
+static int
+check_not_busy(SuffixTreeObject *self)
+{
+	if (self->busy)
+	{
+		PyErr_SetString(PyExc_RuntimeError,
+						"The suffix tree is in use by another thread");
+		return -1;
+	}
+	return 0;
+}
+
+static int
+check_tree(SuffixTreeObject *self)
+{
+	if (!self->tree)
+	{
+		PyErr_SetString(PyExc_ValueError, "The suffix tree is closed");
+		return -1;
+	}
+	return 0;
+}
+
+/* str[start:start+length] of the tree as a Python string */
+static PyObject	*
+string_slice(const suffix_tree_t *tree, int start, int length)
+{
+	return PyUnicode_FromKindAndData(tree->kind,
+									 (const char*)tree->str + (size_t)start*tree->kind,
+									 length);
+}
+
 static PyObject	*
 SuffixTree_new(PyTypeObject	*type, PyObject	*args, PyObject	*kwds)
 {
 	SuffixTreeObject *self = (SuffixTreeObject *)type->tp_alloc(type, 0);
 	self->tree = NULL;
+	self->python_nodes = NULL;
+	self->busy = 0;
 	return (PyObject*)self;
 }
 
@@ -435,10 +542,8 @@ SuffixTree_init(SuffixTreeObject *self, PyObject *args, PyObject *kwds)
     PyObject *terminal = NULL;
     static char *kwlist[] = {"string", "terminal", NULL};
 
-    wchar_t *s;
-    wchar_t t[1];
-    int n;
-    Py_ssize_t input_string_size;
+    Py_ssize_t length, nul;
+    suffix_tree_t *tree;
 
     if (!PyArg_ParseTupleAndKeywords(args, kwds, "|UO", kwlist, &string, &terminal))
         return -1;
@@ -446,22 +551,35 @@ SuffixTree_init(SuffixTreeObject *self, PyObject *args, PyObject *kwds)
     if (!(string = PyTuple_GetItem(args, 0))) return -1;
     if (!(terminal = PyTuple_GetItem(args, 1))) return -1;
 
-    input_string_size = PyUnicode_GetLength(string);
-    s = malloc((input_string_size + 1) * sizeof(wchar_t));
-    if ((n = PyUnicode_AsWideChar(string, s, input_string_size)) < 0) return -1;
-    if ((n = PyUnicode_AsWideChar(terminal, t, 1)) < 0) return -1;
-
-    if (n != 1) {
+    if (!PyUnicode_Check(terminal) || PyUnicode_GetLength(terminal) != 1) {
         PyErr_SetString(PyExc_RuntimeError, "Terminal symbol must be a single character!");
-        free(s);
         return -1;
     }
 
-    s[input_string_size] = '\0';
-    t[0] = '\0';
+    /* the tree has always been built with \0 as terminal, whatever the
+       terminal argument, over the string up to its first \0 */
+    length = PyUnicode_GetLength(string);
+    nul = PyUnicode_FindChar(string, 0, 0, length, 1);
+    if (nul == -2) return -1;
+    if (nul >= 0) length = nul;
+    if (length > INT_MAX - 2) {
+        PyErr_SetString(PyExc_OverflowError, "String too long for a suffix tree");
+        return -1;
+    }
 
-    self->tree = st_make(s, *t);
-    free(s);
+    if (check_not_busy(self) < 0) return -1;
+    release_tree(self);
+
+    /* the characters are copied with the width CPython stores them in,
+       one byte each for Latin-1 text; string is immutable and kept alive
+       by args, so the construction can run without the GIL */
+    self->busy++;
+    Py_BEGIN_ALLOW_THREADS
+    tree = st_make(PyUnicode_DATA(string), PyUnicode_KIND(string),
+                   (int)length, 0);
+    Py_END_ALLOW_THREADS
+    self->busy--;
+    self->tree = tree;
 
     if (!self->tree) {
         PyErr_SetString(PyExc_MemoryError, "Could not allocate suffix tree!");
@@ -470,21 +588,173 @@ SuffixTree_init(SuffixTreeObject *self, PyObject *args, PyObject *kwds)
 
     return 0;
 }
+static void
+SuffixTree_dealloc(SuffixTreeObject *self)
+{
+	release_tree(self);
+	Py_TYPE(self)->tp_free((PyObject *)self);
+}
+
+static PyObject	*
+SuffixTree_close(SuffixTreeObject *self)
+{
+	if (check_not_busy(self) < 0) return NULL;
+	release_tree(self);
+	Py_RETURN_NONE;
+}
+
+static PyObject	*
+SuffixTree_enter(SuffixTreeObject *self)
+{
+	if (check_tree(self) < 0) return NULL;
+	Py_INCREF(self);
+	return (PyObject*)self;
+}
+
+static PyObject	*
+SuffixTree_exit(SuffixTreeObject *self, PyObject *args)
+{
+	if (check_not_busy(self) < 0) return NULL;
+	release_tree(self);
+	Py_RETURN_FALSE;
+}
+
 static PyObject	*
 SuffixTree_string(SuffixTreeObject *self)
 {
-	return PyUnicode_FromWideChar(self->tree->str, self->tree->str_len);
+	if (check_tree(self) < 0) return NULL;
+	return PyUnicode_FromKindAndData(self->tree->kind, self->tree->str,
+									 self->tree->str_len);
+}
+
+static PyObject	*
+SuffixTree_memory_footprint(SuffixTreeObject *self)
+{
+	size_t size = 0;
+	if (self->tree)
+	{
+		size = st_memory_footprint(self->tree);
+		if (self->python_nodes)
+			size += self->tree->nb_nodes*sizeof(struct NodeObject*);
+	}
+	return PyLong_FromSize_t(size);
+}
+
+
+static PyObject	*
+SuffixTree_topology(SuffixTreeObject *self)
+{
+	static const char *names[] = {"parent", "first_child", "next_sibling",
+		"start", "end", "depth", "index", "post_order"};
+	const int nb_arrays = sizeof(names)/sizeof(names[0]);
+	PyObject *arrays[sizeof(names)/sizeof(names[0])];
+	int *buffers[sizeof(names)/sizeof(names[0])];
+	topology_t topo;
+	PyObject *result;
+	int count, i, res = 0;
+
+	if (check_tree(self) < 0) return NULL;
+	count = st_count_nodes(self->tree);
+	for (i = 0; i < nb_arrays; i++)
+	{
+		arrays[i] = PyByteArray_FromStringAndSize(NULL,
+				(Py_ssize_t)count*sizeof(int));
+		if (!arrays[i])
+		{
+			while (i--) Py_DECREF(arrays[i]);
+			return NULL;
+		}
+		buffers[i] = (int*)PyByteArray_AS_STRING(arrays[i]);
+	}
+	topo.parent = buffers[0];
+	topo.first_child = buffers[1];
+	topo.next_sibling = buffers[2];
+	topo.start = buffers[3];
+	topo.end = buffers[4];
+	topo.depth = buffers[5];
+	topo.index = buffers[6];
+	topo.post_order = buffers[7];
+
+	result = PyDict_New();
+	if (result)
+	{
+		self->busy++;
+		Py_BEGIN_ALLOW_THREADS
+		res = st_export_topology(self->tree, &topo);
+		Py_END_ALLOW_THREADS
+		self->busy--;
+	}
+	if (result && res < 0)
+	{
+		PyErr_NoMemory();
+		Py_CLEAR(result);
+	}
+	for (i = 0; i < nb_arrays; i++)
+	{
+		if (result && PyDict_SetItemString(result, names[i], arrays[i]) < 0)
+			Py_CLEAR(result);
+		Py_DECREF(arrays[i]);
+	}
+	return result;
+}
+
+
+static PyObject	*
+SuffixTree_seq_repeat(SuffixTreeObject *self, PyObject *args)
+{
+	int length_seq1, min_size, res;
+	Py_ssize_t size;
+	PyObject *deb, *fin;
+
+	if (!PyArg_ParseTuple(args, "ii", &length_seq1, &min_size))
+		return NULL;
+	if (check_tree(self) < 0) return NULL;
+	size = (Py_ssize_t)(self->tree->str_len - 1)*sizeof(int);
+	deb = PyByteArray_FromStringAndSize(NULL, size);
+	fin = PyByteArray_FromStringAndSize(NULL, size);
+	if (!deb || !fin)
+	{
+		Py_XDECREF(deb);
+		Py_XDECREF(fin);
+		return NULL;
+	}
+	self->busy++;
+	Py_BEGIN_ALLOW_THREADS
+	res = st_seq_repeat(self->tree, length_seq1, min_size,
+						(int*)PyByteArray_AS_STRING(deb),
+						(int*)PyByteArray_AS_STRING(fin));
+	Py_END_ALLOW_THREADS
+	self->busy--;
+	if (res < 0)
+	{
+		Py_DECREF(deb);
+		Py_DECREF(fin);
+		return PyErr_NoMemory();
+	}
+	return Py_BuildValue("(NN)", deb, fin);
 }
 
 
 static PyObject* 
-wrap_node(SuffixTreeObject *tree, node_t *n)
+wrap_node(SuffixTreeObject *tree, node_id n)
 {
 	NodeObject *node;
-	if (n->python_node)
+
+	if (n == NONE)
+	{
+		Py_INCREF(Py_None);
+		return Py_None;
+	}
+	if (!tree->python_nodes)
+	{
+		tree->python_nodes = (NodeObject**)calloc(tree->tree->nb_nodes,
+												  sizeof(NodeObject*));
+		if (!tree->python_nodes) return PyErr_NoMemory();
+	}
+	if (tree->python_nodes[n])
 	{
-		Py_INCREF((PyObject*)n->python_node);
-		return (PyObject*)n->python_node;
+		Py_INCREF((PyObject*)tree->python_nodes[n]);
+		return (PyObject*)tree->python_nodes[n];
 	}
 
 	node = (NodeObject*)_PyObject_New((PyTypeObject*)&NodeType);
@@ -492,14 +762,14 @@ wrap_node(SuffixTreeObject *tree, node_t *n)
 
 	node->dict = PyDict_New();
 	node->tree = tree;
-	node->node = n;
+	node->node = NODE(tree->tree, n);
 
-	//Py_INCREF((PyObject*)tree); //FIXME: handle cyclic GC	and	make
-	//sure tree	isn't deleted while	we have	a node
+	// the tree is not referenced by the node: when the tree is closed or
+	// deleted, release_tree detaches the node instead
 
 	// make	sure the node is never deleted while the tree is in	existence
 	Py_INCREF(node);
-	n->python_node = node;
+	tree->python_nodes[n] = node;
 
 	return (PyObject*)node;
 }
@@ -507,7 +777,8 @@ wrap_node(SuffixTreeObject *tree, node_t *n)
 static PyObject*
 SuffixTree_root(SuffixTreeObject *self)
 {
-	return wrap_node(self,self->tree->root);
+	if (check_tree(self) < 0) return NULL;
+	return wrap_node(self, ROOT);
 }
 
 
@@ -517,6 +788,15 @@ SuffixTree_root(SuffixTreeObject *self)
 /* node	bindings */
 /**********************************************************************/
 
+/* the nodes of a closed tree are detached from it */
+#define CHECK_NODE(self)												\
+	if (!(self)->node)													\
+	{																	\
+		PyErr_SetString(PyExc_ValueError,								\
+						"The suffix tree of this node is closed");		\
+		return NULL;													\
+	}
+
 static PyObject	*
 Node_new(PyTypeObject *type, PyObject *args, PyObject *kwds)
 {
@@ -531,7 +811,7 @@ static int
 Node_clear(NodeObject *self)
 {
 	Py_XDECREF(self->dict);	self->dict = NULL;
-	Py_XDECREF(self->tree);	self->tree = NULL;
+	self->tree = NULL;	/* borrowed */
 	return 0;
 }
 
@@ -551,7 +831,9 @@ Node_compare(NodeObject	*n1, NodeObject	*n2)
 static long
 Node_hash(NodeObject *self)
 {
-	return (long)(self->node);
+	/* one object per node, hashing the object keeps the hash stable when
+	   the node is detached from a closed tree */
+	return (long)(self);
 }
 
 
@@ -559,11 +841,13 @@ Node_hash(NodeObject *self)
 static PyObject *
 Node_start(NodeObject *self)
 {
+	CHECK_NODE(self);
     return PyLong_FromLong(self->node->start);
 }
 static PyObject *
 Node_end(NodeObject *self)
 {
+	CHECK_NODE(self);
     return PyLong_FromLong(self->node->end);
 }
 
@@ -571,12 +855,14 @@ Node_end(NodeObject *self)
 static PyObject	*
 Node_index(NodeObject *self)
 {
+	CHECK_NODE(self);
 	return PyLong_FromLong(self->node->term_number);
 }
 
 static PyObject	*
 Node_string_depth(NodeObject *self)
 {
+	CHECK_NODE(self);
 	return PyLong_FromLong(self->node->depth);
 }
 
@@ -584,32 +870,35 @@ Node_string_depth(NodeObject *self)
 static PyObject	*
 Node_edge_label(NodeObject *self)
 {
+	CHECK_NODE(self);
 	int	start =	self->node->start;
 	int	end	= self->node->end+1;
 	int	length = end-start;
 
 	/* the root	is a special case... */
-	if (start <	0) return PyUnicode_FromWideChar(L"", 0);
-	return PyUnicode_FromWideChar(self->tree->tree->str	+ start, length);
+	if (start <	0) return PyUnicode_New(0, 0);
+	return string_slice(self->tree->tree, start, length);
 }
 
 static PyObject	*
 Node_path_label(NodeObject *self)
 {
+	CHECK_NODE(self);
 	int	start =	self->node->term_number;
 	int	length = self->node->depth;
 
-	return PyUnicode_FromWideChar(self->tree->tree->str	+ start, length);
+	return string_slice(self->tree->tree, start, length);
 }
 
 static PyObject	*
 Node_suffix(NodeObject *self)
 {
+	CHECK_NODE(self);
 	int	start =	self->node->term_number;
 	int	length = self->tree->tree->str_len - start;
 	/* the root	is a special case... */
 	if (start <	0) return SuffixTree_string(self->tree);
-	return PyUnicode_FromWideChar(self->tree->tree->str	+ start, length);
+	return string_slice(self->tree->tree, start, length);
 }
 
 
@@ -618,82 +907,43 @@ Node_suffix(NodeObject *self)
 static PyObject	*
 Node_parent(NodeObject *self)
 {
-	node_t *parent = self->node->parent;
-	if (!parent)
-	{
-		Py_INCREF(Py_None);
-		return Py_None;
-	}
-	else
-	{
-		return wrap_node(self->tree,parent);
-	}
+	CHECK_NODE(self);
+	return wrap_node(self->tree, self->node->parent);
 }
 
 static PyObject	*
 Node_next(NodeObject *self)
 {
-	node_t *next = self->node->next;
-	if (!next)
-	{
-		Py_INCREF(Py_None);
-		return Py_None;
-	}
-	else
-	{
-		return wrap_node(self->tree,next);
-	}
+	CHECK_NODE(self);
+	return wrap_node(self->tree, self->node->next);
 }
 
 static PyObject	*
 Node_prev(NodeObject *self)
 {
-	node_t *prev = self->node->prev;
-	if (!prev)
-	{
-		Py_INCREF(Py_None);
-		return Py_None;
-	}
-	else
-	{
-		return wrap_node(self->tree,prev);
-	}
+	CHECK_NODE(self);
+	return wrap_node(self->tree, self->node->prev);
 }
 
 static PyObject	*
 Node_first_child(NodeObject	*self)
 {
-	node_t *c =	self->node->children.head;
-	if (!c)
-	{
-		Py_INCREF(Py_None);
-		return Py_None;
-	}
-	else
-	{
-		return wrap_node(self->tree,c);
-	}
+	CHECK_NODE(self);
+	return wrap_node(self->tree, self->node->first_child);
 }
 
 static PyObject	*
 Node_last_child(NodeObject *self)
 {
-	node_t *c =	self->node->children.tail;
-	if (!c)
-	{
-		Py_INCREF(Py_None);
-		return Py_None;
-	}
-	else
-	{
-		return wrap_node(self->tree,c);
-	}
+	CHECK_NODE(self);
+	return wrap_node(self->tree, self->node->last_child);
 }
 
 static PyObject*
 Node_is_leaf(NodeObject	*self)
 {
-	if (self->node && self->node->children.head)
+	CHECK_NODE(self);
+	if (self->node->first_child != NONE)
 	{ Py_INCREF(Py_False); return Py_False;	}
 	else
 	{ Py_INCREF(Py_True); return Py_True; }
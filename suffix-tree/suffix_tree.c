@@ -14,242 +14,450 @@
 #define	TRUE 1
 #define	FALSE 0
 
+/* nodes with at least this many children find them through the edge
+   index rather than by scanning their list of children */
+#define INDEXED_DEGREE 8
+
+
+/* construction-time index of the edges leaving high-degree nodes: an open
+   addressing hash table from (parent, first character) to the child.  The
+   children lists are kept, they give the order of the children. */
+struct edge_index {
+	uint64_t *keys;      /* parent << 32 | first character, EMPTY if free */
+	node_id *children;
+	size_t mask;         /* capacity - 1, the capacity is a power of 2 */
+	size_t count;
+	int *degree;         /* number of children of each node */
+};
+
+#define EMPTY ((uint64_t)-1)
+
+static uint64_t
+edge_key(node_id parent, st_char_t c)
+{
+	return ((uint64_t)(uint32_t)parent << 32) | c;
+}
 
-/* creates an internal node	*/
-static node_t *
-internal_node(node_t *parent, int start, int end, int depth,
-		  int term_number,	node_t *suffix_link)
+static size_t
+edge_slot(const struct edge_index *index, uint64_t key)
 {
-	node_t *tmp	= (node_t*)malloc(sizeof(node_t));
-	if (!tmp) return tmp;
+	size_t i = (size_t)((key * 0x9E3779B97F4A7C15ULL) >> 32) & index->mask;
+	while (index->keys[i] != EMPTY && index->keys[i] != key)
+		i = (i + 1) & index->mask;
+	return i;
+}
 
-	tmp->parent	= parent;
-	tmp->start = start;
-	tmp->end = end;
-	tmp->depth = depth;
-	tmp->term_number = term_number;
-	tmp->suffix_link = suffix_link;
-	
-	tmp->children.head = NULL;
-	tmp->children.tail = NULL;
+static void edge_index_free(struct edge_index *index);
 
-	tmp->prev =	tmp->next =	NULL;
-	tmp->python_node = NULL;
+/* returns NULL if the memory is missing */
+static struct edge_index *
+edge_index_new(size_t capacity, int nb_nodes)
+{
+	size_t i;
+	struct edge_index *index = malloc(sizeof(struct edge_index));
+	if (!index) return NULL;
+	index->mask = capacity - 1;
+	index->count = 0;
+	index->keys = malloc(capacity*sizeof(uint64_t));
+	index->children = malloc(capacity*sizeof(node_id));
+	index->degree = calloc(nb_nodes, sizeof(int));
+	if (!index->keys || !index->children || !index->degree)
+	{
+		edge_index_free(index);
+		return NULL;
+	}
+	for (i = 0; i < capacity; i++) index->keys[i] = EMPTY;
+	return index;
+}
 
-	return tmp;
+static void
+edge_index_free(struct edge_index *index)
+{
+	if (!index) return;
+	free(index->keys);
+	free(index->children);
+	free(index->degree);
+	free(index);
 }
 
-/* creates a leaf node */
-static node_t *
-leaf_node(node_t *parent, int start, int end, int depth, int term_number)
+/* sets the child of parent whose edge starts with c */
+static void
+edge_set(suffix_tree_t *tree, node_id parent, st_char_t c, node_id child)
+{
+	struct edge_index *index = tree->edges;
+	uint64_t key = edge_key(parent, c);
+	size_t i;
+
+	if (!index) return;
+	if (2*(index->count + 1) > index->mask + 1)
+	{
+		/* grow: rehash every edge in a table twice as large */
+		struct edge_index larger;
+		size_t j;
+		larger.mask = 2*index->mask + 1;
+		larger.count = index->count;
+		larger.keys = malloc((larger.mask + 1)*sizeof(uint64_t));
+		larger.children = malloc((larger.mask + 1)*sizeof(node_id));
+		if (larger.keys && larger.children)
+		{
+			for (j = 0; j <= larger.mask; j++) larger.keys[j] = EMPTY;
+			for (j = 0; j <= index->mask; j++)
+			{
+				size_t k;
+				if (index->keys[j] == EMPTY) continue;
+				k = edge_slot(&larger, index->keys[j]);
+				larger.keys[k] = index->keys[j];
+				larger.children[k] = index->children[j];
+			}
+			free(index->keys);
+			free(index->children);
+			index->keys = larger.keys;
+			index->children = larger.children;
+			index->mask = larger.mask;
+		}
+		else
+		{
+			/* the children lists are complete, go on without the index */
+			free(larger.keys);
+			free(larger.children);
+			edge_index_free(index);
+			tree->edges = NULL;
+			return;
+		}
+	}
+	i = edge_slot(index, key);
+	if (index->keys[i] == EMPTY)
+	{
+		index->keys[i] = key;
+		index->count++;
+	}
+	index->children[i] = child;
+}
+
+/* the child of n whose edge starts with c, or NONE */
+static node_id
+find_child(const suffix_tree_t *tree, node_id n, st_char_t c)
 {
-	node_t *tmp	= (node_t*)malloc(sizeof(node_t));
-	if (!tmp) return tmp;
+	const struct edge_index *index = tree->edges;
+	node_id ln;
+
+	if (index && index->degree[n] >= INDEXED_DEGREE)
+	{
+		size_t i = edge_slot(index, edge_key(n, c));
+		return index->keys[i] == EMPTY ? NONE : index->children[i];
+	}
+	for	(ln	= NODE(tree, n)->first_child; ln != NONE; ln = NODE(tree, ln)->next)
+		if (ST_CHAR(tree, NODE(tree, ln)->start) == c)
+			return ln;
+	return NONE;
+}
+
+
+/* takes a node from the arena -- the arena is sized for the worst case
+   when the tree is created, so this never reallocates */
+static node_id
+new_node(suffix_tree_t *tree, node_id parent, int start, int end, int depth,
+		 int term_number, node_id suffix_link)
+{
+	node_id id = tree->nb_nodes++;
+	node_t *tmp = NODE(tree, id);
 
 	tmp->parent	= parent;
 	tmp->start = start;
 	tmp->end = end;
 	tmp->depth = depth;
 	tmp->term_number = term_number;
-	tmp->suffix_link = (node_t*)NULL;
+	tmp->suffix_link = suffix_link;
 
-	tmp->children.head = NULL;
-	tmp->children.tail = NULL;
+	tmp->first_child = tmp->last_child = NONE;
+	tmp->prev =	tmp->next =	NONE;
 
-	tmp->prev =	tmp->next =	NULL;
-	tmp->python_node = NULL;
+	return id;
+}
+
+/* creates an internal node	*/
+static node_id
+internal_node(suffix_tree_t *tree, node_id parent, int start, int end,
+			  int depth, int term_number, node_id suffix_link)
+{
+	return new_node(tree, parent, start, end, depth, term_number, suffix_link);
+}
 
-	return tmp;
+/* creates a leaf node */
+static node_id
+leaf_node(suffix_tree_t *tree, node_id parent, int start, int end, int depth,
+		  int term_number)
+{
+	return new_node(tree, parent, start, end, depth, term_number, NONE);
 }
 
 
-/* inserts element into	doubly linked list */
-static node_t *
-insert(list_t *l, node_t *n)
+/* inserts n at the end of the children of parent */
+static node_id
+insert(suffix_tree_t *tree, node_id parent, node_id n)
 {
-	if(l->head == 0)
+	node_t *p = NODE(tree, parent);
+	node_t *c = NODE(tree, n);
+
+	if(p->first_child == NONE)
 	{
-		l->head	= l->tail =	n;
-		n->prev	= n->next =	0;
+		p->first_child = p->last_child = n;
+		c->prev	= c->next =	NONE;
 	}
 	else
 	{
-		n->prev	= l->tail; n->next = 0;
-		l->tail->next =	n;
-		l->tail	= n;
+		c->prev	= p->last_child; c->next = NONE;
+		NODE(tree, p->last_child)->next = n;
+		p->last_child = n;
+	}
+
+	if (tree->edges)
+	{
+		int degree = ++tree->edges->degree[parent];
+		node_id ln;
+		if (degree == INDEXED_DEGREE)
+			/* parent becomes indexed, with all its children */
+			for (ln = p->first_child; ln != NONE; ln = NODE(tree, ln)->next)
+				edge_set(tree, parent, ST_CHAR(tree, NODE(tree, ln)->start), ln);
+		else if (degree > INDEXED_DEGREE)
+			edge_set(tree, parent, ST_CHAR(tree, c->start), n);
 	}
 	return n;
 }
 
-/* replace old node	with new in	list */
+/* replace old node	with new in	the children of parent */
 static void
-replace(list_t *l, node_t *old,	node_t *new)
+replace(suffix_tree_t *tree, node_id parent, node_id old, node_id new)
 {
+	node_t *p = NODE(tree, parent);
+	node_t *o = NODE(tree, old);
+	node_t *n = NODE(tree, new);
+
 	/* first simply	re-link	nodes */
-	new->prev =	old->prev;
-	new->next =	old->next;
-	if (old->next) old->next->prev = new;
-	if (old->prev) old->prev->next = new;
-	old->prev =	old->next =	0;
+	n->prev = o->prev;
+	n->next = o->next;
+	if (o->next != NONE) NODE(tree, o->next)->prev = new;
+	if (o->prev != NONE) NODE(tree, o->prev)->next = new;
+	o->prev = o->next = NONE;
 
 	/* then	re-wire	head and tail if necessary */
-	if (l->head	== old)
-	l->head	= new;
-	if (l->tail	== old)
-	l->tail	= new;
+	if (p->first_child == old)
+	p->first_child = new;
+	if (p->last_child == old)
+	p->last_child = new;
+
+	/* new starts like old */
+	if (tree->edges && tree->edges->degree[parent] >= INDEXED_DEGREE)
+		edge_set(tree, parent, ST_CHAR(tree, n->start), new);
 }
 
 
 /*
   inserts a	new	internal node at position pos on the edge
-  between ln->elem and its parent.
+  between old and its parent.
 */
-static node_t *
-insertBefore(node_t	*old, int pos)
+static node_id
+insertBefore(suffix_tree_t *tree, node_id old, int pos)
 {
-	node_t *new	= internal_node(old->parent, old->start, pos,
-				(old->parent->depth)+(pos -	(old->start))+1,
-				old->term_number, NULL);
-	replace(&(old->parent->children), old, new);
-	insert(&(new->children), old);
-	old->start = (pos +	1);
-	old->parent	= new;
+	node_t *o = NODE(tree, old);
+	node_id parent = o->parent;
+	node_id new	= internal_node(tree, parent, o->start, pos,
+				(NODE(tree, parent)->depth)+(pos - (o->start))+1,
+				o->term_number, NONE);
+	replace(tree, parent, old, new);
+	insert(tree, new, old);
+	o->start = (pos + 1);
+	o->parent = new;
 	return new;
 }
 
-static node_t *
-fastScan(suffix_tree_t *tree, node_t *n, int start,	int	end)
+static node_id
+fastScan(suffix_tree_t *tree, node_id n, int start,	int	end)
 {
 	int	x =	start;
-	node_t *ln;
+	node_id ln = NONE;
 
 	if (start >	end) return	n;
 
 	while (x < end+1)
 	{
-		for	(ln	= n->children.head;	ln;	ln = ln->next)
-		{
-			if(tree->str[ln->start]	== tree->str[x])
-			{
-				n =	ln;
-				x =	x +	(n->end	- n->start)+1;
-				break;
-			}
-		}
+		ln = find_child(tree, n, ST_CHAR(tree, x));
+		n =	ln;
+		x =	x +	(NODE(tree, n)->end - NODE(tree, n)->start)+1;
 	}
 	if (x >	end+1)	// <=> x !=	end
 	{
-		n =	insertBefore(ln, n->end	+ end -	x +1);
+		n =	insertBefore(tree, ln, NODE(tree, n)->end + end - x +1);
 		tree->new_node = TRUE;
 	}
 	return n;
 }
 
 
-static node_t *
-slowScan(suffix_tree_t *tree, node_t *n, int start,	int	end)
+static node_id
+slowScan(suffix_tree_t *tree, node_id n, int start,	int	end)
 {
 	int	tail_length	= end -	start +	1;
-	node_t *ln;
+	node_id ln;
 
 	if (start >	end) return	n;
 
-	for	(ln	= n->children.head;	ln;	ln = ln->next)
+	ln = find_child(tree, n, ST_CHAR(tree, start));
+	if (ln != NONE)
 	{
-		if (tree->str[ln->start] ==	tree->str[start])
+		const node_t *l = NODE(tree, ln);
+		int	k =	0;
+		while (ST_CHAR(tree, l->start + k) == ST_CHAR(tree, start + k))
 		{
-			int	k =	0;
-			while (tree->str[ln->start + k]	== tree->str[start + k])
+			if (k == l->end - l->start)
 			{
-				if (k == ln->end - ln->start)
-				{
-					if (k +	1 == tail_length)
-					{
-						return ln;
-					} 
-					return slowScan(tree, ln, start+k+1, end);
-				}
-				if (k +	1 == tail_length) 
+				if (k +	1 == tail_length)
 				{
-					return insertBefore(ln,	ln->start+k);
-				}
-				k++;
-			} 
-			return insertBefore(ln,	ln->start+k-1);
-		}
+					return ln;
+				} 
+				return slowScan(tree, ln, start+k+1, end);
+			}
+			if (k +	1 == tail_length) 
+			{
+				return insertBefore(tree, ln, l->start+k);
+			}
+			k++;
+		} 
+		return insertBefore(tree, ln, l->start+k-1);
 	}
 	return n;
 }
 
 
 suffix_tree_t *
-make_helper(wchar_t *s, int length)
+make_helper(void *s, int kind, int length)
 {
-	node_t *head_i;	  /*  head_i ==	head(i)	 */
-	node_t *term_i;	  /* term_i	== terminal	node i,
+	node_id head_i;	  /*  head_i ==	head(i)	 */
+	node_id term_i;	  /* term_i	== terminal	node i,
 			 tail(i) ==	str[term_i.start...term_i.end] */
 	int	i;
-	node_t *w;
+	node_id w;
+	node_t *nodes;
 	
 	suffix_tree_t *tree	= (suffix_tree_t*)malloc(sizeof(suffix_tree_t));
 	if (!tree) return tree;
 
+	/* a tree over length characters has length leaves and less than
+	   length inner nodes, root included */
+	tree->nodes = (node_t*)malloc((size_t)2*length*sizeof(node_t));
+	if (!tree->nodes)
+	{
+		free(tree);
+		return NULL;
+	}
+	tree->nb_nodes = 0;
 	tree->str =	s;
+	tree->kind = kind;
 	tree->str_len =	length;
-	tree->root = internal_node(NULL, -1, -1, 0,	0, NULL); 
-	tree->root->suffix_link	= tree->root;
+	tree->edges = edge_index_new(1024, 2*length);
+	if (!tree->edges)
+	{
+		free(tree->nodes);
+		free(tree);
+		return NULL;
+	}
+	internal_node(tree, NONE, -1, -1, 0, 0, ROOT); 
   
 	
 	/* add str[0..length-1]	*/
-	term_i = leaf_node(tree->root, 0, length-1,	length,	0);
-	insert(&(tree->root->children),	term_i);
-	head_i = tree->root; 
+	term_i = leaf_node(tree, ROOT, 0, length-1, length, 0);
+	insert(tree, ROOT, term_i);
+	head_i = ROOT; 
   
 	for	(i = 1;	i <	length;	i++)
 	{
+		node_t *head;
 		tree->new_node = FALSE;
-		if (head_i == tree->root)
-		head_i = slowScan(tree,	tree->root,	
-				  term_i->start+1, term_i->end);
+		if (head_i == ROOT)
+		head_i = slowScan(tree,	ROOT,
+				  NODE(tree, term_i)->start+1, NODE(tree, term_i)->end);
 		else
 		{
-			if(head_i->parent != tree->root)
+			head = NODE(tree, head_i);
+			if(head->parent != ROOT)
 			w =	fastScan(tree,
-					 head_i->parent->suffix_link, 
-					 head_i->start,	head_i->end); 
+					 NODE(tree, head->parent)->suffix_link, 
+					 head->start, head->end); 
 			else
-			w =	fastScan(tree, tree->root, 
-					 head_i->start + 1,	head_i->end); 
-			head_i->suffix_link	= w;
+			w =	fastScan(tree, ROOT, 
+					 head->start + 1, head->end); 
+			NODE(tree, head_i)->suffix_link = w;
 			if (tree->new_node)
 			head_i = w;
 			else 
-			head_i = slowScan(tree,	w, term_i->start, term_i->end);
+			head_i = slowScan(tree,	w, NODE(tree, term_i)->start,
+							  NODE(tree, term_i)->end);
 		}
-		term_i = leaf_node(head_i, head_i->depth+i,	
+		term_i = leaf_node(tree, head_i, NODE(tree, head_i)->depth+i,	
 				   length-1, length-i, i); 
-		insert(&(head_i->children),	term_i);
+		insert(tree, head_i, term_i);
 	}
 
+	/* the index only serves the construction */
+	edge_index_free(tree->edges);
+	tree->edges = NULL;
+
+	/* give back the unused part of the arena */
+	nodes = (node_t*)realloc(tree->nodes, tree->nb_nodes*sizeof(node_t));
+	if (nodes) tree->nodes = nodes;
+
 	return tree;
 }
 
 suffix_tree_t *
-st_make(const wchar_t *s, const wchar_t term)
+st_make(const void *s, int kind, int length, st_char_t term)
 {
-	const wchar_t *c;
-	size_t string_length;
-	wchar_t *t;
+	suffix_tree_t *tree, view;
+	int i;
+
+	/* room for `term' and \0 */
+	view.str = malloc((size_t)(length + 2)*kind);
+	view.kind = kind;
+	if (!view.str) return NULL;
+	memcpy(view.str, s, (size_t)length*kind);
+	for	(i = 0; i < length; i++) 
+		assert(ST_CHAR(&view, i) != term);	/* make	sure `term'	is not in the string */
+	switch (kind)
+	{
+	case 1:
+		((uint8_t*)view.str)[length] = term;
+		((uint8_t*)view.str)[length+1] = 0;
+		break;
+	case 2:
+		((uint16_t*)view.str)[length] = term;
+		((uint16_t*)view.str)[length+1] = 0;
+		break;
+	default:
+		((uint32_t*)view.str)[length] = term;
+		((uint32_t*)view.str)[length+1] = 0;
+		break;
+	}
 
-	for	(c = s;	*c;	++c) 
-		assert(*c != term);	/* make	sure `term'	is not in the string */
+	tree = make_helper(view.str, kind, length + 1);
+	if (!tree) free(view.str);
+	return tree;
+}
 
-	string_length = wcslen(s) + 2; // for `term'	and	\0
-	t = malloc(string_length*sizeof(wchar_t));
-	wcscpy(t,s);
-	t[string_length-2] = term;
+void
+st_free(suffix_tree_t *tree)
+{
+	if (!tree) return;
+	free(tree->str);
+	free(tree->nodes);
+	free(tree);
+}
 
-	return make_helper(t, string_length	- 1);
+size_t
+st_memory_footprint(const suffix_tree_t *tree)
+{
+	return sizeof(suffix_tree_t)
+		+ (size_t)tree->nb_nodes*sizeof(node_t)
+		+ (size_t)(tree->str_len + 1)*tree->kind;
 }
 
 
@@ -258,21 +466,22 @@ static const node_t	*
 find_helper(const suffix_tree_t	*tree, const node_t	*n,
 		const wchar_t *s, int length)
 {
-	node_t *ln;
+	node_id ln;
 
 	if (length==0) return n;
 	
-	for	(ln	= n->children.head;	ln;	ln = ln->next)
+	for	(ln	= n->first_child; ln != NONE; ln = NODE(tree, ln)->next)
 	{
-		if (tree->str[ln->start] ==	s[0])
+		const node_t *l = NODE(tree, ln);
+		if (ST_CHAR(tree, l->start) == (st_char_t)s[0])
 		{
 			int	k =	0;
-			while (tree->str[ln->start + k]	== s[k])
+			while (ST_CHAR(tree, l->start + k) == (st_char_t)s[k])
 			{
 				if(k  == length-1)
-				return ln;
-				if (k == ln->end - ln->start)
-				return find_helper(tree, ln, 
+				return l;
+				if (k == l->end - l->start)
+				return find_helper(tree, l, 
 						   &s[k+1],	length-(k+1));
 				k++;
 			}	 
@@ -284,6 +493,183 @@ find_helper(const suffix_tree_t	*tree, const node_t	*n,
 const node_t *
 st_find(const suffix_tree_t	*tree, const wchar_t *s)
 {
-	return find_helper(tree, tree->root, s,	wcslen(s));
+	return find_helper(tree, NODE(tree, ROOT), s, wcslen(s));
+}
+
+
+
+int
+st_count_nodes(const suffix_tree_t *tree)
+{
+	return tree->nb_nodes;
+}
+
+int
+st_export_topology(const suffix_tree_t *tree, topology_t *topo)
+{
+	node_id n = ROOT;
+	int count = st_count_nodes(tree);
+	int nb = 0, rank = 0, top = -1;
+	/* ids of the ancestors of the current node and of their last
+	   child seen so far */
+	int *stack = malloc(count*sizeof(int));
+	int *last_child = malloc(count*sizeof(int));
+
+	if (!stack || !last_child)
+	{
+		free(stack);
+		free(last_child);
+		return -1;
+	}
+
+	while (n != NONE)
+	{
+		const node_t *node = NODE(tree, n);
+		int id = nb++;
+
+		topo->parent[id] = top >= 0 ? stack[top] : -1;
+		topo->first_child[id] = topo->next_sibling[id] = -1;
+		if (top >= 0)
+		{
+			if (last_child[top] < 0)
+				topo->first_child[stack[top]] = id;
+			else
+				topo->next_sibling[last_child[top]] = id;
+			last_child[top] = id;
+		}
+		topo->start[id] = node->start;
+		topo->end[id] = node->end;
+		topo->depth[id] = node->depth;
+		topo->index[id] = node->term_number;
+
+		if (node->first_child != NONE)
+		{
+			stack[++top] = id;
+			last_child[top] = -1;
+			n = node->first_child;
+			continue;
+		}
+
+		/* leaf: close every subtree that ends here */
+		topo->post_order[id] = rank++;
+		while (n != NONE && NODE(tree, n)->next == NONE)
+		{
+			n = NODE(tree, n)->parent;
+			if (n != NONE) topo->post_order[stack[top--]] = rank++;
+		}
+		if (n != NONE) n = NODE(tree, n)->next;
+	}
+
+	free(stack);
+	free(last_child);
+	return 0;
+}
+
+
+/* root of the set of i in a disjoint-set forest, with path halving */
+static int
+find_free(int *next_free, int i)
+{
+	while (next_free[i] != i)
+	{
+		next_free[i] = next_free[next_free[i]];
+		i = next_free[i];
+	}
+	return i;
 }
 
+int
+st_seq_repeat(const suffix_tree_t *tree, int length_seq1, int min_size,
+			  int *seq_deb, int *seq_fin)
+{
+	int length = tree->str_len - 1;   /* without the terminal */
+	int nb_events = 0, i, k;
+	/* repeats found, in post-order of their node */
+	int *ev_pos = malloc(tree->str_len*sizeof(int));
+	int *ev_end = malloc(tree->str_len*sizeof(int));
+	int *sorted = malloc(tree->str_len*sizeof(int));
+	int *count = calloc(length + 2, sizeof(int));
+	int *next_free = malloc((length + 1)*sizeof(int));
+	st_char_t *left = malloc(tree->str_len*sizeof(st_char_t));
+	node_id n;
+
+	if (!ev_pos || !ev_end || !sorted || !count || !next_free || !left)
+	{
+		free(ev_pos); free(ev_end); free(sorted);
+		free(count); free(next_free); free(left);
+		return -1;
+	}
+
+	/* post-order traversal of the inner nodes, children in list order */
+	n = ROOT;
+	while (NODE(tree, n)->first_child != NONE) n = NODE(tree, n)->first_child;
+	for (;;)
+	{
+		const node_t *node = NODE(tree, n);
+		if (node->first_child != NONE && node->depth >= min_size)
+		{
+			/* the leading children that are leaves with pairwise distinct
+			   left characters */
+			node_id c;
+			int has_seq1 = FALSE, has_seq2 = FALSE;
+
+			k = 0;
+			for (c = node->first_child;
+				 c != NONE && NODE(tree, c)->first_child == NONE;
+				 c = NODE(tree, c)->next)
+			{
+				int p = NODE(tree, c)->term_number;
+				st_char_t x = p > 0 ? ST_CHAR(tree, p-1) : 4;
+				for (i = 0; i < k && left[i] != x; i++)
+					;
+				if (i < k) break;
+				left[k] = x;
+				ev_pos[nb_events + k] = p;
+				ev_end[nb_events + k] = p + node->depth;
+				k++;
+				if (p < length_seq1) has_seq1 = TRUE; else has_seq2 = TRUE;
+			}
+			if (k >= 2 && has_seq1 && has_seq2)
+				nb_events += k;
+		}
+		if (n == ROOT) break;
+		if (node->next != NONE)
+		{
+			n = node->next;
+			while (NODE(tree, n)->first_child != NONE)
+				n = NODE(tree, n)->first_child;
+		}
+		else
+			n = node->parent;
+	}
+
+	/* stable counting sort of the repeats by end */
+	for (i = 0; i < nb_events; i++) count[ev_end[i] + 1]++;
+	for (i = 1; i < length + 2; i++) count[i] += count[i-1];
+	for (i = 0; i < nb_events; i++) sorted[count[ev_end[i]]++] = i;
+
+	/* a position keeps the repeat ending last, the latest in post-order
+	   on ties: paint from the last one, each position only once */
+	for (i = 0; i < length; i++)
+	{
+		seq_deb[i] = seq_fin[i] = i;
+		next_free[i] = i;
+	}
+	next_free[length] = length;
+	for (k = nb_events - 1; k >= 0; k--)
+	{
+		int e = sorted[k];
+		int end = ev_end[e] < length ? ev_end[e] : length;
+		for (i = find_free(next_free, ev_pos[e]); i < end;
+			 i = find_free(next_free, i))
+		{
+			seq_deb[i] = ev_pos[e];
+			seq_fin[i] = ev_end[e];
+			next_free[i] = i + 1;
+		}
+	}
+
+	free(ev_pos); free(ev_end); free(sorted);
+	free(count); free(next_free); free(left);
+	return 0;
+}
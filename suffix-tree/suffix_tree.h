@@ -4,51 +4,100 @@
 #ifndef SUFFIX_TREE_H_INCLUDED
 #define SUFFIX_TREE_H_INCLUDED
 
-/* doubly linked list */
-struct list {
-    struct node *head;
-    struct node *tail;
-};
-typedef struct list list_t;
+#include <stdint.h>
+#include <wchar.h>
 
+/* index of a node in the arena of its tree, NONE when there is no node */
+typedef int node_id;
+#define NONE (-1)
 
-/* node in suffix tree */
+/* node in suffix tree -- nodes are stored contiguously in the arena of
+   the tree and refer to each other by their index in it */
 struct node {
-    struct node *parent;
+    node_id parent;
     int start;           /* label(parent, this) = str[start..end] */
     int end;             
     int depth;
     int term_number;     /* if internal it is the terminal number of a
 			  * descendent */
-    struct node *suffix_link; 
-    list_t children;
-
-    /* doubly linked list part */
-    struct node *next;
-    struct node *prev;
+    node_id suffix_link; 
 
-    /* link to python -- needed to make sure we always get the same
-       python object when we ask for a node */
-    struct NodeObject *python_node;
+    /* children, as a doubly linked list of siblings */
+    node_id first_child;
+    node_id last_child;
+    node_id next;
+    node_id prev;
 };
 typedef struct node node_t;
 
 
 
 struct suffix_tree {
-    wchar_t *str;
+    void *str;           /* kind bytes per character, like PyUnicode */
+    int kind;            /* 1, 2 or 4 */
     int str_len;
-    node_t *root;
+    node_t *nodes;       /* arena, the root is nodes[0] */
+    int nb_nodes;
     int new_node;
+    struct edge_index *edges;   /* only during the construction */
 };
 typedef struct suffix_tree suffix_tree_t;
 
+#define ROOT 0
+#define NODE(tree, id) (&(tree)->nodes[(id)])
+
+typedef uint32_t st_char_t;
+
+/* character i of the string of the tree, whatever the width of its
+   characters */
+#define ST_CHAR(tree, i)                                       \
+    ((tree)->kind == 1 ? (st_char_t)((uint8_t*)(tree)->str)[i] :  \
+     (tree)->kind == 2 ? (st_char_t)((uint16_t*)(tree)->str)[i] : \
+     ((uint32_t*)(tree)->str)[i])
+
 
 
-/* builds a suffix tree for the string s -- s must NOT contain the
-   special character `term' (term ensures that all suffixes are leaves) */
-suffix_tree_t *       st_make(const wchar_t *s, const wchar_t term);
+/* builds a suffix tree for the string s of length characters of kind
+   bytes each (1, 2 or 4) -- s must NOT contain the special character `term'
+   (term ensures that all suffixes are leaves) and term must fit in kind
+   bytes.  s is copied. */
+suffix_tree_t *       st_make(const void *s, int kind, int length,
+                              st_char_t term);
 const node_t *        st_find(const suffix_tree_t *tree, const wchar_t *s);
+void                  st_free(suffix_tree_t *tree);
+/* bytes allocated for the tree: arena, string and tree header */
+size_t                st_memory_footprint(const suffix_tree_t *tree);
+
+
+/* flat description of the tree topology, one entry per node in pre-order
+   (the root is node 0); -1 marks a missing parent/child/sibling */
+struct topology {
+    int *parent;
+    int *first_child;
+    int *next_sibling;
+    int *start;
+    int *end;
+    int *depth;
+    int *index;          /* term_number of the node */
+    int *post_order;     /* rank of the node in a post-order traversal */
+};
+typedef struct topology topology_t;
+
+int                   st_count_nodes(const suffix_tree_t *tree);
+/* fills the arrays of topo, each must hold st_count_nodes(tree) ints;
+   returns 0 on success, -1 if the working memory could not be allocated */
+int                   st_export_topology(const suffix_tree_t *tree,
+                                         topology_t *topo);
+
+/* generalised tree over seq1 + seq2: for each position i of the string
+   (terminal excluded), [seq_deb[i], seq_fin[i]) is the longest left-diverse
+   repeat of length >= min_size occurring in both sequences that covers i
+   (seq_deb[i] = seq_fin[i] = i if there is none).  Positions below
+   length_seq1 belong to the first sequence.  Returns 0 on success, -1 if
+   the working memory could not be allocated */
+int                   st_seq_repeat(const suffix_tree_t *tree,
+                                    int length_seq1, int min_size,
+                                    int *seq_deb, int *seq_fin);
 
 
 
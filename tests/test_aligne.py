@@ -0,0 +1,50 @@
+import random
+
+import pytest
+
+from variance.medite import aligne
+
+
+def random_blocks(rng, start, end):
+    blocks = []
+    while start < end:
+        stop = min(end, start + rng.randint(1, 3))
+        blocks.append((start, stop))
+        start = stop
+    return blocks
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_fast_his_matches_his(seed):
+    rng = random.Random(seed)
+    for _ in range(50):
+        text = "".join(rng.choice("ab") for _ in range(rng.randint(1, 80)))
+        lt1 = rng.randint(0, len(text))
+        L1 = random_blocks(rng, 0, lt1)
+        L2 = random_blocks(rng, lt1, len(text))
+        t1, t2 = text[:lt1], text[lt1:]
+        expected = aligne.AlignHIS().alignement(L1, L2, t1, t2, lt1)
+        assert aligne.AlignHISRapide().alignement(L1, L2, t1, t2, lt1) == expected
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_segment_tree_gives_the_first_maximum(seed):
+    rng = random.Random(seed)
+    for size in [1, 2, 3, 7, 8, 33]:
+        weights = [rng.randint(1, 4) for _ in range(size)]
+        tree = aligne.ArbreMaxima(weights)
+        for start in range(size):
+            for end in range(start + 1, size + 1):
+                best = max(weights[start:end])
+                assert tree.premier_maximum(start, end) == weights.index(best, start)
+
+
+def test_fast_his_matches_his_with_many_repeated_blocks():
+    rng = random.Random(0)
+    text = "".join(rng.choice("ab") for _ in range(1200))
+    lt1 = 600
+    L1 = random_blocks(rng, 0, lt1)
+    L2 = random_blocks(rng, lt1, len(text))
+    t1, t2 = text[:lt1], text[lt1:]
+    expected = aligne.AlignHIS().alignement(L1, L2, t1, t2, lt1)
+    assert aligne.AlignHISRapide().alignement(L1, L2, t1, t2, lt1) == expected
@@ -0,0 +1,192 @@
+import json
+import random
+from pathlib import Path
+
+import pytest
+
+from variance.medite import alignement
+from variance.medite import medite as md
+
+TEST_DATA_DIR = Path("tests/data")
+
+
+def test_parallel_gaps_give_the_serial_result(monkeypatch):
+    t1 = (TEST_DATA_DIR / "Labelle" / "01LaBelle_Ms.txt").read_text(encoding="utf-8")
+    t2 = (TEST_DATA_DIR / "Labelle" / "02LaBelle_Mercure.txt").read_text(
+        encoding="utf-8"
+    )
+    expected = md.DiffTexts(t1, t2, md.DEFAULT_PARAMETERS).bbl.liste
+    # small threshold so that most top-level gaps go to the pool
+    monkeypatch.setattr(alignement, "SEUIL_ECART_PARALLELE", 50)
+    submitted = []
+    pools = set()
+    lancer_ecarts = alignement.AlignAstarRecur._lancer_ecarts
+
+    def spy(self, parallele, *args):
+        futures = lancer_ecarts(self, parallele, *args)
+        submitted.extend(futures)
+        pools.add(parallele.pool)
+        return futures
+
+    monkeypatch.setattr(alignement.AlignAstarRecur, "_lancer_ecarts", spy)
+    parameters = md.DEFAULT_PARAMETERS._replace(workers=2)
+    assert md.DiffTexts(t1, t2, parameters).bbl.liste == expected
+    assert len(submitted) > 0
+    # one pool for the whole alignment, closed once it is done
+    assert len(pools) == 1
+    assert all(pool._shutdown_thread for pool in pools)
+
+
+def test_collation_shares_one_pool(monkeypatch):
+    t1 = (TEST_DATA_DIR / "Labelle" / "01LaBelle_Ms.txt").read_text(encoding="utf-8")
+    t2 = (TEST_DATA_DIR / "Labelle" / "02LaBelle_Mercure.txt").read_text(
+        encoding="utf-8"
+    )
+    texts = [t1, t2, t1[: len(t1) // 2] + t2[len(t2) // 2 :]]
+    expected = md.collation(texts, md.DEFAULT_PARAMETERS)
+    monkeypatch.setattr(alignement, "SEUIL_ECART_PARALLELE", 50)
+    pools = []
+    lancer_ecarts = alignement.AlignAstarRecur._lancer_ecarts
+
+    def spy(self, parallele, *args):
+        futures = lancer_ecarts(self, parallele, *args)
+        if len(futures) > 0:
+            pools.append(parallele.pool)
+        return futures
+
+    monkeypatch.setattr(alignement.AlignAstarRecur, "_lancer_ecarts", spy)
+    parameters = md.DEFAULT_PARAMETERS._replace(workers=2)
+    result = md.collation(texts, parameters)
+    assert {k: v.bbl.liste for k, v in result.items()} == {
+        k: v.bbl.liste for k, v in expected.items()
+    }
+    # every pair submitted its gaps to the same pool, closed at the end
+    assert len(pools) >= len(texts) and len(set(pools)) == 1
+    assert pools[0]._shutdown_thread
+
+
+def as_lists(x):
+    """Tuples and numpy integers as the plain lists and ints of a json file"""
+    if isinstance(x, (list, tuple)):
+        return [as_lists(k) for k in x]
+    return int(x) if hasattr(x, "item") else x
+
+
+def test_labelle_matches_the_baseline_output():
+    t1 = (TEST_DATA_DIR / "Labelle" / "01LaBelle_Ms.txt").read_text(encoding="utf-8")
+    t2 = (TEST_DATA_DIR / "Labelle" / "02LaBelle_Mercure.txt").read_text(
+        encoding="utf-8"
+    )
+    # output of the recursive deplacements_pond2, before the explicit stack
+    golden = TEST_DATA_DIR / "Labelle" / "01LaBelle_Ms_02LaBelle_Mercure.golden.json"
+    expected = json.loads(golden.read_text(encoding="utf-8"))
+    appli = md.DiffTexts(t1, t2, md.DEFAULT_PARAMETERS)
+    assert as_lists(appli.occs_deplaces) == expected["occs_deplaces"]
+    assert as_lists(appli.blocsCommuns) == expected["blocsCommuns"]
+    assert as_lists(appli.bbl.liste) == expected["liste"]
+
+
+def clean_moves_reference(aligner, moves, t1, t2):
+    """cleanDep before the bounded version: passes up to a fixed point"""
+    size = len(moves) + 1
+    while len(moves) < size:
+        size = len(moves)
+        moves = aligner.removeInclude(moves)
+        moves = aligner.removeUnique(moves, t1, t2)
+    return moves
+
+
+def filter_pass_reference(moves):
+    """One pass of _filtreDepRec before the chain version"""
+    result = []
+    i = 0
+    while i < len(moves) - 1:
+        move1, move2 = moves[i], moves[i + 1]
+        if move1[1] > move2[0]:
+            if move1[1] - move1[0] >= move2[1] - move2[0]:
+                result.append(move1)
+                i += 2
+            else:
+                result.append(move2)
+                i += 1
+        else:
+            result.append(move1)
+            i += 1
+    if i == len(moves) - 1:
+        result.append(moves[-1])
+    return result
+
+
+def filter_moves_reference(moves):
+    """_filtreDepRec before the chain version: passes until a size fixed point"""
+    previous = 0
+    moves = filter_pass_reference(moves)
+    current = len(moves)
+    while previous != current:
+        previous = current
+        moves = filter_pass_reference(moves)
+        current = len(moves)
+    return moves
+
+
+def random_moves(rng, length1, length2, count):
+    """Moves inside the first or the second text, never across both"""
+    moves = []
+    for _ in range(count):
+        offset, length = rng.choice([(0, length1), (length1, length2)])
+        start = rng.randint(0, length - 1)
+        end = min(length, start + rng.randint(1, 4))
+        moves.append([offset + start, offset + end])
+    return moves
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_bounded_move_cleaning_matches_fixed_point(seed):
+    rng = random.Random(seed)
+    t1 = "".join(rng.choice("ab") for _ in range(rng.randint(1, 40)))
+    t2 = "".join(rng.choice("ab") for _ in range(rng.randint(1, 40)))
+    aligner = alignement.AlignAstarRecur(len(t1), False, " ")
+    for _ in range(20):
+        moves = random_moves(rng, len(t1), len(t2), rng.randint(0, 30))
+        if rng.random() < 0.5:
+            moves.sort()
+        expected = clean_moves_reference(aligner, [m[:] for m in moves], t1, t2)
+        assert aligner.cleanDep([m[:] for m in moves], t1, t2) == expected
+
+
+@pytest.mark.parametrize("direct_passes", [1, alignement.PASSAGES_DIRECTS])
+@pytest.mark.parametrize("seed", range(20))
+def test_move_filtering_matches_fixed_point(seed, direct_passes, monkeypatch):
+    # with a single direct pass, every overlapping list goes through the chains
+    monkeypatch.setattr(alignement, "PASSAGES_DIRECTS", direct_passes)
+    rng = random.Random(seed)
+    aligner = alignement.AlignAstarRecur(50, False, " ")
+    for _ in range(50):
+        moves = sorted(random_moves(rng, 50, 50, rng.randint(0, 10)))
+        if rng.random() < 0.5:
+            # no overlap between consecutive moves
+            moves = [
+                m for i, m in enumerate(moves) if i == 0 or moves[i - 1][1] <= m[0]
+            ]
+        expected = filter_moves_reference(moves)
+        assert aligner._filtreDepRec(moves) == expected
+    for _ in range(20):
+        # dense overlaps, moves of every length, a few out of order
+        count = rng.randint(20, 200)
+        span = rng.choice([count, 5 * count])
+        moves = [
+            [start, start + rng.randint(0, 15)]
+            for start in (rng.randint(0, span) for _ in range(count))
+        ]
+        if rng.random() < 0.8:
+            moves.sort()
+        assert alignement.filtrer_chevauchements(moves) == filter_moves_reference(moves)
+
+
+def test_move_filtering_of_growing_chains():
+    # each pass only drops the first move of a chain of longer and longer moves
+    moves = [[k, 3 * k + 10] for k in range(60)]
+    moves += [[400 + k, 420 + 2 * k] for k in range(30)] + [[500, 501]]
+    expected = filter_moves_reference(moves)
+    assert expected == [[59, 187], [429, 478], [500, 501]]
+    assert alignement.filtrer_chevauchements(moves) == expected
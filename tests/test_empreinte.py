@@ -0,0 +1,53 @@
+import random
+import subprocess
+import sys
+from os.path import dirname
+
+from variance.medite import empreinte
+
+
+def reference_key(s):
+    (p1, b1), (p2, b2) = empreinte.HACHAGES
+    h1 = h2 = 0
+    for c in s:
+        h1 = (h1 * b1 + ord(c)) % p1
+        h2 = (h2 * b2 + ord(c)) % p2
+    return h1 + p1 * ((h2 - h1) * pow(p1, -1, p2) % p2)
+
+
+def test_keys_are_polynomial_hashes_of_substrings():
+    rng = random.Random(0)
+    text = "".join(rng.choice("ab cé.\U0001F600") for _ in range(500))
+    fingerprints = empreinte.Empreintes(text)
+    starts, ends = [], []
+    for _ in range(500):
+        a = rng.randint(0, len(text))
+        b = rng.randint(a, len(text))
+        assert fingerprints.cle(a, b) == reference_key(text[a:b])
+        starts.append(a)
+        ends.append(b)
+    assert fingerprints.cles(starts, ends).tolist() == [
+        fingerprints.cle(a, b) for a, b in zip(starts, ends)
+    ]
+    # same content, same key, wherever it is
+    text = "abcXabc"
+    fingerprints = empreinte.Empreintes(text)
+    assert fingerprints.cle(0, 3) == fingerprints.cle(4, 7) != fingerprints.cle(1, 4)
+
+
+def test_keys_do_not_depend_on_hash_seed():
+    code = (
+        "from variance.medite import empreinte;"
+        "print(empreinte.Empreintes('Alice mange du chocolat').cle(6, 11))"
+    )
+    keys = {
+        subprocess.run(
+            [sys.executable, "-c", code],
+            env={"PYTHONHASHSEED": seed, "PYTHONPATH": dirname(dirname(__file__))},
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        for seed in ["0", "1", "12345"]
+    }
+    assert len(keys) == 1
@@ -0,0 +1,130 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from variance.medite import medite as md
+
+TEST_DATA_DIR = Path("tests/data")
+
+WORD = "chocolatbateaupain"
+
+
+def make_diff(words1, words2, length1=12000, length2=12000):
+    """Texts of dots with the given {position: word}, every word is a move"""
+    texte1 = list("." * length1)
+    texte2 = list("." * length2)
+    for texte, words in ((texte1, words1), (texte2, words2)):
+        for position, word in words.items():
+            texte[position : position + len(word)] = word
+    diff = md.DiffTexts.__new__(md.DiffTexts)
+    diff.texte1 = "".join(texte1)
+    diff.texte2 = "".join(texte2)
+    diff.lg_texte1 = length1
+    diff.lg_texte2 = length2
+    diff.occs_deplaces = [[p, p + len(w)] for p, w in sorted(words1.items())] + [
+        [length1 + p, length1 + p + len(w)] for p, w in sorted(words2.items())
+    ]
+    diff.suppressions = []
+    diff.insertions = []
+    return diff
+
+
+@pytest.mark.parametrize(
+    "length, distance, kept",
+    [
+        (16, 11000, True),
+        (15, 9000, False),
+        (15, 8999, True),
+        (8, 9000, False),
+        (8, 8999, True),
+        (8, 3000, True),
+        (7, 3000, False),
+        (7, 2999, True),
+    ],
+)
+def test_move_is_kept_according_to_its_length_and_distance(length, distance, kept):
+    word = WORD[:length]
+    diff = make_diff({100: word}, {100 + distance: word})
+    source = (100, 100 + length)
+    target = (12100 + distance, 12100 + distance + length)
+    pairs = diff.calcPairesBlocsDeplaces(diff.occs_deplaces)
+    if kept:
+        assert pairs == [(source, target)]
+        assert diff.occs_deplaces == [list(source), list(target)]
+        assert diff.suppressions == []
+        assert diff.insertions == []
+    else:
+        assert pairs == []
+        assert diff.occs_deplaces == []
+        assert diff.suppressions == [source]
+        assert diff.insertions == [target]
+
+
+def test_source_block_is_paired_with_every_identical_target():
+    diff = make_diff(
+        {10: "chocolat", 40: "pain"},
+        {50: "chocolat", 80: "bateau", 500: "chocolat", 900: "pain"},
+    )
+    pairs = diff.calcPairesBlocsDeplaces(diff.occs_deplaces)
+    assert pairs == [
+        ((10, 18), (12050, 12058)),
+        ((10, 18), (12500, 12508)),
+        ((40, 44), (12900, 12904)),
+    ]
+    # the target without a source stays a move
+    assert [12080, 12086] in diff.occs_deplaces
+
+
+def test_rejected_pair_removes_its_source_even_when_another_pair_is_kept():
+    diff = make_diff({10: "pain"}, {50: "pain", 5010: "pain"})
+    diff.suppressions = [(0, 5), (200, 210)]
+    diff.insertions = [(12000, 12003)]
+    pairs = diff.calcPairesBlocsDeplaces(diff.occs_deplaces)
+    assert pairs == [((10, 14), (12050, 12054))]
+    assert diff.occs_deplaces == [[12050, 12054]]
+    assert diff.suppressions == [(0, 5), (10, 14), (200, 210)]
+    assert diff.insertions == [(12000, 12003), (17010, 17014)]
+
+
+def test_no_move_gives_no_pair():
+    diff = make_diff({}, {})
+    assert diff.calcPairesBlocsDeplaces(diff.occs_deplaces) == []
+
+
+@pytest.mark.parametrize(
+    "items, expected",
+    [
+        ([], []),
+        ([(0, 3), (3, 5), (7, 9)], [(0, 5), (7, 9)]),
+        ([(0, 2), (2, 4), (4, 6)], [(0, 6)]),
+        ([(1, 4), (1, 4)], [(1, 4)]),
+        ([(0, 0), (0, 3)], [(0, 3)]),
+        ([(0, 2), (3, 4)], [(0, 2), (3, 4)]),
+        ([(0, 4), (2, 6)], [(0, 4), (2, 6)]),
+    ],
+)
+def test_touching_items_are_fused(items, expected):
+    diff = md.DiffTexts.__new__(md.DiffTexts)
+    assert diff.fusionItemsAdjacents(items) == expected
+
+
+def as_lists(x):
+    """Tuples and numpy integers as the plain lists and ints of a json file"""
+    if isinstance(x, (list, tuple)):
+        return [as_lists(k) for k in x]
+    return int(x) if hasattr(x, "item") else x
+
+
+def test_labelle_moves_match_the_baseline_output():
+    t1 = (TEST_DATA_DIR / "Labelle" / "01LaBelle_Ms.txt").read_text(encoding="utf-8")
+    t2 = (TEST_DATA_DIR / "Labelle" / "02LaBelle_Mercure.txt").read_text(
+        encoding="utf-8"
+    )
+    golden = TEST_DATA_DIR / "Labelle" / "01LaBelle_Ms_02LaBelle_Mercure.golden.json"
+    expected = json.loads(golden.read_text(encoding="utf-8"))
+    appli = md.DiffTexts(t1, t2, md.DEFAULT_PARAMETERS)
+    assert as_lists(appli.lDepl) == expected["lDepl"]
+    assert as_lists(appli.occs_deplaces) == expected["occs_deplaces"]
+    assert as_lists(appli.result.getListeInsertions()) == expected["insertions"]
+    assert as_lists(appli.result.getListeSuppressions()) == expected["suppressions"]
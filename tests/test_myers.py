@@ -0,0 +1,52 @@
+import random
+
+import pytest
+
+from variance.medite import medite as md
+from variance.medite import myers
+
+
+def lcs_length(a, b):
+    table = [[0] * (len(b) + 1) for _ in range(len(a) + 1)]
+    for i in range(len(a) - 1, -1, -1):
+        for j in range(len(b) - 1, -1, -1):
+            if a[i] == b[j]:
+                table[i][j] = table[i + 1][j + 1] + 1
+            else:
+                table[i][j] = max(table[i + 1][j], table[i][j + 1])
+    return table[0][0]
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_common_subsequence_is_longest(seed):
+    rng = random.Random(seed)
+    for _ in range(100):
+        a = [rng.choice("abc") for _ in range(rng.randint(0, 20))]
+        b = [rng.choice("abc") for _ in range(rng.randint(0, 20))]
+        pairs = myers.sous_suite_commune(a, b)
+        assert len(pairs) == lcs_length(a, b)
+        assert all(a[i] == b[j] for i, j in pairs)
+        assert all(p < q for p, q in zip(pairs, pairs[1:]))
+        assert all(p[1] < q[1] for p, q in zip(pairs, pairs[1:]))
+
+
+def test_common_blocks_are_whole_words():
+    t1 = "Alice mange du pain."
+    t2 = "Alice mangeait du bon pain."
+    blocks1, blocks2 = myers.blocs_communs(t1, t2, " .", 3)
+    assert [t1[d:f] for d, f in blocks1] == ["Alice ", " du ", "pain."]
+    assert [t2[d:f] for d, f in blocks2] == ["Alice ", " du ", "pain."]
+
+
+def test_diff_texts_with_direct_diff_of_small_gaps():
+    txt1 = "Alice mange du chocolat et du pain, puis elle boit un verre de lait."
+    txt2 = "Alice mange un chocolat chaud et du pain, puis boit un grand verre."
+    parameters = md.DEFAULT_PARAMETERS._replace(lg_pivot=4, lg_diff_direct=40)
+    result = md.DiffTexts(txt1, txt2, parameters)
+    texte = txt1 + txt2
+    common = [
+        (B1, B2) for B1, B2 in result.bbl.liste if B1 is not None and B1[0] == "BC"
+    ]
+    assert len(common) > 0
+    for B1, B2 in common:
+        assert texte[B1[1] : B1[2]] == texte[B2[1] : B2[2]]
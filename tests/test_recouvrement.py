@@ -0,0 +1,71 @@
+import random
+
+import pytest
+
+from variance.medite import recouvrement, suffix_array
+
+
+def test_interval_coverage_matches_arrays():
+    rng = random.Random(0)
+    n = 60
+    arrays = recouvrement.CouvertureTableaux(n)
+    intervals = recouvrement.CouvertureIntervalles(n)
+    for _ in range(2000):
+        debut = rng.randint(0, n + 5)
+        fin = rng.randint(0, n + 5)
+        if rng.random() < 0.3:
+            arrays.liberer(debut, fin)
+            intervals.liberer(debut, fin)
+        else:
+            # as in Recouvrement4, the block value spans the written range
+            bloc = (rng.randint(0, debut), rng.randint(fin, n + 5))
+            arrays.marquer(debut, fin, *bloc)
+            intervals.marquer(debut, fin, *bloc)
+        assert [intervals.bloc(p) for p in range(n)] == [
+            tuple(map(int, arrays.bloc(p))) for p in range(n)
+        ]
+        assert list(intervals.blocs()) == list(arrays.blocs())
+    with pytest.raises(IndexError):
+        intervals.bloc(n)
+
+
+def test_interval_coverage_with_many_blocks():
+    # enough blocks for a list-backed coverage to go quadratic
+    rng = random.Random(0)
+    nb = 30000
+    n = 20 * nb
+    arrays = recouvrement.CouvertureTableaux(n)
+    intervals = recouvrement.CouvertureIntervalles(n)
+    starts = list(range(0, n - 20, 20))
+    rng.shuffle(starts)
+    for debut in starts:
+        fin = debut + rng.randint(5, 25)
+        assert intervals.bloc(debut) == tuple(map(int, arrays.bloc(debut)))
+        for coverage in (arrays, intervals):
+            coverage.marquer(debut, fin, debut, fin)
+            coverage.liberer(debut + 2, debut + 3)
+    expected = list(arrays.blocs())
+    assert len(expected) > nb // 2
+    assert list(intervals.blocs()) == expected
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_overlap_elimination_same_with_both_coverages(seed):
+    rng = random.Random(seed)
+    alphabet = rng.choice(["ab", "ab c.", "abcdefgh "])
+    t1, t2 = (
+        "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 300)))
+        for _ in range(2)
+    )
+    results = []
+    for couverture in [
+        recouvrement.CouvertureTableaux,
+        recouvrement.CouvertureIntervalles,
+    ]:
+        mem = suffix_array.GeneralisedSuffixArray([t1, t2]).get_MEM(3)
+        results.append(
+            recouvrement.Recouvrement4(
+                t1 + t2, mem, len(t1), 3, couverture=couverture
+            ).eliminer_recouvrements()
+        )
+    assert results[0] == results[1]
@@ -0,0 +1,67 @@
+import pytest
+
+from variance.medite import separateurs, suffix_tree
+
+SEP = " .,\n"
+
+
+def test_next_and_previous_separator():
+    # separators at 2, 3 and 6
+    index = separateurs.IndexSeparateurs("ab, cd.e", SEP)
+    assert index.est_sep == [False, False, True, True, False, False, True, False]
+    assert index.nombre == 3
+    assert index.suivant.tolist() == [2, 2, 2, 3, 6, 6, 6, 8, 8]
+    assert index.precedent.tolist() == [-1, -1, 2, 3, 3, 3, 6, 6, 6]
+
+
+def test_first_and_last_separator_of_a_range():
+    index = separateurs.IndexSeparateurs("ab, cd.e", SEP)
+    assert index.premier(0, 1) is None
+    assert index.premier(0, 2) == 2
+    assert index.premier(4, 8) == 6
+    assert index.premier(7, 8) is None
+    assert index.dernier(0, 8) == 6
+    assert index.dernier(3, 5) == 3
+    assert index.dernier(4, 5) is None
+    assert index.dernier(0, 1) is None
+
+
+def test_separators_outside_the_ascii_range():
+    index = separateurs.IndexSeparateurs("é«a»", "«»")
+    assert index.est_sep == [False, True, False, True]
+    assert index.nombre == 2
+
+
+def test_empty_text():
+    index = separateurs.IndexSeparateurs("", SEP)
+    assert index.nombre == 0
+    assert index.suivant.tolist() == [0]
+    assert index.precedent.tolist() == [-1]
+
+
+@pytest.mark.parametrize(
+    "t1, t2, expected",
+    [
+        # both ends already on word boundaries
+        ("le chat dort.", "un chat dort bien", {" chat dort": [2, 15]}),
+        # "abricot" ends inside "abricotier": nothing is left of it
+        ("abricot sec", "un abricotier sec", {" sec": [7, 24]}),
+        # the start is moved to the first separator
+        ("xchat dort", "ychat dort", {" dort": [5, 15]}),
+        # the end is moved back to the last separator
+        ("le chat dorx", "le chat dory", {"le chat ": [0, 12]}),
+        ("xle chat dorx", "yle chat dory", {" chat ": [3, 16]}),
+        # too short once trimmed
+        ("xchat dort", "ychat dorz", {}),
+    ],
+)
+def test_repeats_are_trimmed_to_whole_words(t1, t2, expected):
+    st = suffix_tree.GeneralisedSuffixTree([t1, t2])
+    blocs = st.get_MEM_index_chaine3(False, SEP, 2, False)
+    candidates = [(cle, lg, pos) for (cle, lg), pos in blocs.items()]
+    trimmed = st._rogner_mots(candidates, st.get_separateurs(SEP), 2)
+    texte = t1 + t2
+    words = {texte[pos[0] : pos[0] + lg]: list(pos) for (_, lg), pos in trimmed.items()}
+    assert words == expected
+    for (cle, lg), pos in trimmed.items():
+        assert cle == st.get_empreintes().cle(pos[0], pos[0] + lg)
@@ -0,0 +1,236 @@
+import random
+
+import numpy
+import pytest
+
+from variance.medite import medite as md
+from variance.medite import alignement, suffix_array, suffix_tree
+from variance.medite import utile as ut
+
+
+def gen_text_pairs():
+    yield "mississippi", "sippissi"
+    yield "Alice mange du chocolat", "Alice descend du bateau"
+    yield "", "abc"
+    yield "abab", ""
+    yield "一寸光阴一寸金", "寸金难买寸光阴"
+    rng = random.Random(0)
+    # the last alphabet gives the root a fan-out above the edge index threshold
+    for alphabet in ["ab", "ab c.", "abcdefgh ", "".join(map(chr, range(40, 140)))]:
+        for _ in range(20):
+            yield tuple(
+                "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 300)))
+                for _ in range(2)
+            )
+
+
+@pytest.mark.parametrize("min_size", [1, 3])
+@pytest.mark.parametrize("t1,t2", gen_text_pairs())
+def test_same_mem_as_suffix_tree(t1, t2, min_size):
+    st = suffix_tree.GeneralisedSuffixTree([t1, t2])
+    sa = suffix_array.GeneralisedSuffixArray([t1, t2])
+    assert sa.get_MEM(min_size) == st.get_MEM(min_size)
+
+
+def test_suffix_and_lcp_tables():
+    codes = ut.codes_caracteres("banana")
+    sa, rangs = suffix_array.table_suffixes(codes)
+    assert sa.tolist() == [5, 3, 1, 0, 4, 2]
+    assert suffix_array.table_lcp(sa, rangs).tolist() == [0, 1, 3, 0, 0, 2, 0]
+
+
+def test_diff_texts_with_suffix_array():
+    txt1 = "Alice mange du chocolat et du pain."
+    txt2 = "Alice descend du bateau, mange du pain et du chocolat."
+    parameters = md.DEFAULT_PARAMETERS._replace(lg_pivot=4)
+    expected = md.DiffTexts(txt1, txt2, parameters).bbl.liste
+    result = md.DiffTexts(txt1, txt2, parameters._replace(algo_index="SA")).bbl.liste
+    assert result == expected
+
+
+@pytest.mark.parametrize("eliminRecouv", [True, False])
+@pytest.mark.parametrize("t1,t2", list(gen_text_pairs())[:45])
+def test_word_index_blocks_are_whole_words(t1, t2, eliminRecouv):
+    sep = md.DEFAULT_PARAMETERS.sep + "."
+    sa = suffix_array.GeneralisedWordSuffixArray([t1, t2], sep)
+    blocs = sa.get_MEM_index_chaine3(True, sep, 2, eliminRecouv)
+    texte = t1 + t2
+    frontiere = suffix_array.frontieres_mots(ut.codes_caracteres(texte), sep, len(t1))
+    for (_, longueur), positions in blocs.items():
+        assert longueur >= 2
+        assert positions[0] < len(t1) <= positions[-1]
+        assert len({texte[p : p + longueur] for p in positions}) == 1
+        for p in positions:
+            assert frontiere[p] and frontiere[p + longueur]
+
+
+def test_diff_texts_with_word_index():
+    txt1 = "Alice mange du chocolat et du pain."
+    txt2 = "Alice descend du bateau, mange du pain et du chocolat."
+    parameters = md.DEFAULT_PARAMETERS._replace(lg_pivot=4)
+    expected = md.DiffTexts(txt1, txt2, parameters).bbl.liste
+    result = md.DiffTexts(txt1, txt2, parameters._replace(algo_index="MOT")).bbl.liste
+    assert result == expected
+
+
+@pytest.mark.parametrize(
+    "make_index",
+    [
+        suffix_array.GeneralisedSuffixArray,
+        lambda texts, directory: suffix_array.GeneralisedWordSuffixArray(
+            texts, md.DEFAULT_PARAMETERS.sep, directory
+        ),
+    ],
+)
+def test_index_saved_and_memory_mapped(tmp_path, make_index):
+    t1 = "Alice mange du chocolat et du pain. " * 5
+    t2 = "Alice descend du bateau, mange du pain et du chocolat. " * 5
+    expected = make_index([t1, t2], None).get_MEM(4)
+    cold = make_index([t1, t2], str(tmp_path))
+    assert cold.get_MEM(4) == expected
+    assert [p.name for p in tmp_path.iterdir()] == [cold.cle_index()]
+    warm = make_index([t1, t2], str(tmp_path))
+    assert isinstance(warm.sa, numpy.memmap)
+    assert warm.get_MEM(4) == expected
+    # the key depends on the indexed texts
+    assert make_index([t1, t2 + "!"], None).cle_index() != cold.cle_index()
+
+
+@pytest.mark.parametrize("algo_index,saved", [("ST", 0), ("SA", 2), ("MOT", 1)])
+def test_diff_texts_with_index_dir(tmp_path, caplog, algo_index, saved):
+    txt1 = "Alice mange du chocolat et du pain."
+    txt2 = "Alice descend du bateau, mange du pain et du chocolat."
+    parameters = md.DEFAULT_PARAMETERS._replace(lg_pivot=4, algo_index=algo_index)
+    expected = md.DiffTexts(txt1, txt2, parameters).bbl.liste
+    parameters = parameters._replace(index_dir=str(tmp_path))
+    for _ in range(2):
+        assert md.DiffTexts(txt1, txt2, parameters).bbl.liste == expected
+    # one index per edition (SA), one per pair (MOT), none for the suffix tree
+    assert len(list(tmp_path.iterdir())) == saved
+    ignored = [r for r in caplog.records if "index_dir" in r.getMessage()]
+    assert len(ignored) == (2 if algo_index == "ST" else 0)
+
+
+@pytest.mark.parametrize("t1,t2", gen_text_pairs())
+def test_merged_text_indexes_match_pair_index(t1, t2):
+    sep = md.DEFAULT_PARAMETERS.sep
+    pair = suffix_array.IndexTexte(t1, sep).paire(suffix_array.IndexTexte(t2, sep))
+    expected = suffix_array.GeneralisedSuffixArray([t1, t2])
+    assert pair.sa.tolist() == expected.sa.tolist()
+    assert pair.lcp.tolist() == expected.lcp.tolist()
+    assert pair.get_MEM(3) == expected.get_MEM(3)
+    assert pair.get_separateurs(sep).est_sep == expected.get_separateurs(sep).est_sep
+
+
+def test_base_index_is_reused_against_two_witnesses(tmp_path, monkeypatch):
+    sep = md.DEFAULT_PARAMETERS.sep
+    base = "Alice mange du chocolat et du pain. " * 5
+    witnesses = [
+        "Alice descend du bateau, mange du pain et du chocolat. " * 5,
+        "Alice mange du pain, du chocolat et descend du bateau. " * 5,
+    ]
+    expected = [
+        suffix_array.GeneralisedSuffixArray([base, w]).get_MEM(4) for w in witnesses
+    ]
+    built = []
+    table_suffixes = suffix_array.table_suffixes
+
+    def spy(codes):
+        built.append(len(codes))
+        return table_suffixes(codes)
+
+    monkeypatch.setattr(suffix_array, "table_suffixes", spy)
+    suffix_array.IndexTexte(base, sep, str(tmp_path))
+    assert built == [len(base)]
+    for witness, mem in zip(witnesses, expected):
+        warm = suffix_array.IndexTexte(base, sep, str(tmp_path))
+        assert isinstance(warm.sa, numpy.memmap)
+        pair = warm.paire(suffix_array.IndexTexte(witness, sep, str(tmp_path)))
+        assert pair.get_MEM(4) == mem
+    # only the witnesses were indexed again
+    assert built == [len(base)] + [len(w) for w in witnesses]
+    assert len(list(tmp_path.iterdir())) == 3
+    # the key depends on the normalization options
+    other = suffix_array.IndexTexte(base, sep, None, "case_sensitive=False")
+    assert other.cle_index() != warm.cle_index()
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_multi_witness_pairs_match_pairwise_index(seed):
+    rng = random.Random(seed)
+    texts = [
+        "".join(rng.choice("ab c.") for _ in range(rng.randint(0, 80)))
+        for _ in range(4)
+    ]
+    # witnesses ending with the same string need the separator order fixed
+    texts[2] += "ab."
+    texts[3] += "ab."
+    multi = suffix_array.MultiGeneralisedSuffixArray(texts)
+    for i in range(len(texts)):
+        for j in range(len(texts)):
+            if i == j:
+                continue
+            expected = suffix_array.GeneralisedSuffixArray([texts[i], texts[j]])
+            pair = multi.paire(i, j)
+            assert pair.sa.tolist() == expected.sa.tolist()
+            assert pair.lcp.tolist() == expected.lcp.tolist()
+            assert pair.get_MEM(3) == expected.get_MEM(3)
+
+
+def test_collation():
+    texts = [
+        "Alice mange du chocolat et du pain.",
+        "Alice descend du bateau, mange du pain et du chocolat.",
+        "Alice mange du pain, du chocolat et descend du bateau.",
+    ]
+    parameters = md.DEFAULT_PARAMETERS._replace(lg_pivot=4)
+    result = md.collation(texts, parameters)
+    assert sorted(result) == [(0, 1), (0, 2), (1, 2)]
+    for (i, j), diff in result.items():
+        expected = md.DiffTexts(texts[i], texts[j], parameters).bbl.liste
+        assert diff.bbl.liste == expected
+    assert sorted(md.collation(texts, parameters, pivot=1)) == [(1, 0), (1, 2)]
+    result = md.collation(texts, parameters, pivot=2)
+    expected = md.DiffTexts(texts[2], texts[0], parameters).bbl.liste
+    assert result[(2, 0)].bbl.liste == expected
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_sub_range_index_matches_rebuilt_index(seed):
+    rng = random.Random(seed)
+    for alphabet in ["ab", "ab c.", "abcdefgh "]:
+        t1, t2 = (
+            "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 200)))
+            for _ in range(2)
+        )
+        full = suffix_array.GeneralisedSuffixArray([t1, t2])
+        for _ in range(5):
+            a1 = rng.randint(0, len(t1) - 1)
+            b1 = rng.randint(a1 + 1, len(t1))
+            a2 = rng.randint(0, len(t2) - 1)
+            b2 = rng.randint(a2 + 1, len(t2))
+            sub = full.sous_index(a1, b1, a2, b2)
+            expected = suffix_array.GeneralisedSuffixArray([t1[a1:b1], t2[a2:b2]])
+            assert sub.sa.tolist() == expected.sa.tolist()
+            assert sub.lcp.tolist() == expected.lcp.tolist()
+            assert sub.get_MEM(2) == expected.get_MEM(2)
+
+
+def test_diff_texts_with_sub_range_index(monkeypatch):
+    txt1 = "Le chat dort sur le lit. Le chien mange sa soupe. La souris court vite."
+    txt2 = "Le chat dort sur le lit. La souris mange sa soupe. Le chien court vite."
+    parameters = md.DEFAULT_PARAMETERS._replace(lg_pivot=4)
+    expected = md.DiffTexts(txt1, txt2, parameters).bbl.liste
+    # every gap of the recursion is queried on the top-level suffix array
+    monkeypatch.setattr(alignement, "SEUIL_SOUS_INDEX", 0)
+    calls = []
+    sous_index = suffix_array.GeneralisedSuffixArray.sous_index
+
+    def spy(self, *args):
+        calls.append(args)
+        return sous_index(self, *args)
+
+    monkeypatch.setattr(suffix_array.GeneralisedSuffixArray, "sous_index", spy)
+    result = md.DiffTexts(txt1, txt2, parameters._replace(algo_index="SA")).bbl.liste
+    assert result == expected
+    assert len(calls) > 0
@@ -1,7 +1,10 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import pytest
+
 from variance.suffix_tree import GeneralisedSuffixTree, SuffixTree
+from variance.medite import suffix_tree as medite_suffix_tree
 
 # s1 = u'mississippi'
 # s2 = u'sippissi'
@@ -109,3 +112,97 @@ def test_generalised():
     print("=" * 70)
 
     print("done.\n\n")
+
+
+def test_topology():
+    st = medite_suffix_tree.SuffixTree("mississippi")
+    topology = st.get_topology()
+
+    nodes = []
+
+    def pre_order(node):
+        nodes.append(node)
+        for child in medite_suffix_tree.children(node):
+            pre_order(child)
+
+    pre_order(st.root)
+    ids = {id(node): i for i, node in enumerate(nodes)}
+    post_order = {id(node): i for i, node in enumerate(st.post_order_nodes)}
+
+    def node_id(node):
+        return ids[id(node)] if node else -1
+
+    assert len(topology.parent) == len(nodes)
+    for i, node in enumerate(nodes):
+        assert topology.parent[i] == node_id(node.parent)
+        assert topology.first_child[i] == node_id(node.firstChild)
+        assert topology.next_sibling[i] == node_id(node.next)
+        assert topology.start[i] == node.start
+        assert topology.end[i] == node.end
+        assert topology.depth[i] == node.stringDepth
+        assert topology.index[i] == node.index
+        assert topology.post_order[i] == post_order[id(node)]
+
+
+def test_memory_footprint():
+    small = medite_suffix_tree.SuffixTree("mississippi")
+    large = medite_suffix_tree.SuffixTree("mississippi" * 100)
+    assert 0 < small.memoryFootprint < large.memoryFootprint
+    # the node cache is only allocated once a node is wrapped
+    before = small.memoryFootprint
+    assert small.root.firstChild is not None
+    assert small.memoryFootprint > before
+
+
+def test_close():
+    with medite_suffix_tree.SuffixTree("mississippi") as st:
+        node = st.root.firstChild
+        assert node.edgeLabel
+    assert st.memoryFootprint == 0
+    with pytest.raises(ValueError):
+        st.root
+    with pytest.raises(ValueError):
+        node.edgeLabel
+    # closing twice is harmless
+    st.close()
+
+
+def test_threads():
+    from concurrent.futures import ThreadPoolExecutor
+
+    text = "Alice mange du chocolat et du pain. " * 50
+    texts = [text[i:] + text[:i] for i in range(0, 80, 10)]
+
+    def build(s):
+        with medite_suffix_tree.SuffixTree(s) as st:
+            deb, fin = st.seq_repeat(len(s) // 2, 3)
+            return bytes(deb), bytes(fin), bytes(st.topology()["parent"])
+
+    expected = [build(s) for s in texts]
+    with ThreadPoolExecutor(4) as executor:
+        assert list(executor.map(build, texts)) == expected
+
+
+def test_leaf_intervals():
+    st = medite_suffix_tree.TrueGeneralisedSuffixTree(["mississippi", "sippissi"])
+
+    def annotate(node, nodes):
+        # the former _annotate_nodes: concatenation of the children lists
+        nodes.append(node)
+        if node.isLeaf:
+            return [st._translate_index(node.index)]
+        path_indices = []
+        for child in medite_suffix_tree.children(node):
+            path_indices += annotate(child, nodes)
+        node.expected = path_indices
+        return path_indices
+
+    nodes = []
+    annotate(st.root, nodes)
+    for i, node in enumerate(nodes):
+        expected = getattr(node, "expected", None) or [st._translate_index(node.index)]
+        assert st.path_indices(i) == expected
+        assert st.nb_occ(i) == len(expected)
+        assert st.node_sequences(i) == list(dict.fromkeys(s for s, _ in expected))
+    with pytest.raises(IndexError):
+        st._translate_index(len(st.concat_string) + 1)
@@ -0,0 +1,87 @@
+import pytest
+
+from variance.medite import medite as md
+from variance.medite import synthetic
+
+# chat: 0-4, chien: 5-10, oiseau: 11-17, poisson: 18-25, blanks: 25-31
+TEXTE = "chat chien oiseau poisson      "
+
+
+def sup(start, end):
+    return (("S", start, end, []), None)
+
+
+def ins(start, end):
+    return (None, ("I", start, end, []))
+
+
+def common(start, end):
+    return (("BC", start, end, []), ("BC", start, end, []))
+
+
+def rep(start1, end1, start2, end2):
+    return (("R", start1, end1, []), ("R", start2, end2, []))
+
+
+def make_bibloc_list(liste):
+    bbl = synthetic.BiBlocList.__new__(synthetic.BiBlocList)
+    bbl.texte = TEXTE
+    bbl.parameters = md.DEFAULT_PARAMETERS
+    bbl.liste = liste
+    return bbl
+
+
+@pytest.mark.parametrize(
+    "liste, expected",
+    [
+        ([], []),
+        ([sup(0, 4), ins(5, 10)], [rep(0, 4, 5, 10)]),
+        # the insertion must follow the suppression
+        ([ins(5, 10), sup(0, 4)], [ins(5, 10), sup(0, 4)]),
+        (
+            [sup(0, 4), common(11, 17), ins(5, 10)],
+            [sup(0, 4), common(11, 17), ins(5, 10)],
+        ),
+        # lengths too far apart for the default ratio, or a blank side
+        ([sup(0, 1), ins(18, 25)], [sup(0, 1), ins(18, 25)]),
+        ([sup(0, 4), ins(25, 30)], [sup(0, 4), ins(25, 30)]),
+        # every pair is replaced, an insertion is never reused
+        (
+            [sup(0, 4), ins(5, 10), sup(11, 17), ins(18, 25)],
+            [rep(0, 4, 5, 10), rep(11, 17, 18, 25)],
+        ),
+        ([sup(0, 4), sup(11, 17), ins(18, 25)], [sup(0, 4), rep(11, 17, 18, 25)]),
+        ([sup(0, 4), ins(5, 10), ins(18, 25)], [rep(0, 4, 5, 10), ins(18, 25)]),
+    ],
+)
+def test_following_suppression_and_insertion_become_a_replacement(liste, expected):
+    bbl = make_bibloc_list(liste)
+    bbl.extractRemplacements()
+    assert bbl.liste == expected
+
+
+@pytest.mark.parametrize(
+    "rest, moves, expected",
+    [
+        ([], [], []),
+        ([[0, 2], [10, 12]], [], [("X", 0, 2), ("X", 10, 12)]),
+        ([], [[4, 6]], [("D", 4, 6)]),
+        (
+            [[0, 2], [10, 12]],
+            [[4, 6], [14, 20]],
+            [("X", 0, 2), ("D", 4, 6), ("X", 10, 12), ("D", 14, 20)],
+        ),
+        # on the same start, the suppression or insertion comes first
+        ([[4, 5]], [[4, 6]], [("X", 4, 5), ("D", 4, 6)]),
+    ],
+)
+@pytest.mark.parametrize("kind", ["S", "I"])
+def test_split_block_merges_sorted_lists(kind, rest, moves, expected):
+    bbl = synthetic.BiBlocListWD.__new__(synthetic.BiBlocListWD)
+    split = bbl._BiBlocListWD__extractDepInsSup
+    blocs = [(kind if k == "X" else k, d, f, []) for k, d, f in expected]
+    if kind == "S":
+        expected_biblocs = [(b, None) for b in blocs]
+    else:
+        expected_biblocs = [(None, b) for b in blocs]
+    assert split(list(rest), list(moves), kind) == expected_biblocs
@@ -0,0 +1,70 @@
+import pytest
+
+from variance.medite import utile as ut
+
+
+@pytest.mark.parametrize(
+    "intervals, expected",
+    [
+        ([], []),
+        ([[5, 8], [1, 4], [5, 6]], [[1, 4], [5, 6], [5, 8]]),
+        # overlapping intervals are kept apart, as with insort
+        ([[2, 6], [0, 4], [2, 6]], [[0, 4], [2, 6], [2, 6]]),
+    ],
+)
+def test_bulk_build_sorts_by_start_then_end(intervals, expected):
+    assert ut.Intervalles.depuis(intervals).liste() == expected
+
+
+def test_merge_keeps_every_interval():
+    left = ut.Intervalles.depuis([[0, 4], [9, 12]])
+    right = ut.Intervalles.depuis([[2, 6], [0, 3]])
+    assert left.fusion(right).liste() == [[0, 3], [0, 4], [2, 6], [9, 12]]
+
+
+@pytest.mark.parametrize(
+    "intervals, expected",
+    [
+        ([], []),
+        ([[0, 2], [2, 4], [6, 8], [7, 10]], [[0, 4], [6, 10]]),
+        ([[0, 10], [2, 3], [11, 12]], [[0, 10], [11, 12]]),
+    ],
+)
+def test_union_fuses_touching_and_overlapping_intervals(intervals, expected):
+    assert ut.Intervalles.depuis(intervals).reunion().liste() == expected
+
+
+@pytest.mark.parametrize(
+    "intervals, removed, expected",
+    [
+        ([[0, 10]], [], [[0, 10]]),
+        ([], [[0, 10]], []),
+        ([[0, 10]], [[6, 7], [2, 4]], [[0, 2], [4, 6], [7, 10]]),
+        ([[3, 5], [8, 12]], [[0, 6]], [[8, 12]]),
+        ([[0, 6], [4, 10]], [[5, 7]], [[0, 5], [4, 5], [7, 10]]),
+        ([[0, 4], [4, 8]], [[2, 6], [3, 5]], [[0, 2], [6, 8]]),
+    ],
+)
+def test_subtraction_splits_each_interval_in_place(intervals, removed, expected):
+    result = ut.Intervalles.depuis(intervals).soustraction(
+        ut.Intervalles.depuis(removed)
+    )
+    assert result.liste() == expected
+    assert result.longueur() == sum(f - d for d, f in expected)
+    # the list-based version gives the same pieces
+    assert [list(x) for x in ut.soustr_l_intervalles(intervals, removed)] == expected
+
+
+@pytest.mark.parametrize(
+    "intervals, start, end, expected",
+    [
+        ([], 0, 10, [(0, 10)]),
+        ([], 3, 3, []),
+        ([[2, 4], [6, 8]], 0, 10, [(0, 2), (4, 6), (8, 10)]),
+        ([[0, 2], [2, 5]], 0, 5, []),
+        ([[1, 3]], 1, 6, [(3, 6)]),
+    ],
+)
+def test_mirror_is_the_complement_in_the_range(intervals, start, end, expected):
+    assert ut.Intervalles.depuis(intervals).miroir(start, end).couples() == expected
+    assert ut.miroir(intervals, start, end) == expected
@@ -20,9 +20,54 @@ import copy
 import logging
 import bisect
 
+import numpy
+
+from . import empreinte
+
+
+class ArbreMaxima(object):
+    """Arbre de segments sur une liste de poids: premier_maximum(debut, fin)
+    donne en O(log n) l'indice du premier poids maximal de poids[debut:fin]
+
+    Les feuilles portent les cls poids * (n + 1) + (n - indice): la cl
+    maximale d'une plage est celle du poids maximal et,  poids gal, du
+    premier indice."""
+
+    def __init__(self, poids):
+        n = len(poids)
+        self.taille = n
+        arbre = numpy.zeros(2 * n, numpy.int64)
+        arbre[n:] = numpy.asarray(poids, numpy.int64) * (n + 1) + (n - numpy.arange(n))
+        # le noeud k est le maximum de ses fils 2k et 2k + 1, calculs avant
+        # lui en remontant les niveaux [2**j, 2**(j + 1))
+        niveau = 1
+        while 2 * niveau < n:
+            niveau *= 2
+        while niveau >= 1:
+            k = numpy.arange(niveau, min(2 * niveau, n))
+            arbre[k] = numpy.maximum(arbre[2 * k], arbre[2 * k + 1])
+            niveau //= 2
+        self.arbre = arbre
+
+    def premier_maximum(self, debut, fin):
+        n, arbre = self.taille, self.arbre
+        meilleur = -1
+        debut += n
+        fin += n
+        while debut < fin:
+            if debut & 1:
+                meilleur = max(meilleur, arbre[debut])
+                debut += 1
+            if fin & 1:
+                fin -= 1
+                meilleur = max(meilleur, arbre[fin])
+            debut >>= 1
+            fin >>= 1
+        return n - meilleur % (n + 1)
+
 
 class Alignement:
-    def alignement(self, L1, L2, texte1, texte2, lt1):
+    def alignement(self, L1, L2, texte1, texte2, lt1, empreintes=None):
         raise NotImplementedError
 
 
@@ -88,13 +133,13 @@ class AlignLIS(Alignement):
             PI.extend(self._posOcurrences(S1[i], S2, i))
         return PI
 
-    def alignement(self, L1, L2, texte1, texte2, lt1):
+    def alignement(self, L1, L2, texte1, texte2, lt1, empreintes=None):
         """ Alignement LIS entre les 2 squences 
         pre: isinstance(L1,list) and isinstance(L2,list) and isinstance(texte1,str) and isinstance(texte2,str)
         post: (len(__return__[0])==len(__return__[1])) or (len(__return__[0])==len(__return__[1])+1) or \
               (len(__return__[0])+1==len(__return__[1]))
         """
-        Lkey1, Lkey2 = self._init_alignement(L1, L2, texte1, texte2, lt1)
+        Lkey1, Lkey2 = self._init_alignement(L1, L2, texte1, texte2, lt1, empreintes)
         # cration des listes PI
         PI = self._creerPi(Lkey2, Lkey1)
         # recherche de la plus longue sous-sequence amliorante
@@ -162,20 +207,23 @@ class AlignHIS(AlignLIS):
         r.reverse()
         return r
 
-    def _init_alignement(self, L1, L2, texte1, texte2, lt1):
+    def _init_alignement(self, L1, L2, texte1, texte2, lt1, empreintes=None):
         """Transformation en un alphabet ordonn"""
         Lkey1 = []
         Lkey2 = []
 
         # cration des listes de hash
+        # (les blocs de L2 sont en coordonnes de texte1+texte2)
+        if empreintes is None:
+            empreintes = empreinte.Empreintes(texte1 + texte2)
 
         for bloc in L1:
-            cle = hash(texte1[bloc[0] : bloc[1]])
+            cle = empreintes.cle(bloc[0], bloc[1])
             longueur = bloc[1] - bloc[0]
             Lkey1.append((cle, longueur))
 
         for bloc in L2:
-            cle = hash(texte2[bloc[0] - lt1 : bloc[1] - lt1])
+            cle = empreintes.cle(bloc[0], bloc[1])
             longueur = bloc[1] - bloc[0]
             Lkey2.append((cle, longueur))
 
@@ -248,3 +296,76 @@ class AlignHIS(AlignLIS):
         if debug:
             print(I)
         return I
+
+
+class AlignHISRapide(AlignHIS):
+    """Mme alignement que AlignHIS, en O(n log n) au lieu de O(n)
+
+    - PI est construite  partir d'un index cl -> positions dans S2 au lieu de
+      comparer chaque cl de S1  chaque cl de S2;
+    - la couverture place chaque lment par recherche dichotomique dans les
+      derniers lments des squences, qui sont tris;
+    - la remonte de _lcis dlimite par dichotomie les prdcesseurs possibles
+      dans chaque squence de la couverture et y prend le premier de poids
+      maximal par un arbre de segments (ArbreMaxima), en O(log n).
+    Les choix (premier lment de poids maximal, etc.) sont ceux d'AlignHIS, le
+    rsultat (res2, res1) est identique."""
+
+    def _creerPi(self, S1, S2):
+        """Cre la liste PI(S1,S2), cf. AlignLIS._creerPi"""
+        positions = {}
+        for i, c in enumerate(S2):
+            try:
+                positions[c].append(i)
+            except KeyError:
+                positions[c] = [i]
+        PI = []
+        for posC, c in enumerate(S1):
+            # positions de c dans S2 dans l'ordre dcroissant
+            for i in reversed(positions.get(c, ())):
+                PI.append((i, posC, c))
+        return PI
+
+    def _couverture(self, pi):
+        """Calcule la couverture d'une liste d'entiers, cf. AlignLIS._couverture
+
+        couvertureLast est tri par ordre croissant: l'lment va dans la
+        premire squence dont le dernier lment est >= au sien"""
+        couverture = []
+        couvertureLast = []
+        for element in pi:
+            j = bisect.bisect_left(couvertureLast, element[0])
+            if j == len(couverture):
+                couverture.append([element])
+                couvertureLast.append(element[0])
+            else:
+                couverture[j].append(element)
+                couvertureLast[j] = element[0]
+        return couverture
+
+    def _lcis(self, couverture):
+        """Plus longue sous squence amliorante, cf. AlignHIS._lcis
+
+        Dans une squence de la couverture, les positions dans S2 (element[0])
+        dcroissent et celles dans S1 (element[1]) croissent: les lments qui
+        prcdent x (pos < x[0] et pos2 < x[1]) forment un intervalle contigu,
+        trouv par dichotomie. Le 1er de poids maximal de l'intervalle est
+        donn par un arbre de segments sur les poids de la squence."""
+        i = len(couverture) - 1
+        if i < 0:
+            return []
+        x = couverture[i][-1]
+        I = [x]
+        while i > 0:
+            sequence = couverture[i - 1]
+            debut = bisect.bisect_right(sequence, -x[0], key=lambda e: -e[0])
+            fin = bisect.bisect_left(sequence, x[1], key=lambda e: e[1])
+            assert debut < fin
+            poids = numpy.fromiter(
+                (element[2][1] for element in sequence), numpy.int64, len(sequence)
+            )
+            x = sequence[ArbreMaxima(poids).premier_maximum(debut, fin)]
+            i -= 1
+            I.append(x)
+        I.reverse()
+        return I
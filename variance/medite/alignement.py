@@ -19,12 +19,15 @@
 import sys
 import string
 import logging
-import bisect
 import gc
+import copy
+from concurrent import futures
+from multiprocessing import shared_memory
 from math import *
 
 # import psyco
 from . import suffix_tree
+from . import suffix_array
 from . import recouvrement
 from . import utile
 
@@ -34,11 +37,253 @@ import numpy as Numeric
 import numpy as numarray
 import numpy
 from . import aligne
+from . import empreinte
+from . import myers
 
 # import cost
 # print dir(cost)
 krange = range
 
+# taille minimale (texte 1 + texte 2) d'un écart entre les blocs communs du
+# 1er niveau pour être aligné par un processus annexe quand workers > 1
+SEUIL_ECART_PARALLELE = 5000
+
+# taille minimale (texte 1 + texte 2) d'un écart pour que son index soit extrait
+# de la table des suffixes des textes complets plutôt que reconstruit: en
+# dessous, la construction directe d'une petite table est plus rapide
+SEUIL_SOUS_INDEX = 4000
+
+# passages du filtrage des déplacements se chevauchant faits sur toute la liste
+# avant de ne plus visiter que les chevauchements (cf. filtrer_chevauchements)
+PASSAGES_DIRECTS = 8
+
+
+def _aligner_ecart(aligneur, partage, niveau, debut1, fin1, debut2, fin2):
+    """Aligne dans un processus annexe l'écart [debut1, fin1), [debut2, fin2)
+    du texte déposé en mémoire partagée sous le nom partage (cf.
+    EcartsParalleles), renvoie le résultat de deplacements_pond2 en positions
+    absolues"""
+    memoire = shared_memory.SharedMemory(partage)
+    try:
+        t1 = bytes(memoire.buf[4 * debut1 : 4 * fin1]).decode(
+            "utf-32-le", "surrogatepass"
+        )
+        t2 = bytes(memoire.buf[4 * debut2 : 4 * fin2]).decode(
+            "utf-32-le", "surrogatepass"
+        )
+    finally:
+        memoire.close()
+    lResDEP1, lResDEP2, lResBC1, lResBC2 = aligneur.deplacements_pond2(t1, t2, niveau)
+    decalage2 = debut2 - len(t1)
+    return (
+        [[x[0] + debut1, x[1] + debut1] for x in lResDEP1],
+        [[x[0] + decalage2, x[1] + decalage2] for x in lResDEP2],
+        [[x[0] + debut1, x[1] + debut1] for x in lResBC1],
+        [[x[0] + decalage2, x[1] + decalage2] for x in lResBC2],
+    )
+
+
+class EcartsParalleles(object):
+    """Pool de processus d'un appel de deplacements_pond2 et texte t1+t2 de
+    cet appel, déposé une fois en mémoire partagée: un écart soumis au pool
+    n'est transmis que par ses positions (cf. _aligner_ecart)"""
+
+    def __init__(self, pool, texte):
+        self.pool = pool
+        self.memoire = shared_memory.SharedMemory(
+            create=True, size=max(1, 4 * len(texte))
+        )
+        self.memoire.buf[: 4 * len(texte)] = texte.encode("utf-32-le", "surrogatepass")
+        self.futurs = []
+
+    def soumettre(self, aligneur, niveau, debut1, fin1, debut2, fin2):
+        futur = self.pool.submit(
+            _aligner_ecart,
+            aligneur,
+            self.memoire.name,
+            niveau,
+            debut1,
+            fin1,
+            debut2,
+            fin2,
+        )
+        self.futurs.append(futur)
+        return futur
+
+    def fermer(self):
+        """Abandonne les écarts encore en attente et libère la mémoire partagée"""
+        for futur in self.futurs:
+            futur.cancel()
+        self.memoire.close()
+        self.memoire.unlink()
+
+
+def _passage_filtre(liste):
+    """Un passage du filtrage des déplacements se chevauchant: un déplacement
+    qui chevauche le suivant le retire s'il est au moins aussi long (le
+    passage reprend après le retiré), sinon il est remplacé par le suivant"""
+    liste2 = []
+    i = 0
+    while i < len(liste) - 1:
+        segment1 = liste[i]
+        segment2 = liste[i + 1]
+        if segment1[1] > segment2[0]:
+            if segment1[1] - segment1[0] >= segment2[1] - segment2[0]:
+                liste2.append(segment1)
+                i += 2
+            else:
+                liste2.append(segment2)
+                i += 1
+        else:
+            liste2.append(segment1)
+            i += 1
+    if i == len(liste) - 1:
+        liste2.append(liste[-1])
+    return liste2
+
+
+def filtrer_chevauchements(liste):
+    """Filtrage des déplacements se chevauchant: passages répétés jusqu'à ce
+    que l'un d'eux, après le premier, ne retire rien
+
+    Les PASSAGES_DIRECTS premiers passages parcourent toute la liste; ils
+    suffisent sauf pour de longues chaînes de déplacements de plus en plus
+    longs, qui ne perdent qu'un élément par passage: la suite est alors
+    calculée par _filtrer_chaines, dont le coût ne dépend pas du nombre de
+    passages."""
+    if all(liste[i][1] <= liste[i + 1][0] for i in range(len(liste) - 1)):
+        # aucun chevauchement: la liste est son propre point fixe
+        return list(liste)
+    liste = _passage_filtre(liste)
+    for _ in range(PASSAGES_DIRECTS - 1):
+        liste2 = _passage_filtre(liste)
+        if len(liste2) == len(liste):
+            return liste2
+        liste = liste2
+    return _filtrer_chaines(liste)
+
+
+def _filtrer_chaines(liste):
+    """Passages de filtrage (cf. _passage_filtre) jusqu'à ce que l'un d'eux ne
+    retire rien, sans parcourir toute la liste à chaque passage
+
+    La liste est chaînée par déplacement d'origine, avec son nombre de copies.
+    Un passage ne visite que les déplacements où il se passe quelque chose
+    (plusieurs copies, chevauchement du suivant); une suite de remplacements,
+    qui décale d'un cran les valeurs d'une chaîne de déplacements de plus en
+    plus longs, revient à passer une copie du premier au dernier maillon,
+    trouvé en O(1) amorti. Hors de ces chaînes, chaque visite retire une
+    copie: le coût total est en O(n log n), quel que soit le nombre de
+    passages."""
+    n = len(liste)
+    copies = [1] * n
+    suivant = list(range(1, n + 1))
+    precedent = list(range(-1, n - 1))
+    # pere: maillon suivant d'une chaîne de remplacements, la fin de la
+    # chaîne étant son propre père
+    pere = list(range(n))
+    supprime = [False] * n
+    tete = [0]
+    AUCUN, RETRAIT, REMPLACEMENT = 0, 1, 2
+
+    def relation(u):
+        """Effet de la dernière copie de u sur la 1re copie du suivant"""
+        v = suivant[u]
+        if v == n or liste[u][1] <= liste[v][0]:
+            return AUCUN
+        if liste[u][1] - liste[u][0] >= liste[v][1] - liste[v][0]:
+            return RETRAIT
+        return REMPLACEMENT
+
+    def lie(u):
+        return u >= 0 and copies[u] == 1 and relation(u) == REMPLACEMENT
+
+    def fin_chaine(u):
+        racine = u
+        while pere[racine] != racine:
+            racine = pere[racine]
+        while pere[u] != racine:
+            pere[u], u = racine, pere[u]
+        return racine
+
+    def interessant(u):
+        return copies[u] > 1 or relation(u) != AUCUN
+
+    def actif(u):
+        # les maillons d'une chaîne ne sont atteints que depuis son début
+        return interessant(u) and not lie(precedent[u])
+
+    def mettre_a_jour(u):
+        pere[u] = suivant[u] if lie(u) else u
+
+    def supprimer(u):
+        p, v = precedent[u], suivant[u]
+        supprime[u] = True
+        if p >= 0:
+            suivant[p] = v
+            mettre_a_jour(p)
+        else:
+            tete[0] = v
+        if v < n:
+            precedent[v] = p
+        return p, v
+
+    chevauchants = [u for u in range(n - 1) if liste[u][1] > liste[u + 1][0]]
+    for u in chevauchants:
+        mettre_a_jour(u)
+    actifs = [u for u in chevauchants if actif(u)]
+    while True:
+        retraits = 0
+        position = -1
+        touches = []
+        for depart in actifs:
+            if depart <= position or supprime[depart]:
+                continue
+            # u: prochain déplacement; decale: sa 1re copie est retirée;
+            # gagne: il a reçu une copie du précédent
+            u, decale, gagne = depart, 0, 0
+            while u < n:
+                position = w = u
+                touches.append(w)
+                if not decale and lie(w):
+                    # chaîne de remplacements jusqu'à sa fin
+                    copies[w] = gagne
+                    u, decale, gagne = fin_chaine(w), 0, 1
+                else:
+                    restant = copies[w] - decale
+                    # copies consécutives: une sur deux est retirée
+                    retraits += restant // 2
+                    copies[w] = gagne + restant // 2
+                    effet = relation(w) if restant % 2 else AUCUN
+                    if restant % 2 and effet != REMPLACEMENT:
+                        copies[w] += 1
+                    retraits += effet == RETRAIT
+                    u, decale, gagne = (
+                        suivant[w],
+                        effet == RETRAIT,
+                        effet == REMPLACEMENT,
+                    )
+                if copies[w] == 0:
+                    touches.extend(x for x in supprimer(w) if 0 <= x < n)
+                else:
+                    mettre_a_jour(w)
+                if u < n and not decale and not gagne and not interessant(u):
+                    break
+        if not retraits:
+            break
+        candidats = set(actifs)
+        for u in touches:
+            candidats.update((u, precedent[u], suivant[u]))
+        actifs = sorted(
+            u for u in candidats if 0 <= u < n and not supprime[u] and actif(u)
+        )
+    resultat = []
+    u = tete[0]
+    while u < n:
+        resultat.extend([liste[u]] * copies[u])
+        u = suivant[u]
+    return resultat
+
 
 class Align(object):
     """Interface, regroupe les fonctions communes"""
@@ -94,6 +339,12 @@ class AlignAstarRecur(Align):
         long_min_pivots=1,
         algoAlign="",
         sep=True,
+        algoIndex="ST",
+        repertoireIndex=None,
+        index=None,
+        workers=1,
+        lgDiffDirect=0,
+        executor=None,
     ):
         """Constructeur
 
@@ -107,6 +358,27 @@ class AlignAstarRecur(Align):
         @type algoAlign: string
         @param sep: sensible aux s�parateurs si Vrai
         @type sep: boolean
+        @param algoIndex: index des r�p�titions, "ST" arbre des suffixes
+            ou "SA" table des suffixes, "MOT" table des suffixes sur les mots
+            (séparateurs separators) en mode mot
+        @type algoIndex: string
+        @param repertoireIndex: répertoire où la table des suffixes des 2 textes
+            complets est enregistrée et relue ("SA" et "MOT"), None sinon
+        @type repertoireIndex: string
+        @param index: index déjà construit des 2 textes complets (par exemple
+            MultiGeneralisedSuffixArray.paire), utilisé à la place de algoIndex
+        @type index: GeneralisedSuffixArray
+        @param workers: nombre de processus alignant en parallèle les écarts
+            entre les blocs communs du 1er niveau, 1 pour tout aligner ici
+        @type workers: integer
+        @param lgDiffDirect: les écarts de la récursion dont les 2 côtés ont au
+            plus lgDiffDirect caractères sont alignés directement par le diff de
+            Myers sur les mots (module myers), 0 pour ne jamais le faire
+        @type lgDiffDirect: integer
+        @param executor: pool de processus (concurrent.futures) réutilisé pour
+            les écarts parallèles, par exemple par toutes les paires d'une
+            collation; None pour en créer un à chaque alignement si workers > 1
+        @type executor: concurrent.futures.Executor
         """
         Align.__init__(self)  # ,texte)
         self.long_min_pivots = long_min_pivots
@@ -115,6 +387,17 @@ class AlignAstarRecur(Align):
         self.separatorSensivitive = sep  # sensible aux s�parateurs
         self.carOuMot = carOuMot
         self.separators = separators
+        self.algoIndex = algoIndex
+        self.repertoireIndex = repertoireIndex
+        self.index = index
+        # table des suffixes des textes complets, interrogée par plages pour les
+        # écarts de la récursion (cf. _texteToSeqHomo)
+        self.index_global = None
+        # empreintes des textes complets, reprises par cleanDep
+        self.empreintes_texte = None
+        self.workers = workers
+        self.lgDiffDirect = lgDiffDirect
+        self.executor = executor
 
     def run(self, t1, t2):
         """pre: isinstance(t1,str) and isinstance(t2,str)"""
@@ -134,29 +417,75 @@ class AlignAstarRecur(Align):
         # LDEP = lDEP1+lDEP2
         lDEP1.extend(lDEP2)
         # trace('LDEP = self.cleanDep(lDEP1,t1+t2)',locals())
-        LDEP = self.cleanDep(lDEP1, t1, t2)
+        LDEP = self.cleanDep(lDEP1, t1, t2, self.empreintes_texte)
+        self.empreintes_texte = None
         lBC1.extend(lBC2)
         return LDEP, lBC1  # +lBC2#,LUnique
 
-    def cleanDep(self, LDEP, texte1, texte2):
-        """Enleve les deplacements inclus dans un autre deplacement et ceux qui ne sont plus r�p�t�s
+    def cleanDep(self, LDEP, texte1, texte2, empreintes=None):
+        """Enleve les deplacements inclus dans un autre deplacement et ceux qui ne sont plus répétés
+
+        Même résultat que removeInclude puis removeUnique répétés jusqu'à un
+        point fixe, en 2 passes au plus, les clés des déplacements n'étant
+        calculées qu'une fois:
+        - la 1re passe renvoie une liste triée; dans une liste triée,
+          removeInclude enlève les déplacements inclus dans un déplacement
+          précédent quelconque, ce qui reste vrai de toute sous-liste: seule
+          la 2e passe peut encore en enlever, si LDEP n'était pas triée
+        - removeUnique enlève des groupes entiers de déplacements identiques,
+          sans changer la répétition des autres groupes
+        Une 3e passe n'enlèverait rien.
 
         #pre: forall([len(texte) >= LDEP[i][0] >= LDEP[i-1][1] >= 0 for i in range(1, len(LDEP))])
         #post: forall([len(texte1)+len(texte2) >=__return__[i][0] >= __return__[i-1][1] >= 0 for i in range(1, len(__return__))])
         """
-        size_LDEP = len(LDEP) + 1
-        while len(LDEP) < size_LDEP:  # boucle jusqu'� un point fixe
-            size_LDEP = len(LDEP)
-            # print size_LDEP,len(LDEP)
-            LDEP = self.removeInclude(LDEP)
-            # print size_LDEP,len(LDEP)
-            # LDEP,LUnique = self.removeUnique(LDEP,texte1+texte2)
-            LDEP = self.removeUnique(LDEP, texte1, texte2)
-            # print size_LDEP,len(LDEP),len(LUnique)
-            # LDEP = self._filtreDepRec(LDEP)
-            # print '---------------'
-        # print LUnique
-        return LDEP
+        taille = len(LDEP)
+        # 1re passe dans l'ordre de LDEP
+        LDEP = self.removeInclude(LDEP)
+        if len(LDEP) == 0:
+            return LDEP
+        if empreintes is None:
+            empreintes = empreinte.Empreintes(texte1 + texte2)
+        tableau = numpy.array(LDEP, numpy.int64)
+        debuts = tableau[:, 0]
+        fins = tableau[:, 1]
+        cles = empreintes.cles(debuts, fins)
+        gardes = numpy.flatnonzero(self._repetes(debuts, fins, cles))
+        # removeUnique renvoie les déplacements triés
+        gardes = gardes[numpy.lexsort((fins[gardes], debuts[gardes]))]
+        if len(gardes) < taille:
+            # 2e passe: un déplacement trié est inclus dans le dernier gardé
+            # ssi sa fin ne dépasse pas celles des précédents
+            fins_prec = numpy.maximum.accumulate(
+                numpy.concatenate(([0], fins[gardes][:-1]))
+            )
+            gardes = gardes[fins[gardes] > fins_prec]
+            gardes = gardes[self._repetes(debuts[gardes], fins[gardes], cles[gardes])]
+        return numpy.column_stack((debuts[gardes], fins[gardes])).tolist()
+
+    def _repetes(self, debuts, fins, cles):
+        """Déplacements gardés par removeUnique sur la liste des [debut, fin]
+        de même clé: le 1er et le dernier des déplacements identiques (même clé
+        et même longueur), dans l'ordre de la liste, doivent encadrer la
+        frontière entre les textes (cf. repetition)"""
+        if len(debuts) == 0:
+            return numpy.zeros(0, bool)
+        longueurs = fins - debuts
+        # tri stable: chaque groupe reste dans l'ordre de la liste
+        ordre = numpy.lexsort((longueurs, cles))
+        cles = cles[ordre]
+        longueurs = longueurs[ordre]
+        nouveau = numpy.empty(len(ordre), bool)
+        nouveau[0] = True
+        nouveau[1:] = (cles[1:] != cles[:-1]) | (longueurs[1:] != longueurs[:-1])
+        premiers = numpy.flatnonzero(nouveau)
+        derniers = numpy.append(premiers[1:], len(ordre)) - 1
+        repete = (debuts[ordre[premiers]] < self.l_texte1) & (
+            debuts[ordre[derniers]] >= self.l_texte1
+        )
+        res = numpy.empty(len(ordre), bool)
+        res[ordre] = repete[numpy.cumsum(nouveau) - 1]
+        return res
 
     def removeInclude(self, L):
         """Enleve les deplacements inclus dans un autre d�placement
@@ -175,7 +504,7 @@ class AlignAstarRecur(Align):
                 prevInter = (deb, fin)
         return LDep
 
-    def removeUnique(self, L, texte1, texte2):
+    def removeUnique(self, L, texte1, texte2, empreintes=None):
         """Scinde L en 2 listes, une pour les chaines ayant plusieurs occurences
         et l'autre pour celles en ayant une seule
 
@@ -183,19 +512,19 @@ class AlignAstarRecur(Align):
         #post: forall([len(texte) >=__return__[0][i][0] >= __return__[0][i-1][1] >= 0 for i in range(1, len(__return__[0]))])
         #      forall([len(texte) >=__return__[1][i][0] >= __return__[1][i-1][1] >= 0 for i in range(1, len(__return__[1]))])
         """
+        if empreintes is None:
+            empreintes = empreinte.Empreintes(texte1 + texte2)
         dicDep = {}
         for deb, fin in L:
             longueur = fin - deb
-            if deb < self.l_texte1:
-                cle = hash(texte1[deb:fin])
-            else:
-                cle = hash(texte2[deb - self.l_texte1 : fin - self.l_texte1])
+            cle = empreintes.cle(deb, fin)
             try:
                 dicDep[(cle, longueur)].append(deb)
             except KeyError:
                 dicDep[(cle, longueur)] = [deb]
         # print dicDep
-        LDep = []
+        debuts = []
+        fins = []
         # LUnique=[]
         for (cle, longueur), locc in list(dicDep.items()):
             # len_clef = len(clef)
@@ -211,22 +540,28 @@ class AlignAstarRecur(Align):
                         locc[-1] - self.l_texte1 : locc[-1] - self.l_texte1 + longueur
                     ]
                 )
-                for occ in locc:
-                    # LDep = ut.addition_intervalle(LDep,[occ, occ+len(clef)])
-                    bisect.insort_right(LDep, [occ, occ + longueur])
+                debuts.extend(locc)
+                fins.extend(occ + longueur for occ in locc)
             # else:
             #    for occ in locc:
             # LUnique = ut.addition_intervalle(LUnique,[occ, occ+len(clef)])#sans fusion
             #        bisect.insort_right(LUnique,[occ, occ+longueur])#sans fusion
-        # print LDep
-        return LDep  # ,LUnique
+        return ut.Intervalles(debuts, fins).liste()  # ,LUnique
 
-    def compute_alignement(self, t1, t2):
+    def compute_alignement(self, t1, t2, plage=None, textes_complets=False):
         """prends les 2 textes en entr�e et renvoie 2 listes au format
-        [(BC,[BDeps le pr�c�dant])]"""
+        [(BC,[BDeps le pr�c�dant])]
+        plage: (debut1, fin1, debut2, fin2) si t1 et t2 sont les plages
+        [debut1, fin1) et [debut2, fin2) des textes complets 1 et 2
+        textes_complets: t1 et t2 sont les textes complets (1er niveau de
+        deplacements_pond2), dont l'index et les empreintes sont conservés"""
         aligneSMEMS = True
+        # clés des sous-chaînes de t1+t2, partagées par l'index et l'alignement
+        empreintes = empreinte.Empreintes(t1 + t2)
+        if textes_complets:
+            self.empreintes_texte = empreintes
         if aligneSMEMS:
-            s1, s2 = self._texteToSeqHomo(t1, t2)
+            s1, s2 = self._texteToSeqHomo(t1, t2, empreintes, plage, textes_complets)
         else:
             # 3e param, taille des ngrammes
             s1, s2 = self._texteToSeqHomoNGrammes(t1, t2, 1, self.long_min_pivots)
@@ -241,124 +576,222 @@ class AlignAstarRecur(Align):
         # logging.debug('s1='+str(s1))
         # logging.debug('s2='+str(s2))
         # LResT1,LResT2 = self._appelAstar(s1,s2,t1,t2,len(t1))
-        LResT1, LResT2 = self._appelAlgo(s1, s2, t1, t2, len(t1))
+        LResT1, LResT2 = self._appelAlgo(s1, s2, t1, t2, len(t1), empreintes)
         return LResT1, LResT2
 
-    def _appelAlgo(self, s1, s2, t1, t2, t):
-        a = aligne.AlignHIS()
-        return a.alignement(s1, s2, t1, t2, t)
+    def _appelAlgo(self, s1, s2, t1, t2, t, empreintes=None):
+        a = aligne.AlignHISRapide()
+        return a.alignement(s1, s2, t1, t2, t, empreintes)
 
     def deplacements_pond2(self, t1, t2, niveau=0):
-        """pre: isinstance(t1,str) and isinstance(t2,str)"""
-        # print "T1:"+t1 ; print "T2:"+t2
-        if len(t1) == 0 or len(t2) == 0:
+        """pre: isinstance(t1,str) and isinstance(t2,str)
+
+        Aligne t1 et t2 puis, récursivement, chaque écart entre 2 blocs communs.
+        La récursion est remplacée par une pile explicite d'écarts (cf. _ecart):
+        un écart est un couple d'intervalles [debut1, fin1) et [debut2, fin2)
+        du seul texte t1+t2, toutes les positions sont absolues et les résultats
+        des sous-écarts n'ont plus à être recopiés et décalés à chaque niveau.
+        La profondeur n'est plus limitée par la pile d'appels de Python.
+        Si workers > 1 ou si un executor est fourni, les grands écarts du 1er
+        niveau sont alignés en parallèle et leurs résultats repris dans
+        l'ordre: le résultat est le même. Le pool créé ici est fermé en sortie,
+        y compris sur exception; celui fourni n'est pas fermé mais les écarts
+        encore en attente y sont abandonnés. L'index des textes complets
+        (index_global) n'est gardé que pour l'appel."""
+        texte = t1 + t2
+        self.index_global = None
+        pool = self.executor
+        if pool is None and self.workers > 1:
+            pool = futures.ProcessPoolExecutor(self.workers)
+        parallele = None
+        try:
+            if pool is not None:
+                parallele = EcartsParalleles(pool, texte)
+            pile = [
+                self._ecart(texte, 0, len(t1), len(t1), len(texte), niveau, parallele)
+            ]
+            resultat = None
+            while True:
+                try:
+                    sous_ecart = pile[-1].send(resultat)
+                except StopIteration as fin:
+                    # écart traité: son résultat revient à l'écart englobant
+                    pile.pop()
+                    resultat = fin.value
+                    if len(pile) == 0:
+                        return resultat
+                else:
+                    pile.append(self._ecart(texte, *sous_ecart))
+                    resultat = None
+        finally:
+            self.index_global = None
+            if pool is not None and pool is not self.executor:
+                # les écarts encore en attente sont abandonnés
+                pool.shutdown(cancel_futures=True)
+            if parallele is not None:
+                parallele.fermer()
+
+    def _decaler(self, LRes, decalage):
+        """Décale de decalage les positions d'un résultat de compute_alignement"""
+        if decalage == 0:
+            return LRes
+        return [
+            (
+                None if BC is None else [BC[0] + decalage, BC[1] + decalage],
+                [[x[0] + decalage, x[1] + decalage] for x in lDep],
+            )
+            for BC, lDep in LRes
+        ]
+
+    def _diff_direct(self, texte, debut1, fin1, debut2, fin2):
+        """Aligne un petit écart par le diff de Myers sur les mots, sans index:
+        blocs communs d'au moins long_min_pivots caractères, pas de
+        déplacement. Même résultat que _ecart, en positions de texte."""
+        blocs1, blocs2 = myers.blocs_communs(
+            texte[debut1:fin1],
+            texte[debut2:fin2],
+            self.separators if self.carOuMot else None,
+            self.long_min_pivots,
+        )
+        lResBC1 = [[d + debut1, f + debut1] for d, f in blocs1]
+        lResBC2 = [[d + debut2, f + debut2] for d, f in blocs2]
+        return [], [], lResBC1, lResBC2
+
+    def _lancer_ecarts(self, parallele, ecarts, niveau):
+        """Soumet au pool de processus de parallele (EcartsParalleles) les
+        écarts d'au moins SEUIL_ECART_PARALLELE caractères, renvoie
+        {rang de l'écart: futur}"""
+        grands = [
+            i
+            for i, (debut1, fin1, debut2, fin2) in enumerate(ecarts)
+            if fin1 > debut1
+            and fin2 > debut2
+            and (fin1 - debut1) + (fin2 - debut2) >= SEUIL_ECART_PARALLELE
+        ]
+        if len(grands) == 0:
+            return {}
+        # copie sans parallélisme ni index des textes complets pour les processus
+        aligneur = copy.copy(self)
+        aligneur.workers = 1
+        aligneur.executor = None
+        aligneur.index = None
+        aligneur.index_global = None
+        aligneur.empreintes_texte = None
+        aligneur.repertoireIndex = None
+        return {i: parallele.soumettre(aligneur, niveau, *ecarts[i]) for i in grands}
+
+    def _ecart(self, texte, debut1, fin1, debut2, fin2, niveau, parallele=None):
+        """Traitement d'un écart par deplacements_pond2, sous forme de générateur:
+        chaque sous-écart à traiter est produit par yield
+        (debut1, fin1, debut2, fin2, niveau) et son résultat renvoyé par send.
+        Renvoie lResDEP1, lResDEP2, lResBC1, lResBC2 en positions de texte.
+        parallele: si donné (EcartsParalleles), les grands sous-écarts sont
+        alignés dans son pool par _lancer_ecarts"""
+        if fin1 <= debut1 or fin2 <= debut2:
             return [], [], [], []
         if niveau > self.MAXRECURSION:
             return [], [], [], []
+        lg1 = fin1 - debut1
+        lg2 = fin2 - debut2
+        if lg1 < self.long_min_pivots or lg2 < self.long_min_pivots:
+            # aucune répétition de long_min_pivots caractères n'y tient
+            return [], [], [], []
+        if niveau > 0 and lg1 <= self.lgDiffDirect and lg2 <= self.lgDiffDirect:
+            return self._diff_direct(texte, debut1, fin1, debut2, fin2)
 
         logging.log(5, "debut dep_pond niveau " + str(niveau))
-        LResT1, LResT2 = self.compute_alignement(t1, t2)
-        # print repr(t1[0:32]),repr(t2[0:32]),len(LResT1)
+        LResT1, LResT2 = self.compute_alignement(
+            texte[debut1:fin1],
+            texte[debut2:fin2],
+            (debut1, fin1, debut2 - self.l_texte1, fin2 - self.l_texte1),
+            niveau == 0,
+        )
         if len(LResT1) == 0 or len(LResT2) == 0:
             return [], [], [], []
-        texte = t1 + t2
-        debutT1 = i = 0
-        debutT2 = len(t1)
-        lResBC1 = []
-        lResBC2 = []
-        lResDEP1 = []
-        lResDEP2 = []
-        # print "LResT1:"+str(LResT1); print "LResT2:"+str(LResT2)
-        # OK
-        # or (LResT1[i][0]==None and LResT2[i][0]==None):
-        while i < min(len(LResT1), len(LResT2)):
-            BC1, lDep1 = LResT1[i]
-            BC2, lDep2 = LResT2[i]
-            # print len(LResT1),len(LResT2)
-            # print '(BC1,lDep1),(BC2,lDep2):'+str(((BC1,lDep1),(BC2,lDep2)))
+        # positions locales de texte[debut1:fin1] + texte[debut2:fin2] -> texte
+        LResT1 = self._decaler(LResT1, debut1)
+        LResT2 = self._decaler(LResT2, debut2 - lg1)
+        # les sous-écarts ne dépendent que des blocs communs de ce niveau
+        ecarts = []
+        debutT1 = debut1
+        debutT2 = debut2
+        for (BC1, _), (BC2, _) in zip(LResT1, LResT2):
             if BC1 is not None:
                 finT1 = BC1[0]
             else:
-                finT1 = len(t1)
+                finT1 = fin1
             if BC2 is not None:
                 finT2 = BC2[0]
             else:
-                finT2 = len(t2)
-            # lResDEP1 = ut.addition_l_intervalle(lResDEP1,lDep1)
-            # lResDEP2 = ut.addition_l_intervalle(lResDEP2,lDep2)
-            for x in lDep1:
-                bisect.insort_right(lResDEP1, x)
-            for x in lDep2:
-                bisect.insort_right(lResDEP2, x)
-            # self.ass2__(lResDEP1,0,finT1)
-            # self.ass2__(lResDEP2,0,finT2)
-            # print debutT1,finT1,debutT2,finT2
-            nt1 = texte[debutT1:finT1]
-            nt2 = texte[debutT2:finT2]
-            NewLResDep1, NewLResDep2, NewLResBC1, NewLResBC2 = self.deplacements_pond2(
-                nt1, nt2, niveau + 1
-            )  # [],[],[],[] #
-            # print "res rec:"+str((NewLResDep1,NewLResDep2,NewLResBC1,NewLResBC2))
+                # len(t2) en positions locales, comme la version récursive
+                finT2 = fin2 - lg1
+            ecarts.append((debutT1, finT1, debutT2, finT2))
+            if BC1 is not None:
+                debutT1 = BC1[1]
+            if BC2 is not None:
+                debutT2 = BC2[1]
+        futurs = {}
+        if parallele is not None:
+            futurs = self._lancer_ecarts(parallele, ecarts, niveau + 1)
+        lResBC1 = []
+        lResBC2 = []
+        # déplacements de ce niveau, blocs communs des sous-écarts et
+        # déplacements des sous-écarts, combinés après la boucle
+        lDeps1 = []
+        lDeps2 = []
+        lSousBC1 = []
+        lSousBC2 = []
+        lSousDep1 = []
+        lSousDep2 = []
+        for i, (debutT1, finT1, debutT2, finT2) in enumerate(ecarts):
+            BC1, lDep1 = LResT1[i]
+            BC2, lDep2 = LResT2[i]
+            lDeps1.extend(lDep1)
+            lDeps2.extend(lDep2)
+            if i in futurs:
+                # repris dans l'ordre des écarts, quel que soit l'ordre de fin
+                resultat = futurs[i].result()
+            else:
+                resultat = yield (debutT1, finT1, debutT2, finT2, niveau + 1)
+            NewLResDep1, NewLResDep2, NewLResBC1, NewLResBC2 = resultat
             if self.addSubDep:
                 NewLResDep1 = self._filtreDepRec(NewLResDep1)
-                self.ass2__(NewLResDep1, 0, len(nt1), nt1)
-            if self.addSubDep:
+                self.ass2__(NewLResDep1, debutT1, finT1, texte)
                 NewLResDep2 = self._filtreDepRec(NewLResDep2)
-                self.ass2__(NewLResDep2, len(nt1), len(nt1) + len(nt2), nt1 + nt2)
-            self.ass2__(NewLResBC1, 0, len(nt1), nt1)
-            self.ass2__(NewLResBC2, len(nt1), len(nt1) + len(nt2), nt1 + nt2)
-            if self.addSubDep:
-                # self.addNumLInter(NewLResDep1,debutT1)
-                NewLResDep1 = [[x[0] + debutT1, x[1] + debutT1] for x in NewLResDep1]
-            if self.addSubDep:
-                # self.addNumLInter(NewLResDep2,debutT2-len(nt1))
-                NewLResDep2 = [
-                    [x[0] + debutT2 - len(nt1), x[1] + debutT2 - len(nt1)]
-                    for x in NewLResDep2
-                ]
-            # self.addNumLInter(NewLResBC1,debutT1)
-            NewLResBC1 = [[x[0] + debutT1, x[1] + debutT1] for x in NewLResBC1]
-            # self.addNumLInter(NewLResBC2,debutT2-len(nt1))
-            NewLResBC2 = [
-                [x[0] + debutT2 - len(nt1), x[1] + debutT2 - len(nt1)]
-                for x in NewLResBC2
-            ]
-            if self.addSubDep:
-                self.ass2__(NewLResDep1, debutT1, finT1, t1)
-            if self.addSubDep:
                 self.ass2__(NewLResDep2, debutT2, finT2, texte)
-            self.ass2__(NewLResBC1, debutT1, finT1, t1)
+            self.ass2__(NewLResBC1, debutT1, finT1, texte)
             self.ass2__(NewLResBC2, debutT2, finT2, texte)
-            self.ass2__(lResBC1, 0, debutT1, t1)
-            self.ass2__(lResBC2, len(t1), debutT2, texte)
+            # les listes des sous-écarts sont déjà ordonnées, seule la jonction
+            # avec les blocs déjà trouvés reste à vérifier
+            self.ass2__(lResBC1[-1:] + NewLResBC1[:1], debut1, finT1, texte)
+            self.ass2__(lResBC2[-1:] + NewLResBC2[:1], debut2, finT2, texte)
             lResBC1.extend(NewLResBC1)
             lResBC2.extend(NewLResBC2)
-            if BC1 is not None:
-                self.ass2__(lResBC1, 0, finT1, t1)
-            if BC2 is not None:
-                self.ass2__(lResBC2, len(t1), finT2, texte)
-            lResDEP1 = ut.soustr_l_intervalles(lResDEP1, NewLResBC1)
-            lResDEP2 = ut.soustr_l_intervalles(lResDEP2, NewLResBC2)
-            if self.addSubDep:
-                for x in NewLResDep1:
-                    # lResDEP1 = ut.addition_l_intervalle(lResDEP1,NewLResDep1)
-                    bisect.insort_right(lResDEP1, x)
+            lSousBC1.extend(NewLResBC1)
+            lSousBC2.extend(NewLResBC2)
             if self.addSubDep:
-                for x in NewLResDep2:
-                    # lResDEP2 = ut.addition_l_intervalle(lResDEP2,NewLResDep2)
-                    bisect.insort_right(lResDEP2, x)
+                lSousDep1.extend(NewLResDep1)
+                lSousDep2.extend(NewLResDep2)
             if BC1 is not None:
                 lResBC1.append(BC1)
             if BC2 is not None:
                 lResBC2.append(BC2)
-            # assert i <= 12
-            # print i, BC1,BC2
-            i += 1
-            if BC1 is not None:
-                debutT1 = BC1[1]
-            if BC2 is not None:
-                debutT2 = BC2[1]
-        # import ipdb;ipdb.set_trace()
+        # les déplacements d'un écart et ses blocs communs sont dans l'écart:
+        # soustraire tous les blocs communs des sous-écarts aux déplacements
+        # de ce niveau revient à soustraire ceux de chaque écart au fil de la
+        # boucle. Les déplacements des sous-écarts sont ajoutés ensuite.
+        lResDEP1 = (
+            ut.Intervalles.depuis(lDeps1)
+            .soustraction(ut.Intervalles.depuis(lSousBC1))
+            .fusion(ut.Intervalles.depuis(lSousDep1))
+            .liste()
+        )
+        lResDEP2 = (
+            ut.Intervalles.depuis(lDeps2)
+            .soustraction(ut.Intervalles.depuis(lSousBC2))
+            .fusion(ut.Intervalles.depuis(lSousDep2))
+            .liste()
+        )
         if len(LResT1) > len(LResT2):
             assert len(LResT1) == len(LResT2) + 1 and LResT1[-1][0] is None
             lResDEP1.extend(LResT1[-1][1])
@@ -371,47 +804,39 @@ class AlignAstarRecur(Align):
         return lResDEP1, lResDEP2, lResBC1, lResBC2
 
     def _filtreDepRec(self, liste):
-        """recherche d'un point fixe"""
-        taille_originale = len(liste)
-        taille_prev = 0
-        liste2 = self.__filtreDepRec(liste)
-        taille_courante = len(liste2)
-        while taille_prev != taille_courante:
-            taille_prev = taille_courante
-            liste2 = self.__filtreDepRec(liste2)
-            taille_courante = len(liste2)
-        return liste2
-
-    def __filtreDepRec(self, liste):
-        """filtrage des d�placements se chevauchant"""
-        liste2 = []
-        if len(liste) < 2:
-            liste2.extend(liste)
-        else:
-            i = 0
-            while i < len(liste) - 1:
-                segment1 = liste[i]
-                long1 = segment1[1] - segment1[0]
-                segment2 = liste[i + 1]
-                long2 = segment2[1] - segment2[0]
-                if segment1[1] > segment2[0]:
-                    if long1 >= long2:
-                        liste2.append(segment1)
-                        i += 2
-                    else:
-                        liste2.append(segment2)
-                        i += 1
-                else:
-                    liste2.append(segment1)
-                    i += 1
-            if i == len(liste) - 1:
-                liste2.append(liste[-1])
-        return liste2
-
-    def _texteToSeqHomo(self, t1, t2):
-        """Extrait des 2 textes, les 2 s�quences de blocs r�p�t�s"""
+        """filtrage des déplacements se chevauchant, cf. filtrer_chevauchements"""
+        return filtrer_chevauchements(liste)
+
+    def _texteToSeqHomo(
+        self, t1, t2, empreintes=None, plage=None, textes_complets=False
+    ):
+        """Extrait des 2 textes, les 2 s�quences de blocs r�p�t�s
+        plage, textes_complets: cf. compute_alignement; l'index d'un écart est
+        extrait de celui des textes complets quand c'est une table des suffixes"""
         logging.log(5, "debut _texteToSeqHomo")
-        st = suffix_tree.GeneralisedSuffixTree([t1, t2])
+        # seul l'index des textes complets est enregistré ou fourni,
+        # pas ceux des écarts de la récursion
+        repertoire = self.repertoireIndex if textes_complets else None
+        if textes_complets and self.index is not None:
+            st, self.index = self.index, None  # get_seq_repeat ne sert qu'une fois
+        elif (
+            plage is not None
+            and self.index_global is not None
+            and len(t1) + len(t2) >= SEUIL_SOUS_INDEX
+        ):
+            st = self.index_global.sous_index(*plage)
+        elif self.algoIndex.upper() == "MOT" and self.carOuMot:
+            st = suffix_array.GeneralisedWordSuffixArray(
+                [t1, t2], self.separators, repertoire
+            )
+        elif self.algoIndex.upper() in ("SA", "MOT"):
+            st = suffix_array.GeneralisedSuffixArray([t1, t2], repertoire)
+        else:
+            st = suffix_tree.GeneralisedSuffixTree([t1, t2])
+        if textes_complets and getattr(st, "sous_index", None) is not None:
+            self.index_global = st
+        if empreintes is not None:
+            st.empreintes = empreintes
         logging.log(5, "fin construction ST")
         # blocs_texte,seq = st.shared_substrings3(self.long_min_pivots)
         # blocs_texte = st.get_MEM_index_chaine(self.long_min_pivots)
@@ -435,19 +860,17 @@ class AlignAstarRecur(Align):
         # blocs_texte = recouv.eliminer_recouvrements()
         # logging.debug("fin elim recouvrement")
         blocs_texte = self.remUnique(blocs_texte, len(t1), t1, t2)
-        NL1 = []
-        NL2 = []
-        len_t1 = len(t1)
+        debuts = []
+        fins = []
         for (cle, longueur), liste_occ in list(blocs_texte.items()):
-            # len_clef = fin - debut #len(clef)
-            for occ in iter(liste_occ):
-                if occ < len_t1:
-                    # NL1 = ut.addition_intervalle(NL1,[occ, occ+len(clef)])
-                    bisect.insort_right(NL1, [occ, occ + longueur])
-                else:  # NL2 = ut.addition_intervalle(NL2,[occ, occ+len(clef)])
-                    bisect.insort_right(NL2, [occ, occ + longueur])
+            debuts.extend(liste_occ)
+            fins.extend(occ + longueur for occ in liste_occ)
+        debuts = numpy.array(debuts, numpy.int64)
+        fins = numpy.array(fins, numpy.int64)
+        dans_t1 = debuts < len(t1)
+        NL1 = ut.Intervalles(debuts[dans_t1], fins[dans_t1]).liste()
+        NL2 = ut.Intervalles(debuts[~dans_t1], fins[~dans_t1]).liste()
         logging.log(5, "fin _texteToSeqHomo")
-        # print NL1
         return NL1, NL2
 
     def remUnique(self, dic, l_texte1, texte1, texte2):
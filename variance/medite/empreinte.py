@@ -0,0 +1,82 @@
+"""Empreintes des sous-chaînes d'un texte par hachage polynomial.
+
+Remplace hash(texte[a:b]): après un précalcul linéaire, la clé de n'importe
+quelle sous-chaîne [debut, fin) s'obtient en O(1), sans créer la chaîne.
+Les clés ne dépendent que du contenu de la sous-chaîne (pas de sa position ni
+de PYTHONHASHSEED), elles sont donc les mêmes d'un processus à l'autre.
+
+On stocke S[i] = somme des c_j * B**-(j+1) pour j < i et P[i] = B**i,
+modulo M; alors (S[fin] - S[debut]) * P[fin] = somme des c_j * B**(fin-1-j)
+pour debut <= j < fin, le hachage polynomial habituel de la sous-chaîne.
+M est le produit de 2 nombres premiers de 31 bits: les tables sont calculées
+par numpy modulo chacun d'eux (les produits tiennent sur 64 bits) puis
+recombinées par le théorème des restes chinois, la clé fait 62 bits."""
+
+import numpy
+
+from . import utile
+
+# (nombre premier, base) de chacun des 2 hachages
+HACHAGES = ((2147483647, 1000003), (2147483629, 911382323))
+MODULE = HACHAGES[0][0] * HACHAGES[1][0]
+
+
+def puissances(base, p, n):
+    """[base**i mod p pour i dans range(n)], par doublements successifs"""
+    res = numpy.ones(max(n, 1), numpy.int64)
+    k = 1
+    while k < n:
+        facteur = pow(base, k, p)
+        suite = res[: min(k, n - k)] * facteur % p
+        res[k : k + len(suite)] = suite
+        k *= 2
+    return res[:n]
+
+
+def restes_chinois(x1, x2):
+    """Tableau x modulo MODULE tel que x = x1 mod p1 et x = x2 mod p2"""
+    (p1, _), (p2, _) = HACHAGES
+    t = (x2 - x1) % p2 * pow(p1, -1, p2) % p2
+    return x1 + p1 * t
+
+
+class Empreintes(object):
+    """Clés des sous-chaînes de texte, cle(debut, fin) vaut pour texte[debut:fin]"""
+
+    def __init__(self, texte):
+        self.longueur = len(texte)
+        codes = utile.codes_caracteres(texte)
+        n = len(codes)
+        prefixes = []
+        puiss = []
+        for p, base in HACHAGES:
+            inverses = puissances(pow(base, -1, p), p, n + 1)
+            prefixe = numpy.zeros(n + 1, numpy.int64)
+            # termes < 2**31: la somme cumulée ne déborde pas avant 2**32 termes
+            numpy.cumsum(codes * inverses[1:] % p, out=prefixe[1:])
+            prefixes.append(prefixe % p)
+            puiss.append(puissances(base, p, n + 1))
+        self.prefixe = restes_chinois(*prefixes)
+        self.puissance = restes_chinois(*puiss)
+        # memoryview: l'indexation renvoie directement des int Python
+        self._prefixe = memoryview(self.prefixe)
+        self._puissance = memoryview(self.puissance)
+
+    def cle(self, debut, fin):
+        """Clé de texte[debut:fin] (0 <= debut <= fin <= len(texte))"""
+        return (
+            (self._prefixe[fin] - self._prefixe[debut]) * self._puissance[fin] % MODULE
+        )
+
+    def cles(self, debuts, fins):
+        """Clés des sous-chaînes [debuts[k], fins[k]), tableau numpy int64"""
+        debuts = numpy.asarray(debuts, numpy.int64)
+        fins = numpy.asarray(fins, numpy.int64)
+        res = numpy.zeros(len(debuts), numpy.int64)
+        # calcul modulo chaque nombre premier, les produits restent sur 64 bits
+        parties = []
+        for p, _ in HACHAGES:
+            difference = (self.prefixe[fins] - self.prefixe[debuts]) % p
+            parties.append(difference * (self.puissance[fins] % p) % p)
+        res[:] = restes_chinois(*parties)
+        return res
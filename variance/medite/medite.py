@@ -3,14 +3,29 @@ import sys
 import time
 import logging
 from collections import namedtuple
+from concurrent import futures
+
+import numpy
 
 from . import alignement
+from . import suffix_array
 from . import utile as ut
 from . import synthetic
 
 Parameters = namedtuple(
     "Parameters",
-    "lg_pivot ratio seuil car_mot case_sensitive sep_sensitive diacri_sensitive algo sep",
+    "lg_pivot ratio seuil car_mot case_sensitive sep_sensitive diacri_sensitive algo sep algo_index index_dir workers lg_diff_direct",
+    # algo_index: index des répétitions, "ST" arbre des suffixes, "SA" table des suffixes,
+    # "MOT" table des suffixes sur les mots de sep (si car_mot, sinon comme "SA")
+    # index_dir: répertoire des index enregistrés, un par édition ("SA",
+    # fusionnés pour chaque paire) ou un par paire, sur les mots ("MOT");
+    # l'arbre des suffixes ("ST") n'est pas enregistré
+    # workers: nombre de processus alignant en parallèle les grands écarts entre
+    # les blocs communs du 1er niveau (1: pas de parallélisme), un seul pool
+    # servant à toutes les paires d'une collation
+    # lg_diff_direct: taille maximale des 2 côtés d'un écart de la récursion pour
+    # l'aligner directement par diff des mots (0: jamais)
+    defaults=("ST", None, 1, 0),
 )
 Resources = namedtuple("Resources", "source target")
 
@@ -45,13 +60,17 @@ DEFAULT_PARAMETERS = Parameters(
 
 
 class DiffTexts(object):
-    def __init__(self, chaine1, chaine2, parameters):
+    def __init__(self, chaine1, chaine2, parameters, index=None, executor=None):
+        """index: index déjà construit des 2 textes normalisés, cf. collation
+        executor: pool de processus partagé pour les écarts parallèles, créé
+        pour cette comparaison s'il n'est pas fourni et que workers > 1"""
         # verify we are not using unsupported parameters
         assert parameters.sep_sensitive
         assert parameters.car_mot
         assert parameters.algo == "HIS"
 
         self.parameters = parameters
+        self.executor = executor
 
         self.texte1 = chaine1
         self.texte2 = chaine2
@@ -79,6 +98,17 @@ class DiffTexts(object):
             self.texte1 = self.texte1.lower()
             self.texte2 = self.texte2.lower()
 
+        if index is None and parameters.index_dir is not None:
+            if parameters.algo_index.upper() == "SA":
+                index = index_editions(self.texte1, self.texte2, parameters)
+            elif parameters.algo_index.upper() == "ST":
+                logging.warning(
+                    "index_dir %s ignoré: l'arbre des suffixes n'est pas enregistré",
+                    parameters.index_dir,
+                )
+        assert index is None or index.sequences[:2] == [self.texte1, self.texte2]
+        self.index = index
+
         self.lg_texte1 = len(self.texte1)  # longueur texte ant�rieur
         self.lg_texte2 = len(self.texte2)  # longueur texte post�rieur
         self.lg_texte = self.lg_texte1 + self.lg_texte2
@@ -116,75 +146,64 @@ class DiffTexts(object):
         @param filtrageDeplacements: si vrai on filtre les d�placement non int�ressants
         """
 
-        lDepl = []
-        i = 0
-        while len(blocsDepl) > 0 and blocsDepl[i][0] < self.lg_texte1:
-            longueur = blocsDepl[i][1] - blocsDepl[i][0]
-            for y in blocsDepl[i + 1 :]:
-                if (
-                    y[0] > self.lg_texte1 - 1
-                    and longueur == y[1] - y[0]
-                    and self.texte1[blocsDepl[i][0] : blocsDepl[i][1]]
-                    == self.texte2[y[0] - self.lg_texte1 : y[1] - self.lg_texte1]
-                ):
-                    lDepl.append((blocsDepl[i], y))
-
-            i += 1
-        newLDepl = []
-
-        # on ajoute les blocs en fonction de leur longueur et de leur distance
-        for b1, b2 in lDepl:
-            longueurBloc = b1[1] - b1[0]
-            ajoutBloc = False
-            # on ajoute syst�matiquement les grands blocs
-            if longueurBloc > 15:
-                ajoutBloc = True
-            else:
-                assert longueurBloc <= 15
-                positionRelativeT1 = b1[0]
-                positionRelativeT2 = b2[0] - self.lg_texte1
-                assert 0 <= positionRelativeT1 < self.lg_texte1
-                assert 0 <= positionRelativeT2 < self.lg_texte2
-                # distance entre les positions des 2 blocs
-                distanceBloc = abs(positionRelativeT1 - positionRelativeT2)
-                # logging.debug('distanceBloc='+str(distanceBloc))
-                # ajout des petits blocs distants de moins d'une page
-                if longueurBloc < 8 and distanceBloc < 3000:
-                    ajoutBloc = True
-                # ajout des blocs moyens distants d'au plus 3 pages
-                elif 8 <= longueurBloc <= 15 and distanceBloc < 9000:
-                    ajoutBloc = True
-
-            # logging.debug((longueurBloc,b1,b2,self.texte1[b1[0]:b1[1]],self.lg_texte1,self.lg_texte2))
-            # si le d�placement est valid�, on va l'afficher
-            if ajoutBloc:
-                b1 = (b1[0], b1[1])
-                b2 = (b2[0], b2[1])
-                newLDepl.append((b1, b2))
-            else:
-                # sinon, il cela devient une suppression ou une insertion simple
-                # et on l'ajoute � le liste correspondante
-                self.suppressions = ut.addition_intervalle(
-                    self.suppressions, (b1[0], b1[1])
-                )
-                self.insertions = ut.addition_intervalle(
-                    self.insertions, (b2[0], b2[1])
-                )
-                try:  # et on le supprime de la liste des d�placements
-                    k = self.occs_deplaces.index(b1)
-                    # logging.debug('k='+str(k)+' / len(o_d)='+str(len(self.occs_deplaces)))
-                    self.occs_deplaces.pop(k)
-                except ValueError:
-                    # b1 d�j� supprim� de la liste, on contiue
-                    pass
-                try:  # idem
-                    k = self.occs_deplaces.index(b2)
-                    self.occs_deplaces.pop(k)
-                except ValueError:
-                    pass
-        del lDepl
-        lDepl = newLDepl
-        return lDepl
+        lg1 = self.lg_texte1
+        # blocs du texte 2 par contenu, dans l'ordre de la liste
+        cibles = {}
+        nb_source = 0
+        while nb_source < len(blocsDepl) and blocsDepl[nb_source][0] < lg1:
+            nb_source += 1
+        for y in blocsDepl[nb_source:]:
+            if y[0] >= lg1:
+                cle = self.texte2[y[0] - lg1 : y[1] - lg1]
+                cibles.setdefault(cle, []).append(y)
+        # jointure des blocs du texte 1 avec les blocs identiques du texte 2
+        lDepl = [
+            (x, y)
+            for x in blocsDepl[:nb_source]
+            for y in cibles.get(self.texte1[x[0] : x[1]], ())
+        ]
+        if len(lDepl) == 0:
+            return []
+        paires = numpy.array([(x[0], x[1], y[0], y[1]) for x, y in lDepl])
+        debuts1, fins1, debuts2, fins2 = paires.T
+        longueurBloc = fins1 - debuts1
+        # distance entre les positions relatives des 2 blocs
+        distanceBloc = numpy.abs(debuts1 - (debuts2 - lg1))
+        assert ((0 <= debuts2 - lg1) & (debuts2 - lg1 < self.lg_texte2)).all()
+        # on ajoute systématiquement les grands blocs, les petits blocs distants
+        # de moins d'une page et les blocs moyens distants d'au plus 3 pages
+        ajoutBloc = (
+            (longueurBloc > 15)
+            | ((longueurBloc < 8) & (distanceBloc < 3000))
+            | ((8 <= longueurBloc) & (longueurBloc <= 15) & (distanceBloc < 9000))
+        )
+        # si le déplacement est validé, on va l'afficher
+        newLDepl = [
+            ((x[0], x[1]), (y[0], y[1]))
+            for (x, y), ajout in zip(lDepl, ajoutBloc.tolist())
+            if ajout
+        ]
+        rejets = ~ajoutBloc
+        if rejets.any():
+            # sinon, il devient une suppression ou une insertion simple
+            self.suppressions = (
+                ut.Intervalles.depuis(self.suppressions)
+                .fusion(ut.Intervalles(debuts1[rejets], fins1[rejets]))
+                .couples()
+            )
+            self.insertions = (
+                ut.Intervalles.depuis(self.insertions)
+                .fusion(ut.Intervalles(debuts2[rejets], fins2[rejets]))
+                .couples()
+            )
+            # et on le supprime de la liste des déplacements, qui est sans
+            # doublon (cf. AlignAstarRecur.cleanDep)
+            enleves = set(zip(debuts1[rejets].tolist(), fins1[rejets].tolist()))
+            enleves.update(zip(debuts2[rejets].tolist(), fins2[rejets].tolist()))
+            self.occs_deplaces[:] = [
+                x for x in self.occs_deplaces if (x[0], x[1]) not in enleves
+            ]
+        return newLDepl
 
     def reconstituer_textes(self):
         self.occs_texte1 = []  # occurences des blocs communs du texte 1
@@ -199,23 +218,25 @@ class DiffTexts(object):
             algoAlign=self.parameters.algo,
             sep=self.parameters.sep_sensitive,
             separators=self.parameters.sep,
+            algoIndex=self.parameters.algo_index,
+            repertoireIndex=self.parameters.index_dir,
+            index=self.index,
+            workers=self.parameters.workers,
+            lgDiffDirect=self.parameters.lg_diff_direct,
+            executor=self.executor,
         )
 
         self.occs_deplaces, self.blocsCommuns = aligneur.run(self.texte1, self.texte2)
         logging.log(5, "Fin de l'alignement : %.2f s", time.perf_counter() - deb_al)
 
-        for x in self.occs_deplaces:
-            if x[0] < self.lg_texte1:
-                self.occs_texte1 = ut.addition_intervalle(self.occs_texte1, x)
-            else:
-                self.occs_texte2 = ut.addition_intervalle(self.occs_texte2, x)
-        for x in self.blocsCommuns:
-            if x[0] < self.lg_texte1:
-                self.occs_texte1 = ut.addition_intervalle(self.occs_texte1, x)
-            else:
-                self.occs_texte2 = ut.addition_intervalle(self.occs_texte2, x)
-        self.insertions = ut.miroir(self.occs_texte2, self.lg_texte1, self.lg_texte)
-        self.suppressions = ut.miroir(self.occs_texte1, 0, self.lg_texte1)
+        occs = ut.Intervalles.depuis(self.occs_deplaces + self.blocsCommuns)
+        dans_t1 = occs.debuts < self.lg_texte1
+        occs1 = ut.Intervalles(occs.debuts[dans_t1], occs.fins[dans_t1], False)
+        occs2 = ut.Intervalles(occs.debuts[~dans_t1], occs.fins[~dans_t1], False)
+        self.occs_texte1 = occs1.liste()
+        self.occs_texte2 = occs2.liste()
+        self.insertions = occs2.miroir(self.lg_texte1, self.lg_texte).couples()
+        self.suppressions = occs1.miroir(0, self.lg_texte1).couples()
         self.lDepl = self.calcPairesBlocsDeplaces(self.occs_deplaces)
 
         self.insertions = self.fusionItemsAdjacents(self.insertions)
@@ -223,24 +244,29 @@ class DiffTexts(object):
 
     def fusionItemsAdjacents(self, liste):
         """Fusionne les items qui se "touchent" dans une liste
-        cad les items dont la fin de l'un est le d�but de l'autre
-        """
-        i = 0
-        # logging.debug((len(liste),liste))
-        while i < len(liste) - 1:
-            # logging.debug(liste[i])
-            (deb, fin) = liste[i]
-            (deb2, fin2) = liste[i + 1]
+        cad les items dont la fin de l'un est le début de l'autre
+
+        En un parcours: l'item courant, éventuellement déjà fusionné, est
+        comparé au suivant"""
+        if len(liste) == 0:
+            return liste
+        res = []
+        courant = liste[0]
+        for suivant in liste[1:]:
+            (deb, fin) = courant
+            (deb2, fin2) = suivant
             if (
                 (deb == deb2 and fin == fin2)  # blocs identiques
                 or (deb2 <= deb and fin <= fin2)  # bloc i inclus dans bloc i+1
                 or (deb <= deb2 and fin2 <= fin)  # bloc i+1 inclus dans bloc i
                 or (fin == deb2)
             ):  # blocs adjacents
-                liste[i : i + 2] = [(deb, fin2)]
+                courant = (deb, fin2)
             else:
-                i += 1
-        return liste
+                res.append(courant)
+                courant = suivant
+        res.append(courant)
+        return res
 
     def calc_result(self):
         """Lance,textesApparies=False, dossierRapport=None, coeff=None
@@ -271,3 +297,52 @@ class DiffTexts(object):
         bbl.evaluation()
         self.bbl = bbl
         return res
+
+
+def index_editions(texte1, texte2, parameters):
+    """Index de la paire fusionné à partir des index de chaque texte normalisé
+
+    Chaque édition est indexée une fois dans parameters.index_dir (cf.
+    suffix_array.IndexTexte): comparée à un autre témoin, elle n'est pas
+    réindexée."""
+    options = "case_sensitive=%s diacri_sensitive=%s" % (
+        parameters.case_sensitive,
+        parameters.diacri_sensitive,
+    )
+    index1, index2 = [
+        suffix_array.IndexTexte(texte, parameters.sep, parameters.index_dir, options)
+        for texte in (texte1, texte2)
+    ]
+    return index1.paire(index2)
+
+
+def collation(textes, parameters, pivot=None):
+    """Compare plusieurs témoins d'un texte à partir d'une seule table des suffixes
+
+    La table est construite une fois sur tous les témoins; l'index de chaque
+    paire en est extrait (MultiGeneralisedSuffixArray.paire) au lieu d'être
+    reconstruit. Si workers > 1, un seul pool de processus sert à toutes les
+    paires. Renvoie un dico {(i, j): DiffTexts} pour toutes les paires
+    i < j ou, si pivot est donné, pour les paires (pivot, j)."""
+    textes = list(textes)
+    normalises = textes
+    if not parameters.case_sensitive:  # même normalisation que DiffTexts
+        normalises = [texte.lower() for texte in textes]
+    index = suffix_array.MultiGeneralisedSuffixArray(normalises)
+    if pivot is None:
+        paires = [(i, j) for i in range(len(textes)) for j in range(i + 1, len(textes))]
+    else:
+        paires = [(pivot, j) for j in range(len(textes)) if j != pivot]
+    executor = None
+    if parameters.workers > 1:
+        executor = futures.ProcessPoolExecutor(parameters.workers)
+    try:
+        return {
+            (i, j): DiffTexts(
+                textes[i], textes[j], parameters, index.paire(i, j), executor
+            )
+            for i, j in paires
+        }
+    finally:
+        if executor is not None:
+            executor.shutdown()
@@ -0,0 +1,102 @@
+"""Diff de Myers en O(ND) sur les lexèmes de 2 petits textes.
+
+Sert à aligner directement les petits écarts de la récursion de
+AlignAstarRecur.deplacements_pond2 (un mot ou une ponctuation changés), sans
+construire d'index des répétitions: la plus longue sous-suite commune des
+lexèmes (mots et séparateurs) donne les blocs communs de l'écart, aucun
+déplacement n'y est cherché.
+
+E. W. Myers, "An O(ND) difference algorithm and its variations",
+Algorithmica 1 (1986)."""
+
+
+def lexemes(texte, separateurs):
+    """Découpe texte en lexèmes: suites maximales de caractères hors
+    separateurs et séparateurs pris isolément; les caractères si separateurs
+    vaut None. Renvoie la liste des (debut, fin) de chaque lexème."""
+    if separateurs is None:
+        return [(i, i + 1) for i in range(len(texte))]
+    res = []
+    debut = 0
+    for i, c in enumerate(texte):
+        if c in separateurs:
+            if debut < i:
+                res.append((debut, i))
+            res.append((i, i + 1))
+            debut = i + 1
+    if debut < len(texte):
+        res.append((debut, len(texte)))
+    return res
+
+
+def sous_suite_commune(a, b):
+    """Plus longue sous-suite commune des listes a et b par l'algorithme glouton
+    de Myers. Renvoie la liste croissante des couples (i, j) tels que
+    a[i] == b[j] appartenant à la sous-suite."""
+    n = len(a)
+    m = len(b)
+    maximum = n + m
+    # v[k + maximum]: x le plus loin atteint sur la diagonale k = x - y
+    v = [0] * (2 * maximum + 2)
+    traces = []
+    for d in range(maximum + 1):
+        traces.append(v[:])
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[k - 1 + maximum] < v[k + 1 + maximum]):
+                x = v[k + 1 + maximum]
+            else:
+                x = v[k - 1 + maximum] + 1
+            y = x - k
+            while x < n and y < m and a[x] == b[y]:
+                x += 1
+                y += 1
+            v[k + maximum] = x
+            if x >= n and y >= m:
+                return _remonter(traces, n, m, maximum)
+    return []
+
+
+def _remonter(traces, x, y, maximum):
+    """Remonte les traces de sous_suite_commune depuis (x, y) = (n, m)"""
+    couples = []
+    for d in range(len(traces) - 1, -1, -1):
+        v = traces[d]
+        k = x - y
+        if k == -d or (k != d and v[k - 1 + maximum] < v[k + 1 + maximum]):
+            k_prec = k + 1
+        else:
+            k_prec = k - 1
+        x_prec = v[k_prec + maximum]
+        y_prec = x_prec - k_prec
+        # diagonale (lexèmes égaux) parcourue après l'édition de l'étape d
+        while x > x_prec and y > y_prec:
+            x -= 1
+            y -= 1
+            couples.append((x, y))
+        if d > 0:
+            x, y = x_prec, y_prec
+    couples.reverse()
+    return couples
+
+
+def blocs_communs(t1, t2, separateurs, min_size=1):
+    """Blocs communs de t1 et t2: suites de lexèmes consécutifs de la plus
+    longue sous-suite commune, d'au moins min_size caractères.
+    Renvoie 2 listes parallèles d'intervalles [debut, fin), dans t1 et dans t2."""
+    lex1 = lexemes(t1, separateurs)
+    lex2 = lexemes(t2, separateurs)
+    couples = sous_suite_commune([t1[d:f] for d, f in lex1], [t2[d:f] for d, f in lex2])
+    blocs1 = []
+    blocs2 = []
+    k = 0
+    while k < len(couples):
+        i, j = couples[k]
+        fin = k + 1
+        while fin < len(couples) and couples[fin] == (i + fin - k, j + fin - k):
+            fin += 1
+        i_fin, j_fin = couples[fin - 1]
+        if lex1[i_fin][1] - lex1[i][0] >= min_size:
+            blocs1.append([lex1[i][0], lex1[i_fin][1]])
+            blocs2.append([lex2[j][0], lex2[j_fin][1]])
+        k = fin
+    return blocs1, blocs2
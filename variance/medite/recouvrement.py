@@ -22,18 +22,31 @@ import bisect
 import sys
 import random
 import numpy as Numeric
+from sortedcontainers import SortedDict
 from . import utile
+from . import empreinte
+from . import separateurs
+
+# séparateurs sur lesquels resoudre_recouvrement cherche une cesure
+SEP_CESURE = " .-,!?:;\r\n\t"
 
 
 class Recouvrement(object):
     """Classe g�rant et r�solvant les recouvrements"""
 
-    def __init__(self, texte, blocs_texte, lg_texte1, min_size=1):
+    def __init__(self, texte, blocs_texte, lg_texte1, min_size=1, empreintes=None):
+        """empreintes: clés des sous-chaînes de texte (empreinte.Empreintes),
+        construites ici si elles ne sont pas fournies"""
         self.texte = texte
+        if empreintes is None:
+            empreintes = empreinte.Empreintes(texte)
+        self.empreintes = empreintes
         self.blocs_texte = blocs_texte
         self.lg_texte1 = lg_texte1
         self.lg_texte2 = len(self.texte) - self.lg_texte1
         self.min_size = min_size
+        # index des séparateurs SEP_CESURE, construit au premier recouvrement
+        self.index_cesure = None
 
     def resoudre_recouvrement(self, I):
         """part d'un intervalle qui correspond � un recouvrement
@@ -43,7 +56,9 @@ class Recouvrement(object):
 
         Attention !! pb dans BBL.extractDeplacements(), ne respecte plus l'assertion
         d'ordre si on utilise cette fonction"""
-        sep = " .-,!?:;\r\n\t"
+        if self.index_cesure is None:
+            self.index_cesure = separateurs.IndexSeparateurs(self.texte, SEP_CESURE)
+        est_sep = self.index_cesure.est_sep
         # breakpoint()
         tailleChAnt = I[2][1] - I[2][0]
         tailleChPost = I[3][1] - I[3][0]
@@ -53,13 +68,13 @@ class Recouvrement(object):
         # print 'post:'+self.texte[I[3][0]:I[3][1]]+':'+str(I[3])
         if tailleChAnt < tailleChPost:
             # si la chaine ant�rieure est + petite, on privil�gie une coupure dans cettte chaine
-            if I[0] == 0 or I[0] == self.lg_texte1 or self.texte[I[0] - 1] in sep:
+            if I[0] == 0 or I[0] == self.lg_texte1 or est_sep[I[0] - 1]:
                 res = I[0]
                 match = True
             elif (
                 I[1] == (self.lg_texte1 - 1)
                 or I[1] == (self.lg_texte1 + self.lg_texte2 - 1)
-                or self.texte[I[1]] in sep
+                or est_sep[I[1]]
             ):
                 res = I[1]
                 match = True
@@ -67,34 +82,26 @@ class Recouvrement(object):
             if (
                 I[1] == (self.lg_texte1 - 1)
                 or I[1] == (self.lg_texte1 + self.lg_texte2 - 1)
-                or self.texte[I[1]] in sep
+                or est_sep[I[1]]
             ):
                 res = I[1]
                 match = True
-            elif I[0] == 0 or I[0] == self.lg_texte1 or self.texte[I[0] - 1] in sep:
+            elif I[0] == 0 or I[0] == self.lg_texte1 or est_sep[I[0] - 1]:
                 res = I[0]
                 match = True
 
         if not match:  # sinon, on parcours tout le recouvrement dans un sens ou l'autre
+            # premier séparateur en partant du début ou de la fin du recouvrement
             if tailleChAnt <= tailleChPost:
-                L = list(range(I[0], I[1] + 1))
+                res = I[0]
+                x = self.index_cesure.premier(I[0], I[1])
+                if x is not None:
+                    res = x  # res = max(I[0],res-1)
             else:
-                L = list(range(I[1], I[0] - 1, -1))
-            res = L[0]
-            # L = range(I[0], I[1]+1)
-            # for x in L:
-            #    if self.texte[x] == ' ':
-            #        res = x
-            #        match = True
-            if not match:
-                for x in L:
-                    if self.texte[x] in sep:
-                        res = x
-                        if tailleChAnt <= tailleChPost:
-                            pass  # res = max(L[0],res-1)
-                        else:
-                            res = max(res + 1, L[0])
-                        break
+                res = I[1]
+                x = self.index_cesure.dernier(I[0], I[1])
+                if x is not None:
+                    res = max(x + 1, I[1])
         # logging.debug(self.texte[I[2][0]:I[2][1]]+' / ' +self.texte[I[3][0]:I[3][1]] +
         #           ' / ' + self.texte[I[0]:I[1]] + ' / res='+self.texte[res-1:res+2] )
         if res < 0:
@@ -112,7 +119,7 @@ class Recouvrement3(Recouvrement):
     dans le dico"""
 
     def add_bloc(self, debut, fin):
-        cle = hash(self.texte[debut:fin])
+        cle = self.empreintes.cle(debut, fin)
         longueur = fin - debut
         try:
             self.res[(cle, longueur)].append(debut)
@@ -121,22 +128,143 @@ class Recouvrement3(Recouvrement):
             self.NOSMEM_nb_bloc += 1
 
 
+class CouvertureTableaux(object):
+    """self.seq_repeat de Recouvrement4 sous forme de 2 tableaux: le bloc qui
+    couvre la position p est (deb[p], fin[p]), (p,p) si aucun bloc.
+    8 octets par caractère des 2 textes, accès direct"""
+
+    def __init__(self, longueur):
+        self.deb = Numeric.arange(longueur, dtype=Numeric.int32)
+        self.fin = self.deb.copy()
+
+    def bloc(self, p):
+        """Bloc (debut, fin) qui couvre p"""
+        return self.deb[p], self.fin[p]
+
+    def marquer(self, debut, fin, bloc_deb, bloc_fin):
+        """self.seq_repeat[i] = (bloc_deb,bloc_fin) pour i dans [debut, fin)"""
+        self.deb[debut:fin] = bloc_deb
+        self.fin[debut:fin] = bloc_fin
+
+    def liberer(self, debut, fin):
+        """Remet les positions [debut, fin) hors bloc: self.seq_repeat[i] = (i,i)"""
+        fin = min(fin, len(self.deb))
+        if debut < fin:
+            positions = Numeric.arange(debut, fin, dtype=Numeric.int32)
+            self.deb[debut:fin] = positions
+            self.fin[debut:fin] = positions
+
+    def blocs(self):
+        """Parcours final de gauche à droite des blocs non vides"""
+        deb = self.deb.tolist()
+        fin = self.fin.tolist()
+        pos = 0
+        while pos < len(deb):
+            if fin[pos] - deb[pos] > 0:
+                yield deb[pos], fin[pos]
+                pos = fin[pos]
+            else:
+                pos += 1
+
+
+class CouvertureIntervalles(object):
+    """Même interface que CouvertureTableaux, la mémoire étant proportionnelle
+    au nombre de blocs et non à la longueur des textes.
+
+    Les positions sont découpées en plages consécutives de même valeur,
+    rangées dans un dictionnaire trié (sortedcontainers.SortedDict) de leurs
+    débuts: la plage qui commence en debut finit au début de la suivante,
+    plages[debut] est le bloc (debut, fin) de ses positions ou None si elles
+    sont hors bloc. Accès, coupures et suppressions de plages sont en
+    O(log n) pour n plages; les écritures reproduisent exactement les
+    affectations de tranches des tableaux, y compris quand elles ne
+    recouvrent qu'une partie d'un bloc."""
+
+    def __init__(self, longueur):
+        self.longueur = longueur
+        self.plages = SortedDict({0: None})
+
+    def bloc(self, p):
+        if not 0 <= p < self.longueur:
+            raise IndexError(p)
+        _, valeur = self.plages.peekitem(self.plages.bisect_right(p) - 1)
+        return (p, p) if valeur is None else valeur
+
+    def marquer(self, debut, fin, bloc_deb, bloc_fin):
+        self._affecter(debut, fin, (bloc_deb, bloc_fin))
+
+    def liberer(self, debut, fin):
+        self._affecter(debut, fin, None)
+
+    def blocs(self):
+        pos = 0
+        while pos < self.longueur:
+            k = self.plages.bisect_right(pos) - 1
+            valeur = self.plages.peekitem(k)[1]
+            if valeur is not None and valeur[1] - valeur[0] > 0:
+                yield valeur
+                pos = valeur[1]
+            elif k + 1 < len(self.plages):
+                pos = self.plages.peekitem(k + 1)[0]
+            else:
+                pos = self.longueur
+
+    def _couper(self, p):
+        """Fait commencer une plage en p (0 <= p < longueur)"""
+        debut, valeur = self.plages.peekitem(self.plages.bisect_right(p) - 1)
+        if debut != p:
+            self.plages[p] = valeur
+
+    def _affecter(self, debut, fin, valeur):
+        # bornes d'une tranche [debut:fin] de tableau
+        debut = min(debut, self.longueur)
+        fin = min(fin, self.longueur)
+        if debut >= fin:
+            return
+        self._couper(debut)
+        if fin < self.longueur:
+            self._couper(fin)
+        for p in list(self.plages.irange(debut, fin, inclusive=(False, False))):
+            del self.plages[p]
+        self.plages[debut] = valeur
+        # fusion avec les plages voisines de même valeur
+        k = self.plages.index(debut)
+        if k + 1 < len(self.plages) and self.plages.peekitem(k + 1)[1] == valeur:
+            del self.plages[fin]
+        if k > 0 and self.plages.peekitem(k - 1)[1] == valeur:
+            del self.plages[debut]
+
+
+# longueur des 2 textes à partir de laquelle Recouvrement4 utilise
+# CouvertureIntervalles plutôt que CouvertureTableaux
+SEUIL_COUVERTURE_INTERVALLES = 10000000
+
+
 class Recouvrement4(Recouvrement3):
-    def __init__(self, texte, blocs_texte, lg_texte1, min_size):
+    def __init__(
+        self, texte, blocs_texte, lg_texte1, min_size, couverture=None, empreintes=None
+    ):
+        """couverture: classe de self.seq_repeat, CouvertureTableaux ou
+        CouvertureIntervalles; par défaut, choisie d'après
+        SEUIL_COUVERTURE_INTERVALLES"""
         self.min_size = min_size
-        Recouvrement3.__init__(self, texte, blocs_texte, lg_texte1)
+        Recouvrement3.__init__(
+            self, texte, blocs_texte, lg_texte1, empreintes=empreintes
+        )
+        if couverture is None:
+            if len(texte) >= SEUIL_COUVERTURE_INTERVALLES:
+                couverture = CouvertureIntervalles
+            else:
+                couverture = CouvertureTableaux
+        self.couverture = couverture
 
     def eliminer_recouvrements(self):
         # self.seq_repeat = [] ;
         self.dicoOccLiee = {}
         longueur_totale = self.lg_texte1 + self.lg_texte2 + 1
         logging.info("longueure total %s" % longueur_totale)
-        self.seq_repeat_deb = Numeric.zeros(longueur_totale, int)
-        self.seq_repeat_fin = Numeric.zeros(longueur_totale, int)
-        for i in range(longueur_totale):
-            # self.seq_repeat.append((i,i))
-            self.seq_repeat_deb[i] = i
-            self.seq_repeat_fin[i] = i
+        # au départ chaque position est hors bloc: self.seq_repeat[i] = (i,i)
+        self.seq_repeat = self.couverture(longueur_totale)
         self.hqOccBloc = self.transformHeapQueue()
         self.old_len_add = 10000000
         self.totalAjout = self.totalRogneG = self.totalRogneD = self.nb_reinclusion = 0
@@ -161,19 +289,10 @@ class Recouvrement4(Recouvrement3):
         self.NOSMEM_nb_occ = 0  # nb d'occurences de NOSMEM
         self.NOSMEM_tot_size = 0  # taille totale des NOSMEM
         self.res = {}
-        pos = 0  # len(self.seq_repeat)-1
-        # while pos >= 0:
-        while pos < len(self.seq_repeat_deb):
-            debut = self.seq_repeat_deb[pos]
-            fin = self.seq_repeat_fin[pos]
-            if fin - debut > 0:
-                self.add_bloc(debut, fin)
-                pos = fin
-                self.NOSMEM_nb_occ += 1
-                self.NOSMEM_tot_size += fin - debut
-            else:
-                pos += 1
-            # pos = debut - 1
+        for debut, fin in self.seq_repeat.blocs():
+            self.add_bloc(debut, fin)
+            self.NOSMEM_nb_occ += 1
+            self.NOSMEM_tot_size += fin - debut
 
         logging.debug("=========================")
         logging.debug(
@@ -199,7 +318,7 @@ class Recouvrement4(Recouvrement3):
             bisect.insort_right(lOverlap, lNonOverlap[0])
         elif len(lNonOverlap) > 1:
             # si plusieurs non chevauchants, on les ajoute � self.seq_repeat
-            cle = hash(self.texte[lNonOverlap[0][1] : lNonOverlap[0][2]])
+            cle = self.empreintes.cle(lNonOverlap[0][1], lNonOverlap[0][2])
             longueur2 = lNonOverlap[0][2] - lNonOverlap[0][1]
             locc = [item[1] for item in lNonOverlap]
             try:  # dico stockant les occurrences d'une chaine
@@ -230,7 +349,9 @@ class Recouvrement4(Recouvrement3):
             longueur2 = nouveau_fin_item_min - nouveau_debut_item_min
             if longueur2 > 0:
                 # restockage du bloc dans la file de priotrit�
-                cle_hash = hash(self.texte[nouveau_debut_item_min:nouveau_fin_item_min])
+                cle_hash = self.empreintes.cle(
+                    nouveau_debut_item_min, nouveau_fin_item_min
+                )
                 item = (1.0 / longueur2, longueur2, cle_hash, lOcc)
                 # logging.debug('reinclusion de '+str(item))
                 self.nb_reinclusion += 1
@@ -239,7 +360,8 @@ class Recouvrement4(Recouvrement3):
     def addOccSeq(self, lNonOverlap):
         """Ajout effectif des occurrences d'un bloc � self.seq_repeat"""
         # logging.debug('addOccSeq: lNonOverlap='+str(lNonOverlap))
-        cle_dic = hash(self.texte[lNonOverlap[0][1] : lNonOverlap[0][2]])  # cle du bloc
+        # cle du bloc
+        cle_dic = self.empreintes.cle(lNonOverlap[0][1], lNonOverlap[0][2])
         longeur_dic = lNonOverlap[0][0]  # longueur du bloc
         for (
             longueur,
@@ -252,14 +374,13 @@ class Recouvrement4(Recouvrement3):
             self.totalAjout += longueur
             # si chevauchement � gauche
             # debut_prec,fin_prec = self.seq_repeat[debut] # bloc existant � gauche de l'occ � ins�rer
-            debut_prec = self.seq_repeat_deb[debut]
-            fin_prec = self.seq_repeat_fin[debut]
+            debut_prec, fin_prec = self.seq_repeat.bloc(debut)
             if debut < fin_prec:  # debut_prec < fin_prec and
                 # logging.debug('addOccSeq: cesureG / '+str((debut_prec,fin_prec)))
                 pos_cesure = debut - debut_prec  # position de la c�sure dans le bloc
                 longueur_prec = fin_prec - debut_prec  # longueur bloc pr�c�dent
                 # cl� bloc pr�c�dent
-                cle_prec = hash(self.texte[debut_prec:fin_prec])
+                cle_prec = self.empreintes.cle(debut_prec, fin_prec)
                 if (cle_prec, longueur_prec) in self.dicoOccLiee:
                     # liste des occ du bloc pr�c�dent
                     locc_prec = list(self.dicoOccLiee[(cle_prec, longueur_prec)])
@@ -271,34 +392,33 @@ class Recouvrement4(Recouvrement3):
                 ) in (
                     locc_prec
                 ):  # pour chaque occ du bloc pr�c�dent, on va le c�surer
-                    # chaque caract�re du bloc est modifi� dans self.seq_repeat
-                    for i in range(debut_occ_prec, debut_occ_prec + longueur_prec):
-                        if i < debut_occ_prec + pos_cesure:
-                            # self.seq_repeat[i] = (debut_occ_prec,debut_occ_prec+pos_cesure)
-                            self.seq_repeat_deb[i] = debut_occ_prec
-                            self.seq_repeat_fin[i] = debut_occ_prec + pos_cesure
-                        else:
-                            # self.seq_repeat[i] = (i,i) # partie c�sur�e qui va �tre remodifi�e par le nouveau bloc
-                            self.seq_repeat_deb[i] = i
-                            self.seq_repeat_fin[i] = i
+                    # le début du bloc est conservé:
+                    # self.seq_repeat[i] = (debut_occ_prec,debut_occ_prec+pos_cesure)
+                    cesure = debut_occ_prec + pos_cesure
+                    fin_occ_prec = debut_occ_prec + longueur_prec
+                    fin_garde = min(cesure, fin_occ_prec)
+                    self.seq_repeat.marquer(
+                        debut_occ_prec, fin_garde, debut_occ_prec, cesure
+                    )
+                    # partie césurée qui va être remodifiée par le nouveau bloc
+                    self.seq_repeat.liberer(max(cesure, debut_occ_prec), fin_occ_prec)
                     self.totalRogneG += 1
                 # suppression de l'ancienne chaine du bloc dans le dico et ajout du nouveau bloc pr�c�dent c�sur�
                 if (cle_prec, longueur_prec) in self.dicoOccLiee:
                     del self.dicoOccLiee[(cle_prec, longueur_prec)]
                 try:
                     self.dicoOccLiee[
-                        hash(self.texte[locc_prec[0] : locc_prec[0] + pos_cesure]),
+                        self.empreintes.cle(locc_prec[0], locc_prec[0] + pos_cesure),
                         pos_cesure,
                     ].extend(locc_prec)
                 except KeyError:
                     self.dicoOccLiee[
-                        hash(self.texte[locc_prec[0] : locc_prec[0] + pos_cesure]),
+                        self.empreintes.cle(locc_prec[0], locc_prec[0] + pos_cesure),
                         pos_cesure,
                     ] = locc_prec
             # chevauchement � droite
             # debut_suiv,fin_suiv = self.seq_repeat[fin] # bloc suivant
-            debut_suiv = self.seq_repeat_deb[fin]
-            fin_suiv = self.seq_repeat_fin[fin]
+            debut_suiv, fin_suiv = self.seq_repeat.bloc(fin)
             if debut_suiv < fin:
                 # logging.debug('addOccSeq: cesureG / '+str((debut_suiv,fin_suiv)))
                 pos_cesure = (
@@ -306,7 +426,7 @@ class Recouvrement4(Recouvrement3):
                 )  # position de la c�sure dans le bloc suivant
                 longueur_suiv = fin_suiv - debut_suiv  # longueur du bloc suivant
                 # cle du bloc suivant
-                cle_suiv = hash(self.texte[debut_suiv:fin_suiv])
+                cle_suiv = self.empreintes.cle(debut_suiv, fin_suiv)
                 # occurrences du bloc suivant
                 if (cle_suiv, longueur_suiv) in self.dicoOccLiee:
                     locc_suiv = list(self.dicoOccLiee[(cle_suiv, longueur_suiv)])
@@ -320,16 +440,16 @@ class Recouvrement4(Recouvrement3):
                 for (
                     debut_occ_suiv
                 ) in locc_suiv:  # pour chaque occurrence du bloc suivant
-                    # chaque caract�re du bloc suivant � c�surer
-                    for i in range(debut_occ_suiv, debut_occ_suiv + longueur_suiv):
-                        if i < debut_occ_suiv + pos_cesure:
-                            # self.seq_repeat[i] = (i,i) # partie � c�surer
-                            self.seq_repeat_deb[i] = i
-                            self.seq_repeat_fin[i] = i
-                        else:
-                            # self.seq_repeat[i] = (debut_occ_suiv+pos_cesure,debut_occ_suiv+longueur_suiv) # partie conserv�e
-                            self.seq_repeat_deb[i] = debut_occ_suiv + pos_cesure
-                            self.seq_repeat_fin[i] = debut_occ_suiv + longueur_suiv
+                    cesure = debut_occ_suiv + pos_cesure
+                    fin_occ_suiv = debut_occ_suiv + longueur_suiv
+                    # partie à césurer
+                    self.seq_repeat.liberer(debut_occ_suiv, min(cesure, fin_occ_suiv))
+                    # partie conservée:
+                    # self.seq_repeat[i] = (debut_occ_suiv+pos_cesure,debut_occ_suiv+longueur_suiv)
+                    debut_garde = max(cesure, debut_occ_suiv)
+                    self.seq_repeat.marquer(
+                        debut_garde, fin_occ_suiv, cesure, fin_occ_suiv
+                    )
                     # stockage du nouveau d�but du bloc suivant
                     nouv_locc_suiv.append(debut_occ_suiv + pos_cesure)
                     self.totalRogneD += 1
@@ -338,31 +458,22 @@ class Recouvrement4(Recouvrement3):
                     del self.dicoOccLiee[(cle_suiv, longueur_suiv)]
                 try:
                     self.dicoOccLiee[
-                        hash(
-                            self.texte[
-                                nouv_locc_suiv[0] : nouv_locc_suiv[0]
-                                + nouv_longueur_suiv
-                            ]
+                        self.empreintes.cle(
+                            nouv_locc_suiv[0], nouv_locc_suiv[0] + nouv_longueur_suiv
                         ),
                         nouv_longueur_suiv,
                     ].extend(nouv_locc_suiv)
                 except KeyError:
                     self.dicoOccLiee[
-                        hash(
-                            self.texte[
-                                nouv_locc_suiv[0] : nouv_locc_suiv[0]
-                                + nouv_longueur_suiv
-                            ]
+                        self.empreintes.cle(
+                            nouv_locc_suiv[0], nouv_locc_suiv[0] + nouv_longueur_suiv
                         ),
                         nouv_longueur_suiv,
                     ] = nouv_locc_suiv
             # ajout effectif du bloc apr�s le travail de mise � jour des blocs chevauchants
             # if debut < fin_prec: assert self.seq_repeat[debut] == (debut,debut), self.seq_repeat[debut-5:debut+5]
             # if debut_suiv < fin: assert self.seq_repeat[fin] == (fin,fin), self.seq_repeat[fin-5:fin+5]
-            for i in range(debut, fin):
-                # self.seq_repeat[i] = (debut,fin)
-                self.seq_repeat_deb[i] = debut
-                self.seq_repeat_fin[i] = fin
+            self.seq_repeat.marquer(debut, fin, debut, fin)
 
     def checkOverlap(self, longueur, lOcc):
         """Recherche des chevauchements gauche et droits d'une liste d'occurrences d'un bloc.
@@ -379,11 +490,9 @@ class Recouvrement4(Recouvrement3):
             fin = occ + longueur
             try:
                 # d1,f1 = self.seq_repeat[debut] # bloc existant au d�but du bloc � ins�rer
-                d1 = self.seq_repeat_deb[debut]
-                f1 = self.seq_repeat_fin[debut]
+                d1, f1 = self.seq_repeat.bloc(debut)
                 # d2,f2 = self.seq_repeat[fin] # bloc existant � la fin du bloc � ins�rer
-                d2 = self.seq_repeat_deb[fin]
-                f2 = self.seq_repeat_fin[fin]
+                d2, f2 = self.seq_repeat.bloc(fin)
             except IndexError:  # sale
                 return lNonOverlap, lOverlap
             # logging.debug((d1,f1))
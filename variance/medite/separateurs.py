@@ -0,0 +1,68 @@
+"""Index des séparateurs d'un texte.
+
+Remplace les tests caractère par caractère "texte[i] in sep": le texte est
+parcouru une seule fois par numpy pour marquer ses séparateurs, puis on en
+déduit pour chaque position le séparateur suivant (>= i) et le précédent
+(<= i). Savoir si une position est un séparateur ou trouver la frontière de
+mot la plus proche se fait ensuite en O(1)."""
+
+import numpy
+
+from . import utile
+
+
+class IndexSeparateurs(object):
+    """Séparateurs de texte parmi les caractères de separateurs
+
+    masque[i] est vrai si texte[i] est un séparateur; suivant[i] est la position
+    du premier séparateur >= i (len(texte) s'il n'y en a pas), precedent[i]
+    celle du dernier séparateur <= i (-1 s'il n'y en a pas). Les 2 tables ont
+    len(texte)+1 éléments, la position len(texte) n'étant pas un séparateur."""
+
+    def __init__(self, texte, separateurs):
+        self._indexer(
+            numpy.isin(
+                utile.codes_caracteres(texte), utile.codes_caracteres(separateurs)
+            )
+        )
+
+    @classmethod
+    def depuis_masque(cls, masque):
+        """Index dont les séparateurs sont marqués par le tableau booléen masque,
+        par exemple celui enregistré avec l'index d'une édition"""
+        index = cls.__new__(cls)
+        index._indexer(numpy.asarray(masque, bool))
+        return index
+
+    def _indexer(self, masque):
+        n = len(masque)
+        self.longueur = n
+        self.masque = masque
+        positions = numpy.flatnonzero(self.masque)
+        self.nombre = len(positions)
+        # rang du premier séparateur >= i pour chaque i de 0 à n
+        rangs = numpy.searchsorted(positions, numpy.arange(n + 1))
+        bornes = numpy.append(positions, n)
+        self.suivant = bornes[rangs]
+        # dernier séparateur <= i: celui qui précède le premier > i
+        rangs = numpy.searchsorted(positions, numpy.arange(n + 1), side="right")
+        bornes = numpy.insert(positions, 0, -1)
+        self.precedent = bornes[rangs]
+        # listes Python pour les accès unitaires, plus rapides que numpy
+        self.est_sep = self.masque.tolist()
+        self._suivant = memoryview(self.suivant)
+        self._precedent = memoryview(self.precedent)
+
+    def en_frontiere(self, i):
+        """Vrai si texte[i] ou texte[i-1] est un séparateur (0 < i < len(texte))"""
+        return self.est_sep[i] or self.est_sep[i - 1]
+
+    def premier(self, debut, fin):
+        """Position du premier séparateur de [debut, fin], None s'il n'y en a pas"""
+        x = self._suivant[debut]
+        return x if x <= fin and x < self.longueur else None
+
+    def dernier(self, debut, fin):
+        """Position du dernier séparateur de [debut, fin], None s'il n'y en a pas"""
+        x = self._precedent[fin]
+        return x if x >= debut else None
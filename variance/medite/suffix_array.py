@@ -0,0 +1,979 @@
+"""Index des répétitions par table des suffixes et table des LCP.
+
+Remplace l'arbre des suffixes C pour l'extraction des MEM: la table des suffixes
+est construite par doublement de préfixe (O(n log n) tris numpy), la table LCP
+par remontée binaire sur les rangs de chaque niveau de doublement.
+Les noeuds internes de l'arbre des suffixes sont les intervalles LCP, obtenus en
+un seul parcours de la table; les sélections qui suivent sont vectorisées.
+
+Les tableaux peuvent être enregistrés dans un répertoire d'index, sous une clé
+calculée à partir des textes indexés et des paramètres de l'index; une
+comparaison ultérieure des mêmes textes les ouvre par numpy.load(mmap_mode="r")
+au lieu de les reconstruire, plusieurs processus partageant alors les mêmes
+pages du cache du système.
+
+Le résultat de get_seq_repeat est identique à celui de
+TrueGeneralisedSuffixTree.get_seq_repeat, qui parcourt l'arbre en post-ordre
+avec les fils rangés par ordre d'insertion, c'est-à-dire par plus petite
+feuille de leur sous-arbre."""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+
+import numpy
+
+from . import empreinte, separateurs, suffix_tree, utile
+
+# caractère gauche fictif de la feuille en position 0 (cf. get_seq_repeat)
+CARAC_DEBUT = 4
+
+# version du format des index enregistrés sur disque
+FORMAT_INDEX = 1
+
+# caractères comparés directement, avant la dichotomie sur les empreintes,
+# pour placer un suffixe d'une édition parmi ceux d'une autre (IndexTexte.paire)
+LONGUEUR_DIRECTE = 16
+
+
+def table_suffixes(codes):
+    """Construit la table des suffixes par doublement de préfixe.
+
+    Renvoie (sa, rangs) où rangs[j][i] est le rang du suffixe i d'après ses
+    2**j premiers caractères; le dernier niveau distingue tous les suffixes."""
+    n = len(codes)
+    rang = numpy.unique(codes, return_inverse=True)[1].astype(numpy.int64) + 1
+    rang = rang.reshape(n)
+    rangs = [rang.astype(numpy.int32)]
+    sa = numpy.argsort(rang, kind="stable")
+    k = 1
+    while n > 0 and rang[sa[-1]] < n:
+        suivant = numpy.zeros(n, numpy.int64)  # 0: au-delà de la fin du texte
+        suivant[: max(n - k, 0)] = rang[k:]
+        cle = rang * (n + 1) + suivant
+        sa = numpy.argsort(cle, kind="stable")
+        cle_triee = cle[sa]
+        nouveau = numpy.empty(n, numpy.int64)
+        nouveau[sa] = numpy.cumsum(
+            numpy.concatenate(([1], cle_triee[1:] != cle_triee[:-1]))
+        )
+        rang = nouveau
+        rangs.append(rang.astype(numpy.int32))
+        k *= 2
+    return sa, rangs
+
+
+def table_lcp(sa, rangs):
+    """Table LCP: lcp[i] est le plus long préfixe commun de sa[i-1] et sa[i]
+    pour 0 < i < n, lcp[0] = lcp[n] = 0"""
+    n = len(sa)
+    lcp = numpy.zeros(n + 1, numpy.int64)
+    if n < 2:
+        return lcp
+    a = sa[:-1]
+    b = sa[1:]
+    h = numpy.zeros(n - 1, numpy.int64)
+    # le dernier niveau distingue tous les suffixes: lcp < 2**(len(rangs)-1)
+    for j in range(len(rangs) - 2, -1, -1):
+        pa = a + h
+        pb = b + h
+        valide = (pa < n) & (pb < n)
+        rang = rangs[j]
+        egal = numpy.zeros(n - 1, bool)
+        egal[valide] = rang[pa[valide]] == rang[pb[valide]]
+        h += egal.astype(numpy.int64) << j
+    lcp[1:n] = h
+    return lcp
+
+
+def intervalles_lcp(sa, lcp):
+    """Parcours ascendant des intervalles LCP (les noeuds internes de l'arbre)
+
+    Renvoie (profondeur, parent, mini, taille, proprio) pour les noeuds internes,
+    la racine ayant l'identifiant 0: mini est la plus petite feuille du
+    sous-arbre, taille le nombre de noeuds internes du sous-arbre et proprio[i]
+    l'intervalle de profondeur lcp[i] qui contient la frontière i."""
+    n = len(sa)
+    sa_l = sa.tolist()
+    lcp_l = lcp.tolist()
+    profondeur = [0]
+    parent = [-1]
+    mini = [sa_l[0] if n else 0]
+    taille = [1]
+    debut = [0]
+    proprio = [0] * (n + 1)
+    pile = [0]
+    for i in range(1, n + 1):
+        l = lcp_l[i]
+        feuille = sa_l[i - 1]
+        sommet = pile[-1]
+        if feuille < mini[sommet]:
+            mini[sommet] = feuille
+        dernier = -1
+        while l < profondeur[pile[-1]]:
+            v = pile.pop()
+            dernier = v
+            t = pile[-1]
+            if profondeur[t] >= l:
+                parent[v] = t
+                if mini[v] < mini[t]:
+                    mini[t] = mini[v]
+                taille[t] += taille[v]
+        if l > profondeur[pile[-1]]:
+            v = len(profondeur)
+            profondeur.append(l)
+            parent.append(-1)
+            if dernier >= 0:
+                # le nouvel intervalle englobe le dernier intervalle fermé
+                parent[dernier] = v
+                debut.append(debut[dernier])
+                mini.append(mini[dernier])
+                taille.append(taille[dernier] + 1)
+            else:
+                debut.append(i - 1)
+                mini.append(feuille)
+                taille.append(1)
+            pile.append(v)
+        proprio[i] = pile[-1]
+    return (
+        numpy.array(profondeur, numpy.int64),
+        numpy.array(parent, numpy.int64),
+        numpy.array(mini, numpy.int64),
+        numpy.array(taille, numpy.int64),
+        numpy.array(proprio, numpy.int64),
+    )
+
+
+def rangs_post_ordre(parent, decalage):
+    """Rang en post-ordre de chaque noeud interne
+
+    decalage[v] est le nombre de noeuds internes des frères aînés de v;
+    le début du sous-arbre de v est la somme des décalages de ses ancêtres,
+    calculée par sauts de pointeurs."""
+    cumul = decalage.copy()
+    cumul[0] = 0
+    saut = parent.copy()
+    saut[0] = 0
+    while (saut != 0).any():
+        cumul = cumul + cumul[saut]
+        saut = saut[saut]
+    return cumul
+
+
+def cle_index(*parties):
+    """Empreinte sha256 du format des index et des chaînes parties"""
+    empreinte = hashlib.sha256()
+    for partie in (str(FORMAT_INDEX),) + parties:
+        octets = partie.encode("utf-8", "surrogatepass")
+        empreinte.update(len(octets).to_bytes(8, "little"))
+        empreinte.update(octets)
+    return empreinte.hexdigest()
+
+
+def charger_tableaux(repertoire, cle, noms):
+    """Ouvre en mmap les tableaux noms de l'index enregistré sous cle dans
+    repertoire. Renvoie (meta, {nom: tableau}), None si l'index n'existe pas"""
+    chemin = os.path.join(repertoire, cle)
+    try:
+        with open(os.path.join(chemin, "index.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("format") != FORMAT_INDEX:
+            return None
+        tableaux = {
+            nom: numpy.load(os.path.join(chemin, nom + ".npy"), mmap_mode="r")
+            for nom in noms
+        }
+    except (OSError, ValueError):
+        return None
+    return meta, tableaux
+
+
+def enregistrer_tableaux(repertoire, cle, tableaux, meta):
+    """Enregistre les tableaux {nom: tableau} et le dico meta sous cle dans
+    repertoire; écrits dans un répertoire temporaire puis renommés, ils ne
+    sont jamais vus incomplets"""
+    chemin = os.path.join(repertoire, cle)
+    os.makedirs(repertoire, exist_ok=True)
+    temporaire = tempfile.mkdtemp(prefix=".tmp-", dir=repertoire)
+    try:
+        for nom, tableau in tableaux.items():
+            if tableau.dtype == numpy.int64 and len(tableau) < 2**31:
+                tableau = tableau.astype(numpy.int32)
+            numpy.save(os.path.join(temporaire, nom + ".npy"), tableau)
+        with open(os.path.join(temporaire, "index.json"), "w", encoding="utf-8") as f:
+            json.dump(dict(meta, format=FORMAT_INDEX), f)
+        os.rename(temporaire, chemin)
+    except OSError:
+        # l'index a pu être enregistré entre-temps par un autre processus
+        if not os.path.isdir(chemin):
+            logging.warning("index %s non enregistré", chemin, exc_info=True)
+        shutil.rmtree(temporaire, ignore_errors=True)
+
+
+class MinimumPlages(object):
+    """Minimum de valeurs[debut:fin] pour des tableaux de plages
+
+    Décomposition en blocs de TAILLE_BLOC valeurs: minimums préfixes et
+    suffixes dans chaque bloc, table creuse (sparse table) des minimums de
+    blocs. Une plage sur plusieurs blocs se calcule alors en O(1), une plage
+    interne à un bloc par un minimum sur au plus TAILLE_BLOC valeurs; toutes
+    les plages d'un appel sont traitées ensemble par numpy."""
+
+    TAILLE_BLOC = 32
+
+    def __init__(self, valeurs):
+        B = self.TAILLE_BLOC
+        n = len(valeurs)
+        nb_blocs = max(-(-n // B), 1)
+        plein = numpy.full(nb_blocs * B, numpy.iinfo(numpy.int64).max, numpy.int64)
+        plein[:n] = valeurs
+        blocs = plein.reshape(nb_blocs, B)
+        self.valeurs = plein
+        self.prefixe = numpy.minimum.accumulate(blocs, axis=1).reshape(-1)
+        self.suffixe = numpy.minimum.accumulate(blocs[:, ::-1], axis=1)[
+            :, ::-1
+        ].reshape(-1)
+        # table[j][b] = minimum des blocs b .. b + 2**j - 1
+        self.table = [blocs.min(axis=1)]
+        while 2 ** len(self.table) <= nb_blocs:
+            precedent = self.table[-1]
+            pas = 2 ** (len(self.table) - 1)
+            self.table.append(numpy.minimum(precedent[:-pas], precedent[pas:]))
+
+    def minimum(self, debuts, fins):
+        """Tableau des minimums de valeurs[debuts[k]:fins[k]], plages non vides"""
+        B = self.TAILLE_BLOC
+        debuts = numpy.asarray(debuts, numpy.int64)
+        dernier = numpy.asarray(fins, numpy.int64) - 1
+        bloc_d = debuts // B
+        bloc_f = dernier // B
+        res = numpy.empty(len(debuts), numpy.int64)
+        # plage interne à un bloc
+        meme = numpy.flatnonzero(bloc_d == bloc_f)
+        if len(meme):
+            indices = debuts[meme, None] + numpy.arange(B)
+            dedans = indices <= dernier[meme, None]
+            valeurs = self.valeurs[numpy.minimum(indices, len(self.valeurs) - 1)]
+            res[meme] = numpy.where(dedans, valeurs, valeurs.max()).min(axis=1)
+        # fin du 1er bloc, début du dernier et blocs complets entre les 2
+        autres = numpy.flatnonzero(bloc_d != bloc_f)
+        if len(autres):
+            d, f = debuts[autres], dernier[autres]
+            mini = numpy.minimum(self.suffixe[d], self.prefixe[f])
+            b1 = bloc_d[autres] + 1
+            b2 = bloc_f[autres]  # blocs complets: b1 .. b2 - 1
+            entre = numpy.flatnonzero(b2 > b1)
+            if len(entre):
+                b1, b2 = b1[entre], b2[entre]
+                j = numpy.log2(b2 - b1).astype(numpy.int64)
+                minis = numpy.empty(len(entre), numpy.int64)
+                for niveau in numpy.unique(j).tolist():
+                    k = numpy.flatnonzero(j == niveau)
+                    table = self.table[niveau]
+                    minis[k] = numpy.minimum(table[b1[k]], table[b2[k] - 2**niveau])
+                mini[entre] = numpy.minimum(mini[entre], minis)
+            res[autres] = mini
+        return res
+
+
+class GeneralisedSuffixArray(suffix_tree.GeneralisedSuffixTree):
+    """Table des suffixes généralisée, même interface que GeneralisedSuffixTree
+
+    Les tableaux (table des suffixes, LCP, codes) sont des tableaux numpy,
+    il n'y a pas d'objet Python par noeud."""
+
+    carac_debut = CARAC_DEBUT
+    # tableaux enregistrés dans le répertoire d'index
+    tableaux = ("codes", "sa", "lcp")
+
+    def __init__(self, sequences, repertoire=None):
+        """repertoire: répertoire des index enregistrés, None pour n'en
+        utiliser aucun"""
+        self.repertoire = repertoire
+        suffix_tree.GeneralisedSuffixTree.__init__(self, sequences)
+
+    def _construire_index(self):
+        if self.repertoire is not None and self._charger_index():
+            logging.log(5, "index %s chargé", self.cle_index())
+            return
+        self._construire_tableaux()
+        if self.repertoire is not None:
+            self._enregistrer_index()
+
+    def cle_index(self):
+        """Clé de l'index: empreinte sha256 du format, de la classe d'index, des
+        séparateurs et des 2 textes indexés. Les textes étant ceux qui sont
+        effectivement indexés, la clé change avec les options de normalisation
+        (casse, diacritiques) appliquées avant la comparaison."""
+        return cle_index(
+            type(self).__name__,
+            getattr(self, "separators", ""),
+            self.sequences[0],
+            self.sequences[1],
+        )
+
+    def _charger_index(self):
+        """Ouvre en mmap les tableaux de l'index enregistré, s'il existe"""
+        index = charger_tableaux(self.repertoire, self.cle_index(), self.tableaux)
+        if index is None:
+            return False
+        meta, tableaux = index
+        for nom, tableau in tableaux.items():
+            setattr(self, nom, tableau)
+        self.longueur_seq1 = meta["longueur_seq1"]
+        return True
+
+    def _enregistrer_index(self):
+        """Enregistre les tableaux de l'index, cf. enregistrer_tableaux"""
+        enregistrer_tableaux(
+            self.repertoire,
+            self.cle_index(),
+            {nom: getattr(self, nom) for nom in self.tableaux},
+            {"longueur_seq1": int(self.longueur_seq1)},
+        )
+
+    def _construire_tableaux(self):
+        self.longueur_seq1 = len(self.sequences[0])
+        self.codes = utile.codes_caracteres(self.concat_string)
+        sa, rangs = table_suffixes(self.codes)
+        self.sa = sa
+        self.lcp = table_lcp(sa, rangs)
+        logging.log(5, "table des suffixes construite (%d)", len(sa))
+
+    def _longueurs_noeuds(self, profondeur, mini):
+        """Longueur de la chaîne de chaque noeud, comparée à min_size"""
+        return profondeur
+
+    def sous_index(self, debut1, fin1, debut2, fin2):
+        """Index de sequences[0][debut1:fin1] et sequences[1][debut2:fin2]
+        extrait de cette table, sans la reconstruire
+
+        Identique à GeneralisedSuffixArray([t1[debut1:fin1], t2[debut2:fin2]]).
+        Les suffixes des 2 plages sont d'abord pris dans l'ordre de la table
+        complète (rangs), le LCP de 2 voisins étant le minimum du LCP entre eux.
+        Dans les sous-textes, un suffixe x est tronqué à r(x) caractères suivis
+        du marqueur de fin, inférieur à tous les caractères: il passe avant tous
+        les suffixes qui commencent par ses r(x) caractères, c'est-à-dire en tête
+        de l'intervalle de ces suffixes. On trie donc sur (début de cet
+        intervalle, r(x), texte); le LCP local est min(LCP, r(x), r(y))."""
+        lg1 = self.longueur_seq1
+        if getattr(self, "rang", None) is None:
+            # rang de chaque suffixe et minimums du LCP, construits une fois
+            self.rang = numpy.empty(len(self.sa), numpy.int64)
+            self.rang[self.sa] = numpy.arange(len(self.sa))
+            self.minimum_lcp = MinimumPlages(self.lcp)
+        n1 = fin1 - debut1
+        n2 = fin2 - debut2
+        # positions dans la table complète, caractères restants avant la fin
+        positions = numpy.concatenate(
+            (
+                numpy.arange(debut1, fin1),
+                numpy.arange(lg1 + 1 + debut2, lg1 + 1 + fin2),
+            )
+        )
+        reste = numpy.concatenate((numpy.arange(n1, 0, -1), numpy.arange(n2, 0, -1)))
+        texte = numpy.repeat([1, 2], [n1, n2])
+        rangs = self.rang[positions]
+        ordre = numpy.argsort(rangs, kind="stable")
+        rangs = rangs[ordre]
+        reste = reste[ordre]
+        m = len(ordre)
+        # voisin[k]: LCP des suffixes k-1 et k dans l'ordre de la table complète
+        voisin = numpy.zeros(m, numpy.int64)
+        if m > 1:
+            voisin[1:] = self.minimum_lcp.minimum(rangs[:-1] + 1, rangs[1:] + 1)
+        minimum_voisin = MinimumPlages(voisin)
+        # début de l'intervalle des suffixes commençant par les reste[k]
+        # premiers caractères du suffixe k: dernier j <= k tel que
+        # voisin[j] < reste[k]. C'est k sauf si le suffixe k-1 commence aussi
+        # par ces caractères, cas rare cherché par dichotomie
+        intervalle = numpy.arange(m)
+        k = numpy.flatnonzero(voisin >= reste)
+        k = k[k > 0]
+        bas = numpy.zeros(len(k), numpy.int64)
+        haut = k - 1
+        while len(k):
+            milieu = (bas + haut) // 2
+            assez = minimum_voisin.minimum(milieu + 1, k + 1) >= reste[k]
+            haut = numpy.where(assez, milieu, haut)
+            bas = numpy.where(assez, bas, milieu + 1)
+            fini = bas >= haut
+            intervalle[k[fini]] = bas[fini]
+            k, bas, haut = k[~fini], bas[~fini], haut[~fini]
+        local = numpy.lexsort((texte[ordre], reste, intervalle))
+        # LCP des voisins dans l'ordre local
+        lcp_local = numpy.zeros(m + 3, numpy.int64)
+        if m > 1:
+            a = numpy.minimum(local[:-1], local[1:])
+            b = numpy.maximum(local[:-1], local[1:])
+            lcp = voisin[b]
+            eloignes = numpy.flatnonzero(b - a > 1)
+            lcp[eloignes] = minimum_voisin.minimum(a[eloignes] + 1, b[eloignes] + 1)
+            lcp_local[3:-1] = numpy.minimum(
+                lcp, numpy.minimum(reste[local[:-1]], reste[local[1:]])
+            )
+        # positions dans t1[debut1:fin1] chr(1) t2[debut2:fin2] chr(2), les
+        # suffixes des 2 marqueurs en tête
+        globales = positions[ordre][local]
+        sa = numpy.where(
+            globales < lg1, globales - debut1, globales - (lg1 + 1 + debut2) + n1 + 1
+        )
+        sa = numpy.concatenate(([n1, n1 + n2 + 1], sa))
+        return _PaireSuffixArray(
+            [
+                self.sequences[0][debut1:fin1],
+                self.sequences[1][debut2:fin2],
+            ],
+            sa,
+            lcp_local,
+        )
+
+    def get_seq_repeat(self, min_size=1):
+        """Equivalent de TrueGeneralisedSuffixTree.get_seq_repeat
+
+        Un noeud retient ses K premières feuilles (fils rangés par plus petite
+        feuille) tant que ce sont des feuilles de caractères gauches distincts;
+        il est retenu si K >= 2, si ces feuilles couvrent les 2 textes et
+        si sa profondeur est >= min_size.
+        A chaque position, le bloc retenu est celui qui finit le plus loin et,
+        à fin égale, celui dont le noeud vient en dernier dans le post-ordre."""
+        n = len(self.sa)
+        seq_repeat_deb = numpy.arange(n)
+        seq_repeat_fin = numpy.arange(n)
+        if n < 2:
+            return seq_repeat_deb, seq_repeat_fin
+        sa, lcp, codes = self.sa, self.lcp, self.codes
+        profondeur, parent, mini, taille, proprio = intervalles_lcp(sa, lcp)
+        nb_noeuds = len(profondeur)
+        # père de chaque feuille: l'intervalle le plus profond qui la contient
+        pere_feuille = numpy.where(lcp[:-1] >= lcp[1:], proprio[:-1], proprio[1:])
+
+        # liste des fils (noeuds internes puis feuilles), rangés par père et mini
+        internes = numpy.arange(1, nb_noeuds)
+        pere = numpy.concatenate((parent[internes], pere_feuille))
+        cle = numpy.concatenate((mini[internes], sa))
+        est_feuille = numpy.concatenate(
+            (numpy.zeros(len(internes), bool), numpy.ones(n, bool))
+        )
+        ident = numpy.concatenate((internes, sa))
+        ordre = numpy.lexsort((cle, pere))
+        pere, cle, est_feuille, ident = (
+            pere[ordre],
+            cle[ordre],
+            est_feuille[ordre],
+            ident[ordre],
+        )
+        nb_fils = len(pere)
+        indices = numpy.arange(nb_fils)
+        debut_groupe = numpy.flatnonzero(
+            numpy.concatenate(([True], pere[1:] != pere[:-1]))
+        )
+        groupe = numpy.cumsum(
+            numpy.concatenate(([0], (pere[1:] != pere[:-1]).astype(numpy.int64)))
+        )
+        rang_fils = indices - debut_groupe[groupe]
+
+        # post-ordre des noeuds internes
+        poids = numpy.where(est_feuille, 0, taille[numpy.where(est_feuille, 0, ident)])
+        cumul = numpy.cumsum(poids)
+        base = cumul[debut_groupe] - poids[debut_groupe]
+        decalage = numpy.zeros(nb_noeuds, numpy.int64)
+        decalage[ident[~est_feuille]] = (cumul - poids - base[groupe])[~est_feuille]
+        post_ordre = rangs_post_ordre(parent, decalage) + taille - 1
+
+        # caractères gauches des feuilles, doublons au sein d'un même père
+        gauche = numpy.where(
+            est_feuille,
+            numpy.where(
+                ident > 0, codes[numpy.maximum(ident - 1, 0)], self.carac_debut
+            ),
+            -1,
+        )
+        ordre_g = numpy.lexsort((cle, gauche, pere))
+        doublon_g = numpy.zeros(nb_fils, bool)
+        doublon_g[1:] = (pere[ordre_g][1:] == pere[ordre_g][:-1]) & (
+            gauche[ordre_g][1:] == gauche[ordre_g][:-1]
+        )
+        doublon = numpy.zeros(nb_fils, bool)
+        doublon[ordre_g] = doublon_g
+        mauvais = ~est_feuille | doublon
+        # K: nombre de premiers fils feuilles de caractères gauches distincts
+        premier_mauvais = numpy.where(mauvais, rang_fils, nb_fils)
+        k_groupe = numpy.minimum.reduceat(premier_mauvais, debut_groupe)
+        taille_groupe = numpy.diff(numpy.append(debut_groupe, nb_fils))
+        k_groupe = numpy.minimum(k_groupe, taille_groupe)
+        retenu = rang_fils < k_groupe[groupe]
+        seq1 = numpy.add.reduceat(
+            (retenu & (ident < self.longueur_seq1)).astype(numpy.int64), debut_groupe
+        )
+        seq2 = numpy.add.reduceat(
+            (retenu & (ident >= self.longueur_seq1)).astype(numpy.int64),
+            debut_groupe,
+        )
+        noeud_groupe = pere[debut_groupe]
+        longueurs_noeuds = self._longueurs_noeuds(profondeur, mini)
+        groupe_valide = (
+            (k_groupe >= 2)
+            & (seq1 > 0)
+            & (seq2 > 0)
+            & (longueurs_noeuds[noeud_groupe] >= min_size)
+        )
+        evenement = retenu & groupe_valide[groupe]
+        positions = ident[evenement]
+        longueurs = profondeur[pere[evenement]]
+        rangs = post_ordre[pere[evenement]]
+        fins = positions + longueurs
+        # application dans l'ordre (fin, post-ordre): le dernier appliqué gagne
+        ordre_ev = numpy.lexsort((rangs, fins))
+        for pi, fin in zip(positions[ordre_ev].tolist(), fins[ordre_ev].tolist()):
+            seq_repeat_deb[pi:fin] = pi
+            seq_repeat_fin[pi:fin] = fin
+        return seq_repeat_deb, seq_repeat_fin
+
+
+def frontieres_mots(codes, separateurs, lg_texte1):
+    """Frontières de mots du texte t1+t2 de points de code codes
+
+    frontiere[i] est vrai si un mot ne peut pas se poursuivre de i-1 à i:
+    début ou fin d'un texte, ou l'un des caractères i-1, i est un séparateur.
+    Le tableau a len(codes)+1 éléments."""
+    n = len(codes)
+    est_sep = numpy.isin(codes, utile.codes_caracteres(separateurs))
+    frontiere = numpy.ones(n + 1, bool)
+    frontiere[1:n] = est_sep[:-1] | est_sep[1:]
+    frontiere[lg_texte1] = True
+    return frontiere
+
+
+class GeneralisedWordSuffixArray(GeneralisedSuffixArray):
+    """Table des suffixes généralisée sur l'alphabet des mots (mode mot)
+
+    Chaque texte est découpé en lexèmes: les suites maximales de caractères
+    hors séparateurs et chaque séparateur pris isolément. Les lexèmes sont
+    numérotés et la table des suffixes est construite sur ces numéros, les
+    répétitions commencent et finissent donc toujours sur une frontière de mot
+    et le rognage caractère par caractère de get_MEM_index_chaine3 devient
+    inutile. Les positions et longueurs renvoyées sont en caractères, comme
+    pour GeneralisedSuffixArray; min_size reste une longueur en caractères."""
+
+    # caractère gauche fictif de la feuille en position 0: aucun lexème n'a le 0
+    carac_debut = 0
+    tableaux = GeneralisedSuffixArray.tableaux + ("frontiere", "debut_car")
+    # les lexèmes d'une plage ne sont pas ceux du texte complet
+    sous_index = None
+
+    def __init__(self, sequences, separators, repertoire=None):
+        self.separators = separators
+        GeneralisedSuffixArray.__init__(self, sequences, repertoire)
+
+    def _construire_tableaux(self):
+        t1, t2 = self.sequences[0], self.sequences[1]
+        texte = t1 + t2
+        fin = len(texte)
+        self.frontiere = frontieres_mots(
+            utile.codes_caracteres(texte), self.separators, len(t1)
+        )
+        debuts = numpy.flatnonzero(self.frontiere)
+        nb1 = int(numpy.searchsorted(debuts, len(t1)))  # nb de lexèmes de t1
+        numeros = {}
+        bornes = debuts.tolist()
+        # 1 et 2: marqueurs de fin de t1 et t2
+        numeros_lex = [
+            numeros.setdefault(texte[a:b], len(numeros) + 3)
+            for a, b in zip(bornes, bornes[1:])
+        ]
+        self.codes = numpy.array(
+            numeros_lex[:nb1] + [1] + numeros_lex[nb1:] + [2], numpy.int64
+        )
+        # debut_car[k]: position dans t1+t2 du lexème k de la séquence t1 S1 t2 S2,
+        # suivie d'une entrée pour la fin de la séquence
+        self.debut_car = numpy.concatenate(
+            (debuts[:nb1], [len(t1)], debuts[nb1:-1], [fin, fin])
+        )
+        self.longueur_seq1 = nb1
+        sa, rangs = table_suffixes(self.codes)
+        self.sa = sa
+        self.lcp = table_lcp(sa, rangs)
+        logging.log(
+            5,
+            "table des suffixes construite (%d lexèmes, %d distincts)",
+            len(sa),
+            len(numeros),
+        )
+
+    def _longueurs_noeuds(self, profondeur, mini):
+        # longueur en caractères: toutes les occurrences d'un noeud sont la
+        # même suite de lexèmes, on la mesure sur la plus petite feuille
+        return self.debut_car[mini + profondeur] - self.debut_car[mini]
+
+    def get_MEM(self, min_size=1):
+        """Comme GeneralisedSuffixTree.get_MEM, les blocs étant retrouvés sur
+        les lexèmes puis ramenés en caractères dans t1+t2"""
+        seq_repeat_deb, seq_repeat_fin = self.get_seq_repeat(min_size)
+        dic_MEM = {}
+        empreintes = self.get_empreintes()
+        debut_car = self.debut_car.tolist()
+        pos = len(seq_repeat_deb) - 1
+        while pos >= 0:
+            debut = seq_repeat_deb[pos]
+            fin = seq_repeat_fin[pos]
+            if fin > debut:
+                pos_debut = debut_car[debut]
+                longueur = debut_car[fin] - pos_debut
+                t = empreintes.cle(pos_debut, pos_debut + longueur)
+                dic_MEM.setdefault(longueur, {}).setdefault(t, []).append(pos_debut)
+            pos = debut - 1
+        return dic_MEM
+
+    def get_MEM_index_chaine3(
+        self, carOuMot, separators, min_size=1, eliminRecouv=True
+    ):
+        """Comme GeneralisedSuffixTree.get_MEM_index_chaine3 sans le rognage:
+        les MEM sont déjà des suites de mots entiers. Seules les césures de
+        l'élimination des recouvrements peuvent tomber au milieu d'un mot, ces
+        blocs sont ramenés aux frontières de mots par les tableaux
+        suivante/precedente, sans parcours caractère par caractère."""
+        blocs = GeneralisedSuffixArray.get_MEM_index_chaine3(
+            self, False, separators, min_size, eliminRecouv
+        )
+        if not carOuMot:
+            return blocs
+        empreintes = self.get_empreintes()
+        frontiere = self.frontiere
+        indices = numpy.arange(len(frontiere))
+        # plus proche frontière à droite (suivante) et à gauche (precedente)
+        suivante = numpy.minimum.accumulate(
+            numpy.where(frontiere, indices, len(frontiere))[::-1]
+        )[::-1].tolist()
+        precedente = numpy.maximum.accumulate(
+            numpy.where(frontiere, indices, 0)
+        ).tolist()
+        frontiere = frontiere.tolist()
+        dic_chaine2 = {}
+        for (cle, longueur), liste_pos in blocs.items():
+            debut_ok = all(frontiere[p] for p in liste_pos)
+            fin_ok = all(frontiere[p + longueur] for p in liste_pos)
+            if debut_ok and fin_ok:
+                dic_chaine2[(cle, longueur)] = liste_pos
+                continue
+            p0 = liste_pos[0]
+            debut = p0 if debut_ok else suivante[p0 + 1]
+            fin = p0 + longueur if fin_ok else precedente[p0 + longueur - 1]
+            if fin - debut >= max(min_size, 1):
+                cle2 = empreintes.cle(debut, fin)
+                dic_chaine2[(cle2, fin - debut)] = [x + debut - p0 for x in liste_pos]
+        return dic_chaine2
+
+
+class MultiGeneralisedSuffixArray(object):
+    """Table des suffixes commune à plusieurs témoins d'un même texte
+
+    La table est construite une seule fois sur t0 S0 t1 S1 ... où les
+    marqueurs Si sont des codes négatifs croissants, inférieurs à tous les
+    caractères. paire(i, j) en extrait l'index des 2 témoins i et j: les
+    suffixes des autres témoins sont retirés de la table et le LCP de 2
+    suffixes devenus voisins est le minimum du LCP entre eux. Les marqueurs étant
+    uniques, le LCP ne les franchit jamais et cet index est identique à
+    GeneralisedSuffixArray([textes[i], textes[j]])."""
+
+    def __init__(self, textes):
+        self.textes = list(textes)
+        morceaux = []
+        for k, texte in enumerate(self.textes):
+            morceaux.append(utile.codes_caracteres(texte))
+            morceaux.append(numpy.array([k - len(self.textes)], numpy.int64))
+        self.codes = numpy.concatenate(morceaux + [numpy.zeros(0, numpy.int64)])
+        longueurs = [len(texte) + 1 for texte in self.textes]
+        self.debuts = numpy.concatenate(([0], numpy.cumsum(longueurs))).astype(
+            numpy.int64
+        )
+        # numéro du témoin de chaque position (marqueur compris)
+        self.temoin = numpy.repeat(numpy.arange(len(self.textes)), longueurs)
+        sa, rangs = table_suffixes(self.codes)
+        self.sa = sa
+        self.lcp = table_lcp(sa, rangs)
+        logging.log(
+            5,
+            "table des suffixes de %d témoins construite (%d)",
+            len(self.textes),
+            len(sa),
+        )
+
+    def paire(self, i, j):
+        """Index des témoins i et j (i != j), t_i étant le premier texte"""
+        assert i != j
+        lg1 = len(self.textes[i])
+        garde = numpy.flatnonzero(
+            (self.temoin[self.sa] == i) | (self.temoin[self.sa] == j)
+        )
+        positions = self.sa[garde]
+        # positions dans t_i S1 t_j S2
+        sa = numpy.where(
+            self.temoin[positions] == i,
+            positions - self.debuts[i],
+            positions - self.debuts[j] + lg1 + 1,
+        )
+        lcp = numpy.zeros(len(sa) + 1, numpy.int64)
+        if len(sa) > 1:
+            lcp[1:-1] = numpy.minimum.reduceat(self.lcp, garde + 1)[:-1]
+        if i > j:
+            # les marqueurs de la table commune sont dans l'ordre inverse de
+            # S1 < S2: u S1 doit précéder u S2 quand t_i et t_j finissent par u
+            reste = numpy.where(sa <= lg1, lg1 - sa, len(sa) - 1 - sa)
+            inverse = numpy.flatnonzero(
+                (lcp[1:-1] == reste[:-1])
+                & (reste[:-1] == reste[1:])
+                & (sa[:-1] > lg1)
+                & (sa[1:] <= lg1)
+            )
+            sa[inverse], sa[inverse + 1] = sa[inverse + 1], sa[inverse].copy()
+        return _PaireSuffixArray([self.textes[i], self.textes[j]], sa, lcp)
+
+
+class IndexTexte(object):
+    """Table des suffixes et table LCP d'un seul texte (une édition)
+
+    Une édition comparée à plusieurs témoins n'est indexée qu'une fois: son
+    index est enregistré dans le répertoire d'index, sous une clé calculée à
+    partir du texte, des séparateurs et des options de normalisation, avec le
+    texte normalisé (codes) et le masque de ses séparateurs. paire() en déduit
+    l'index généralisé de 2 éditions par fusion des 2 tables, sans le
+    reconstruire."""
+
+    tableaux = ("codes", "sa", "lcp", "separateurs")
+
+    def __init__(self, texte, separators, repertoire=None, options=""):
+        """texte: texte normalisé de l'édition; options: normalisation
+        appliquée au texte (casse, diacritiques), prise dans la clé"""
+        self.texte = texte
+        self.separators = separators
+        self.options = options
+        self.repertoire = repertoire
+        self.empreintes = None
+        if repertoire is not None:
+            index = charger_tableaux(repertoire, self.cle_index(), self.tableaux)
+            if index is not None:
+                for nom, tableau in index[1].items():
+                    setattr(self, nom, tableau)
+                logging.log(5, "index %s chargé", self.cle_index())
+                return
+        self.codes = utile.codes_caracteres(texte)
+        self.sa, rangs = table_suffixes(self.codes)
+        self.lcp = table_lcp(self.sa, rangs)
+        self.separateurs = numpy.isin(self.codes, utile.codes_caracteres(separators))
+        if repertoire is not None:
+            enregistrer_tableaux(
+                repertoire,
+                self.cle_index(),
+                {nom: getattr(self, nom) for nom in self.tableaux},
+                {},
+            )
+
+    def cle_index(self):
+        """Clé de l'index: empreinte sha256 du format, des options de
+        normalisation, des séparateurs et du texte"""
+        return cle_index(type(self).__name__, self.options, self.separators, self.texte)
+
+    def get_empreintes(self):
+        if self.empreintes is None:
+            self.empreintes = empreinte.Empreintes(self.texte)
+        return self.empreintes
+
+    def _lcp_croise(self, autre, i, j, h, fin):
+        """Longueur du plus long préfixe commun des suffixes i de self et j de
+        autre, sachant que leurs h premiers caractères sont égaux et que le
+        préfixe commun fait au plus fin caractères (tableaux)
+
+        Le caractère suivant puis les LONGUEUR_DIRECTE suivants sont comparés
+        directement; s'ils sont tous égaux, la longueur est cherchée par
+        dichotomie sur les empreintes des préfixes."""
+        codes1, codes2 = self.codes, autre.codes
+        h = h.copy()
+        # la plupart des comparaisons s'arrêtent au 1er caractère
+        k = numpy.flatnonzero(h < fin)
+        k = k[codes1[i[k] + h[k]] == codes2[j[k] + h[k]]]
+        h[k] += 1
+        k = k[h[k] < fin[k]]
+        if len(k) == 0:
+            return h
+        decalages = numpy.arange(LONGUEUR_DIRECTE)
+        pos = h[k, None] + decalages
+        dedans = pos < fin[k, None]
+        c1 = codes1[numpy.minimum(i[k, None] + pos, len(codes1) - 1)]
+        c2 = codes2[numpy.minimum(j[k, None] + pos, len(codes2) - 1)]
+        arret = ~dedans | (c1 != c2)
+        trouve = arret.any(axis=1)
+        h[k] += numpy.where(trouve, arret.argmax(axis=1), LONGUEUR_DIRECTE)
+        k = k[~trouve]
+        if len(k) == 0:
+            return h
+        empreintes1 = self.get_empreintes()
+        empreintes2 = autre.get_empreintes()
+        i, j, bas, haut = i[k], j[k], h[k], fin[k]
+
+        def egaux(encore, longueurs):
+            a, b = i[encore], j[encore]
+            return empreintes1.cles(a, a + longueurs) == empreintes2.cles(
+                b, b + longueurs
+            )
+
+        # pas doublé tant que les préfixes sont égaux, puis dichotomie
+        pas = numpy.full(len(k), 2 * LONGUEUR_DIRECTE, numpy.int64)
+        encore = numpy.flatnonzero(bas < haut)
+        while len(encore):
+            essai = numpy.minimum(bas[encore] + pas[encore], haut[encore])
+            egal = egaux(encore, essai)
+            bas[encore] = numpy.where(egal, essai, bas[encore])
+            haut[encore] = numpy.where(egal, haut[encore], essai - 1)
+            pas[encore] *= 2
+            encore = encore[egal & (bas[encore] < haut[encore])]
+        encore = numpy.flatnonzero(bas < haut)
+        while len(encore):
+            milieu = (bas[encore] + haut[encore] + 1) // 2
+            egal = egaux(encore, milieu)
+            bas[encore] = numpy.where(egal, milieu, bas[encore])
+            haut[encore] = numpy.where(egal, haut[encore], milieu - 1)
+            encore = encore[bas[encore] < haut[encore]]
+        h[k] = bas
+        return h
+
+    def _comparer(self, autre, i, j, h):
+        """Préfixe commun des suffixes i de self et j de autre (cf. _lcp_croise)
+        et vrai si celui de self précède celui de autre dans t1 S1 t2 S2"""
+        n1, n2 = len(self.codes), len(autre.codes)
+        h = self._lcp_croise(autre, i, j, h, numpy.minimum(n1 - i, n2 - j))
+        # caractères suivant le préfixe commun, marqueur de fin compris
+        c1 = numpy.where(h < n1 - i, self.codes[numpy.minimum(i + h, n1 - 1)], 1)
+        c2 = numpy.where(h < n2 - j, autre.codes[numpy.minimum(j + h, n2 - 1)], 2)
+        return h, c1 < c2
+
+    def _prefixes(self, rangs, marqueur, longueur, bits):
+        """Clé de chaque suffixe d'après ses longueur premiers caractères, le
+        marqueur de fin compris, dans l'ordre de la table: croissante avec le
+        suffixe. rangs: rang de chaque caractère dans l'alphabet des 2 textes,
+        codé sur bits bits, 0 à 2 pour le bourrage et les marqueurs"""
+        codes = numpy.concatenate((rangs, [marqueur], numpy.zeros(longueur, int)))
+        debuts = numpy.asarray(self.sa, numpy.int64)
+        cles = numpy.zeros(len(debuts), numpy.int64)
+        for d in range(longueur):
+            cles = (cles << bits) | codes[debuts + d]
+        return cles
+
+    def paire(self, autre):
+        """Index généralisé de self (1er texte) et autre, identique à
+        GeneralisedSuffixArray([self.texte, autre.texte])
+
+        Les suffixes de autre sont placés parmi ceux de self par dichotomie,
+        tous ensemble: la comparaison reprend au préfixe commun déjà connu
+        avec les 2 bornes (Manber et Myers). Dans la table fusionnée, le LCP
+        de 2 voisins d'un même texte est celui de sa table, celui de 2 voisins
+        de textes différents est le préfixe commun avec une borne. Les
+        marqueurs de fin S1 < S2 devant être inférieurs aux caractères, les
+        textes contenant un caractère de code < 3 sont indexés directement."""
+        codes1, codes2 = self.codes, autre.codes
+        n1, n2 = len(codes1), len(codes2)
+        if (n1 and codes1.min() < 3) or (n2 and codes2.min() < 3):
+            return GeneralisedSuffixArray([self.texte, autre.texte])
+        sa1 = numpy.asarray(self.sa, numpy.int64)
+        sa2 = numpy.asarray(autre.sa, numpy.int64)
+        # [bas, haut): rangs de self où placer chaque suffixe de autre, d'abord
+        # parmi les suffixes de mêmes premiers caractères, autant qu'en tient
+        # une clé de 63 bits sur l'alphabet des 2 textes;
+        # lcp_bas, lcp_haut: préfixe commun avec sa1[bas-1] et sa1[haut],
+        # -1 tant qu'il n'est pas connu
+        alphabet, rangs = numpy.unique(
+            numpy.concatenate((codes1, codes2)), return_inverse=True
+        )
+        rangs = rangs.reshape(-1).astype(numpy.int64) + 3
+        bits = int(len(alphabet) + 2).bit_length()
+        longueur = max(63 // bits, 1)
+        prefixes1 = self._prefixes(rangs[:n1], 1, longueur, bits)
+        prefixes2 = autre._prefixes(rangs[n1:], 2, longueur, bits)
+        bas = numpy.searchsorted(prefixes1, prefixes2, "left")
+        haut = numpy.searchsorted(prefixes1, prefixes2, "right")
+        lcp_bas = numpy.full(n2, -1, numpy.int64)
+        lcp_haut = numpy.full(n2, -1, numpy.int64)
+        k = numpy.flatnonzero(bas < haut)
+        while len(k):
+            milieu = (bas[k] + haut[k]) // 2
+            # entre les bornes, les suffixes de self commencent par les
+            # longueur caractères de la clé
+            h, avant = self._comparer(
+                autre,
+                sa1[milieu],
+                sa2[k],
+                numpy.maximum(numpy.minimum(lcp_bas[k], lcp_haut[k]), longueur),
+            )
+            # avant: le suffixe de self précède celui de autre
+            bas[k] = numpy.where(avant, milieu + 1, bas[k])
+            lcp_bas[k] = numpy.where(avant, h, lcp_bas[k])
+            haut[k] = numpy.where(avant, haut[k], milieu)
+            lcp_haut[k] = numpy.where(avant, lcp_haut[k], h)
+            k = k[bas[k] < haut[k]]
+        # rang dans la table fusionnée des suffixes de self et de autre
+        rang2 = bas + numpy.arange(n2)
+        rang1 = numpy.arange(n1) + numpy.searchsorted(bas, numpy.arange(n1), "right")
+        n = n1 + n2
+        sa = numpy.empty(n, numpy.int64)
+        sa[rang1] = sa1
+        sa[rang2] = sa2 + n1 + 1
+        lcp_fusion = numpy.zeros(n, numpy.int64)
+        lcp1 = numpy.asarray(self.lcp, numpy.int64)
+        lcp2 = numpy.asarray(autre.lcp, numpy.int64)
+        # suffixe de autre: précédé par le précédent de autre ou par sa1[bas-1]
+        meme = numpy.zeros(n2, bool)
+        meme[1:] = bas[1:] == bas[:-1]
+        k = numpy.flatnonzero(~meme & (bas > 0) & (lcp_bas < 0))
+        lcp_bas[k] = self._comparer(
+            autre, sa1[bas[k] - 1], sa2[k], numpy.zeros_like(k)
+        )[0]
+        lcp_fusion[rang2] = numpy.where(meme, lcp2[:n2], numpy.maximum(lcp_bas, 0))
+        # suffixe de self: précédé par le dernier suffixe de autre placé avant
+        # lui, s'il y en a un, ou par le précédent de self
+        lcp_fusion[rang1] = lcp1[:n1]
+        places = numpy.flatnonzero(bas < n1)
+        if len(places):
+            derniers = places[numpy.append(bas[places][1:] != bas[places][:-1], True)]
+            k = derniers[lcp_haut[derniers] < 0]
+            lcp_haut[k] = self._comparer(
+                autre, sa1[bas[k]], sa2[k], numpy.zeros_like(k)
+            )[0]
+            lcp_fusion[rang1[bas[derniers]]] = lcp_haut[derniers]
+        # les suffixes des 2 marqueurs en tête, cf. sous_index
+        lcp = numpy.zeros(n + 3, numpy.int64)
+        lcp[3:-1] = lcp_fusion[1:]
+        sa = numpy.concatenate(([n1, n1 + n2 + 1], sa))
+        index = _PaireSuffixArray(
+            [self.texte, autre.texte],
+            sa,
+            lcp,
+            numpy.concatenate((codes1, [1], codes2, [2])),
+        )
+        if self.separators == autre.separators:
+            index.separateurs = (
+                self.separators,
+                separateurs.IndexSeparateurs.depuis_masque(
+                    numpy.concatenate((self.separateurs, autre.separateurs))
+                ),
+            )
+        return index
+
+
+class _PaireSuffixArray(GeneralisedSuffixArray):
+    """GeneralisedSuffixArray dont les tables viennent d'un autre index,
+    MultiGeneralisedSuffixArray.paire, GeneralisedSuffixArray.sous_index ou
+    IndexTexte.paire"""
+
+    def __init__(self, sequences, sa, lcp, codes=None):
+        self._tables = sa, lcp, codes
+        GeneralisedSuffixArray.__init__(self, sequences)
+
+    def _construire_tableaux(self):
+        self.longueur_seq1 = len(self.sequences[0])
+        self.sa, self.lcp, self.codes = self._tables
+        if self.codes is None:
+            self.codes = utile.codes_caracteres(self.concat_string)
+        del self._tables
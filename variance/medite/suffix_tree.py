@@ -26,14 +26,25 @@ import bisect
 import time
 import os
 import os.path
+from collections import namedtuple
 import numpy as Numeric
 
 # import psyco
 
 from . import recouvrement
+from . import empreinte
+from . import separateurs
 import _suffix_tree
 
 
+# topologie de l'arbre exportée en bloc par le C, un tableau int32 par champ,
+# les noeuds étant numérotés en pré-ordre (racine = 0, -1 si absent)
+Topology = namedtuple(
+    "Topology",
+    "parent first_child next_sibling start end depth index post_order",
+)
+
+
 def children(node):
     child = node.firstChild
     while child:
@@ -89,6 +100,19 @@ class SuffixTree(SuffixTreeInterface, _suffix_tree.SuffixTree):
         # print "SuffixTree.__init__ type(s) ",type(s) ," len ",len(s)
         _suffix_tree.SuffixTree.__init__(self, s, "#")
 
+    def get_topology(self):
+        """Return the whole tree as a Topology of numpy int32 arrays.
+
+        The arrays are filled by a single C traversal and share memory with
+        the buffers it allocates, so no node wrapper is ever created."""
+        arrays = _suffix_tree.SuffixTree.topology(self)
+        return Topology(
+            **{
+                name: Numeric.frombuffer(arrays[name], dtype=Numeric.intc)
+                for name in Topology._fields
+            }
+        )
+
 
 class TrueGeneralisedSuffixTree(SuffixTree):
     """A suffix tree for a set of strings."""
@@ -112,137 +136,78 @@ class TrueGeneralisedSuffixTree(SuffixTree):
         # print self.start_positions
         # print "GeneralisedSuffixTree.__init__ type(self.concat_string) ",type(self.concat_string) ," len ",len(self.concat_string)
         SuffixTree.__init__(self, self.concat_string)
-        self._annotate_nodes()
+        self.leaf_positions = None
 
     def _translate_index(self, idx):
         "Translate a concat-string index into a (string_no,idx) pair."
-        for i in range(len(self.start_positions) - 1):
-            if self.start_positions[i] <= idx < self.start_positions[i + 1]:
-                return (i, idx - self.start_positions[i])
-        raise IndexError("Index out of range: " + str(idx))
+        i = bisect.bisect_right(self.start_positions, idx) - 1
+        if not 0 <= i < len(self.start_positions) - 1:
+            raise IndexError("Index out of range: " + str(idx))
+        return (i, idx - self.start_positions[i])
+
+    def _translate_indices(self, indices):
+        "Vectorised _translate_index: (string_no array, idx array)."
+        start_positions = Numeric.asarray(self.start_positions)
+        seqs = Numeric.searchsorted(start_positions, indices, side="right") - 1
+        if len(seqs) and (seqs.min() < 0 or seqs.max() >= len(start_positions) - 1):
+            raise IndexError("Index out of range")
+        return seqs, indices - start_positions[seqs]
 
     def _annotate_nodes(self):
-        for n in self.post_order_nodes:
-            if n.isLeaf:
-                seq, idx = self._translate_index(n.index)
-                n.path_indices = [(seq, idx)]
-                n.sequences = [seq]
-                n.nb_occ = len(n.path_indices)
-            else:
-                path_indices = []
-                sequences = []
-                for c in children(n):
-                    path_indices += c.path_indices
-                    sequences += c.sequences
-
-                seqs_in_subtree = {}
-                for s in sequences:
-                    seqs_in_subtree[s] = 1
-
-                n.path_indices = path_indices
-                n.sequences = [s for s in seqs_in_subtree]
-                n.nb_occ = len(n.path_indices)
+        """Numérote les feuilles dans l'ordre du parcours de l'arbre: les
+        feuilles du sous-arbre du noeud i (numéro en pré-ordre de
+        get_topology) sont leaf_positions[leaf_first[i]:leaf_last[i]].
+        Calculé au premier besoin, aucun objet Node n'est créé."""
+        topology = self.get_topology()
+        is_leaf = topology.first_child < 0
+        # feuilles qui précèdent le noeud en pré-ordre
+        self.leaf_first = Numeric.cumsum(is_leaf) - is_leaf
+        # feuilles qui précèdent le noeud en post-ordre, lui compris
+        leaf_by_post_order = Numeric.zeros(len(is_leaf), int)
+        leaf_by_post_order[topology.post_order] = is_leaf
+        self.leaf_last = Numeric.cumsum(leaf_by_post_order)[topology.post_order]
+        self.leaf_positions = topology.index[is_leaf].astype(int)
+        self.leaf_sequences, self.leaf_offsets = self._translate_indices(
+            self.leaf_positions
+        )
+
+    def _leaves(self, i):
+        if self.leaf_positions is None:
+            self._annotate_nodes()
+        return slice(self.leaf_first[i], self.leaf_last[i])
+
+    def path_indices(self, i):
+        "(string_no, idx) of every leaf under the node numbered i in pre-order."
+        leaves = self._leaves(i)
+        return list(
+            zip(
+                self.leaf_sequences[leaves].tolist(),
+                self.leaf_offsets[leaves].tolist(),
+            )
+        )
+
+    def node_sequences(self, i):
+        "Strings having a leaf under the node numbered i in pre-order."
+        return list(dict.fromkeys(self.leaf_sequences[self._leaves(i)].tolist()))
+
+    def nb_occ(self, i):
+        "Number of leaves under the node numbered i in pre-order."
+        leaves = self._leaves(i)
+        return leaves.stop - leaves.start
 
     def get_seq_repeat(self, min_size=1):
-        # � chaque position de seq_repeat doit correspondre la position
-        # de la fin de la r�p�tition la plus longue commen�ant � cette position
-        # print self.root.__str__(self.concat_string, short=True)
+        # à chaque position de seq_repeat doit correspondre la position
+        # de la fin de la répétition la plus longue commençant à cette position.
+        # Les noeuds internes sont parcourus en post-ordre par le C; un noeud
+        # retient ses premiers fils tant que ce sont des feuilles de caractères
+        # gauches distincts, s'ils sont au moins 2 et couvrent les 2 séquences
         longueur_seq1 = len(self.sequences[0])
-        seq_repeat_deb = Numeric.zeros(len(self.concat_string), int)
-        seq_repeat_fin = Numeric.zeros(len(self.concat_string), int)
-        for i in range(len(self.concat_string)):
-            seq_repeat_deb[i] = i
-            seq_repeat_fin[i] = i
-        i = nbpitot = 0
-        # import ipdb;ipdb.set_trace()
-        for n in self.generate_inner_nodes():  # generate_MEM():
-            i += 1
-            # print i,n.__str__(self.concat_string)
-            # if n.path_position<longueur_seq1 and n.edge_label_end>longueur_seq1:
-            #    n.edge_label_end= longueur_seq1
-            # assert (0<=n.path_position<=n.edge_label_begin<=n.edge_label_end<=longueur_seq1 or
-            #        longueur_seq1<=n.path_position<=n.edge_label_begin<=n.edge_label_end<=len(self.sequences[0])+len(self.sequences[1]))
-            longueur_chaine = (n.end + 1) - n.index
-            n.path_indices = []
-            all_children_leaf = True
-            for c in children(n):
-                if c.isLeaf:
-                    n.path_indices.append(c.index)
-                # elif len(c.path_indices) == 1: n.path_indices.extend(c.path_indices)
-                else:
-                    n.path_indices.extend(c.path_indices)
-                    all_children_leaf = False
-                listePos = [i - 1 for i in n.path_indices]
-                listeCarac = []
-                for i in listePos:
-                    assert -1 <= i < len(self.concat_string), (
-                        i,
-                        len(self.concat_string),
-                    )
-                    if i == -1:
-                        x = chr(4)
-                    else:
-                        x = self.concat_string[i]
-                    listeCarac.append(x)
-                # for idx,pos in listePos:
-                #    if idx == 0: listeCarac.append(self.sequences[0][pos])
-                #    else:  listeCarac.append(self.sequences[1][pos])
-                setCarac = set(listeCarac)
-                if (
-                    longueur_chaine >= min_size
-                    and len(n.path_indices) > 1
-                    and all_children_leaf
-                    and len(setCarac) == len(listeCarac)
-                ):
-                    # print n.path_indices
-                    seq1 = seq2 = False
-                    for pos in n.path_indices:
-                        # print self.concat_string[pos:pos+longueur_chaine]
-                        if pos < longueur_seq1:
-                            seq1 = True
-                        else:
-                            seq2 = True
-                    if seq1 and seq2:
-                        for pi in n.path_indices:
-                            # try:
-                            #    if seq_repeat[pi][1] < pi+longueur_chaine:
-                            #        seq_repeat[pi] = (pi,pi+longueur_chaine)
-                            # except KeyError:
-                            #    seq_repeat[pi] = (pi,pi+longueur_chaine)
-                            for pos in range(pi, pi + longueur_chaine):
-                                # for pos in xrange(pi+longueur_chaine,pi,-1):
-                                # if (seq_repeat[pos][1] < pi+longueur_chaine or
-                                #    pi < seq_repeat[pos][0]  and seq_repeat[pos][1] == pi+longueur_chaine):
-                                #    seq_repeat[pos] = (pi,pi+longueur_chaine)
-                                # si bloc d�crit � la pos sourante est inclus dans le bloc qu'on ajoute
-                                if (
-                                    pi
-                                    <= seq_repeat_deb[pos]
-                                    <= seq_repeat_fin[pos]
-                                    <= pi + longueur_chaine
-                                    or seq_repeat_deb[pos]
-                                    <= pi
-                                    <= seq_repeat_fin[pos]
-                                    <= pi + longueur_chaine
-                                ):
-                                    seq_repeat_deb[pos] = pi
-                                    seq_repeat_fin[pos] = pi + longueur_chaine
-                            # for pos in xrange(pi+longueur_chaine-1,pi-1,-1):
-                            #    if (pi <= seq_repeat[pos][0] <= seq_repeat[pos][1] <= pi+longueur_chaine or
-                            # pi <= seq_repeat[pos][0] <= pi+longueur_chaine <= seq_repeat[pos][1]):
-                            #        seq_repeat[pos][0] <= pi <= seq_repeat[pos][1] < pi+longueur_chaine):
-                            #        seq_repeat[pos] = (pi,pi+longueur_chaine)
-
-                            # print seq_repeat
-                            # if seq_repeat[pi][1] < pi+longueur_chaine:
-                            #    seq_repeat[pi] = (pi,pi+longueur_chaine)
-                            # nbpitot+=1
-                            # seq_repeat[pi] = pi+longueur_chaine
-                    # else: print n.path_indices
-        # print seq_repeat
-        # for a,b in zip(seq_repeat_deb,seq_repeat_fin):
-        #     logging.debug('%s,%s' %(a,b))
-        return seq_repeat_deb, seq_repeat_fin
+        seq_repeat_deb, seq_repeat_fin = _suffix_tree.SuffixTree.seq_repeat(
+            self, longueur_seq1, min_size
+        )
+        seq_repeat_deb = Numeric.frombuffer(seq_repeat_deb, dtype=Numeric.intc)
+        seq_repeat_fin = Numeric.frombuffer(seq_repeat_fin, dtype=Numeric.intc)
+        return seq_repeat_deb.astype(int), seq_repeat_fin.astype(int)
 
 
 class GeneralisedSuffixTree(object):
@@ -264,8 +229,96 @@ class GeneralisedSuffixTree(object):
 
         self.start_positions += [self.start_positions[-1] + 1]  # empty string
         self.sequences += [""]
+        # empreintes des sous-chaînes des 2 textes, cf. get_empreintes
+        self.empreintes = None
+        # (separators, index des séparateurs), cf. get_separateurs
+        self.separateurs = None
+
+        self._construire_index()
+
+    def get_empreintes(self):
+        """Empreintes (clés des sous-chaînes) de sequences[0] + sequences[1],
+        construites au premier appel si elles n'ont pas été fournies"""
+        if self.empreintes is None:
+            self.empreintes = empreinte.Empreintes(
+                self.sequences[0] + self.sequences[1]
+            )
+        return self.empreintes
+
+    def get_separateurs(self, separators):
+        """Index des séparateurs de sequences[0] + sequences[1], construit une
+        seule fois par jeu de séparateurs"""
+        if self.separateurs is None or self.separateurs[0] != separators:
+            self.separateurs = (
+                separators,
+                separateurs.IndexSeparateurs(
+                    self.sequences[0] + self.sequences[1], separators
+                ),
+            )
+        return self.separateurs[1]
 
-        self.st = TrueGeneralisedSuffixTree(sequences)
+    def _rogner_mots(self, candidats, index_sep, min_size):
+        """Rogne les homologies candidats [(cle, longueur, liste_pos)] pour n'avoir
+        que des mots entiers, toutes à la fois avec numpy.
+
+        Comme le rognage caractère par caractère d'origine, on ne regarde que la
+        première occurrence (texte 1) et la dernière (texte 2): si l'une d'elles ne
+        commence pas sur une frontière de mot, on avance jusqu'au premier
+        séparateur commun, si l'une ne finit pas sur une frontière, on recule
+        jusqu'au dernier. Renvoie le dico {(cle, longueur): liste_pos} rogné."""
+        longueur_s1 = len(self.sequences[0])
+        masque = index_sep.masque
+        # gauche[p]: début de séquence ou caractère p-1 séparateur
+        gauche = Numeric.concatenate(([True], masque))
+        gauche[longueur_s1] = True
+        # droite[p]: fin de séquence ou caractère p séparateur
+        droite = Numeric.concatenate((masque, [True]))
+        droite[longueur_s1] = True
+        longueurs = Numeric.array([c[1] for c in candidats], Numeric.int64)
+        p1 = Numeric.array([c[2][0] for c in candidats], Numeric.int64)
+        p2 = Numeric.array([c[2][-1] for c in candidats], Numeric.int64)
+        # recherche du premier séparateur dans la chaine
+        avance = Numeric.minimum(index_sep.suivant[p1] - p1, index_sep.suivant[p2] - p2)
+        avance = Numeric.minimum(avance, longueurs)
+        avance[gauche[p1] & gauche[p2]] = 0
+        # recherche du séparateur le + à droite dans la chaine
+        f1 = p1 + longueurs - 1
+        f2 = p2 + longueurs - 1
+        recul = Numeric.minimum(
+            f1 - index_sep.precedent[f1], f2 - index_sep.precedent[f2]
+        )
+        recul = Numeric.minimum(recul, longueurs)
+        recul[droite[f1 + 1] & droite[f2 + 1]] = 0
+        debuts = p1 + avance
+        fins = f1 - recul + 1
+        longueurs2 = fins - debuts
+        # la nouvelle chaine ne doit pas être vide (i < j) ni trop courte
+        garde = Numeric.flatnonzero((longueurs2 > 1) & (longueurs2 >= min_size))
+        cles = self.get_empreintes().cles(debuts[garde], fins[garde])
+        dic_chaine2 = {}
+        for k, cle2, longueur2, decalage_avant in zip(
+            garde.tolist(),
+            cles.tolist(),
+            longueurs2[garde].tolist(),
+            avance[garde].tolist(),
+        ):
+            liste_pos = candidats[k][2]
+            dic_chaine2[(cle2, longueur2)] = [x + decalage_avant for x in liste_pos]
+        return dic_chaine2
+
+    def _construire_index(self):
+        """Construit la structure sur laquelle get_seq_repeat travaille"""
+        self.st = TrueGeneralisedSuffixTree(self.sequences)
+
+    def get_seq_repeat(self, min_size=1):
+        """Renvoie les 2 tableaux seq_repeat_deb et seq_repeat_fin donnant pour
+        chaque position de la chaine concaténée le bloc répété qui la couvre"""
+        seq_repeat_deb, seq_repeat_fin = self.st.get_seq_repeat(min_size)
+        # libère l'arbre C et les objets Node sans attendre le ramasse-miettes
+        self.st.close()
+        del self.st  # permet d'�conomiser beaucoup de m�moire
+        logging.debug("suffixTree deleted")
+        return seq_repeat_deb, seq_repeat_fin
 
     def get_MEM(self, min_size=1):
         """Renvoie un dico de tous les Maximal Exact Matches de taille min min_size
@@ -273,12 +326,10 @@ class GeneralisedSuffixTree(object):
         Le dico est index� par la taille de MEM qui renvoie une liste de toutes
         les positions de cette taille.
         Lin�aire(nb de MEM) < lin�aire(taille de la s�quence)"""
-        seq_repeat_deb, seq_repeat_fin = self.st.get_seq_repeat(min_size)
-        del self.st  # permet d'�conomiser beaucoup de m�moire
-        logging.debug("suffixTree deleted")
+        seq_repeat_deb, seq_repeat_fin = self.get_seq_repeat(min_size)
         dic_MEM = {}
         longueur_s1 = len(self.sequences[0])
-        texte = self.sequences[0] + self.sequences[1]
+        empreintes = self.get_empreintes()
         pos = len(seq_repeat_deb) - 1
         # if self.sequences[0] == u': Enfin pourtant la Reyne':
         #    import ipdb;ipdb.set_trace()
@@ -292,7 +343,7 @@ class GeneralisedSuffixTree(object):
                     pos_debut = debut - 1
                 else:
                     pos_debut = debut
-                t = hash(texte[pos_debut : pos_debut + longueur])
+                t = empreintes.cle(pos_debut, pos_debut + longueur)
                 # logging.debug(longueur)
                 # logging.debug(texte[pos_debut:pos_debut+longueur])
 
@@ -324,7 +375,7 @@ class GeneralisedSuffixTree(object):
         just_keep_words = carOuMot
         """ just_keep_words: si Vrai, on rogne les homologies de fa�on � n'avoir que des mots 
         (ou suites de mots) entiers 
-        renvoie un dico index� par (cle,longueur) ou cle repr�sente hash(chaine) la chaine 
+        renvoie un dico index� par (cle,longueur) ou cle repr�sente l'empreinte de la chaine 
         dont on fait r�f�rence et la longueur de la chaine, la valeur et la liste d'occurences
         de la chaine"""
         seq = self.get_MEM_index_chaine2(min_size)
@@ -345,6 +396,7 @@ class GeneralisedSuffixTree(object):
                 seq,
                 len(self.sequences[0]),
                 min_size,
+                empreintes=self.get_empreintes(),
             )
             blocs = recouv.eliminer_recouvrements()
 
@@ -360,7 +412,7 @@ class GeneralisedSuffixTree(object):
             for longueur, dicoOcc in list(seq.items()):
                 for cle_hash, lOcc in list(dicoOcc.items()):
                     for occ in lOcc:
-                        cle = hash(texte[occ : occ + longueur])
+                        cle = self.get_empreintes().cle(occ, occ + longueur)
                         try:
                             blocs[(cle, longueur)].append(occ)
                         except KeyError:
@@ -381,98 +433,21 @@ class GeneralisedSuffixTree(object):
         # if len(self.sequences[1])==20951:
         #    assert len([k for k in self.sequences[1] if k in sep]) == 4725
         # on ne garde que les chaine de taille > min et r�p�t�es
-        logging.info("# separator in text: %s" % len([k for k in texte if k in sep]))
+        index_sep = self.get_separateurs(sep)
+        logging.info("# separator in text: %s" % index_sep.nombre)
 
+        candidats = []
         for (cle, longueur), liste_pos in list(blocs.items()):
             if longueur >= min_size and len(liste_pos) >= 2:
                 # on inverse car les pos ont �t� ajout�es dans l'ordre d�croissant dans get_MEM
                 liste_pos.reverse()
                 if liste_pos[0] < longueur_s1 <= liste_pos[-1]:
                     if just_keep_words:
-                        # bas� sur seulement 2 homologies dans la liste, quid du comportement avec + d'homologies ?
-                        # car pour couper une homologies, on regarde les caract�res pr�c�dents et suivants
-                        # dans les 2 chaines, la premiere de la liste (texte 1) et la derni�re (texte 2)
-                        # logging.debug( '1:' +self.sequences[0][liste_pos[0]:liste_pos[0]+longueur]+'/'+str(liste_pos))
-                        # les car de d�but et fin des chaines doivent �rre �gaux
-                        assert (
-                            self.sequences[0][liste_pos[0]]
-                            == self.sequences[1][liste_pos[-1] - longueur_s1]
-                        )
-                        assert (
-                            self.sequences[0][liste_pos[0] + longueur - 1]
-                            == self.sequences[1][
-                                liste_pos[-1] + longueur - 1 - longueur_s1
-                            ]
-                        ), (
-                            chaine
-                            + " / "
-                            + self.sequences[0][liste_pos[0] : liste_pos[0] + longueur]
-                            + " / "
-                            + self.sequences[1][
-                                liste_pos[-1]
-                                - longueur_s1 : liste_pos[-1]
-                                + longueur
-                                - longueur_s1
-                            ]
-                            + " / *"
-                            + self.sequences[0][liste_pos[0] + longueur]
-                            + "* / *"
-                            + self.sequences[1][liste_pos[-1] + longueur - longueur_s1]
-                            + "**"
-                        )
-                        # recherche du premier s�parateur dans la chaine
-                        i = liste_pos[0]
-                        i2 = liste_pos[-1]
-                        if (i == 0 or self.sequences[0][i - 1] in sep) and (
-                            i2 - longueur_s1 == 0
-                            or self.sequences[1][i2 - 1 - longueur_s1] in sep
-                        ):
-                            # soit d�but de s�quence et dans ce cas le car pr�c�dent est forc�ment un sep car on est en mode mot
-                            # soit caract�re pr�c�dent est un s�parateur
-                            decalage_avant = 0
-                        else:  # sinon on cherche le 1er sep dans la chaine courante
-                            while (
-                                i < liste_pos[0] + longueur
-                                and self.sequences[0][i] not in sep
-                                and self.sequences[1][i2 - longueur_s1] not in sep
-                            ):
-                                i += 1
-                                i2 += 1
-                            decalage_avant = i - liste_pos[0]
-
-                        assert i >= liste_pos[0]
-                        # recherche du s�parateur le + � droite dans la chaine
-                        j = liste_pos[0] + longueur - 1
-                        j2 = liste_pos[-1] + longueur - 1
-                        if (
-                            j == len(self.sequences[0]) - 1
-                            or self.sequences[0][j + 1] in sep
-                        ) and (
-                            j2 - longueur_s1 == len(self.sequences[1]) - 1
-                            or self.sequences[1][j2 + 1 - longueur_s1] in sep
-                        ):
-                            pass  # idem que i: car de fin de s�quence ou car precedent sep
-                        else:
-                            while (
-                                j >= liste_pos[0]
-                                and self.sequences[0][j] not in sep
-                                and j2 >= liste_pos[-1]
-                                and self.sequences[1][j2 - longueur_s1] not in sep
-                            ):
-                                j -= 1
-                                j2 -= 1
-                        assert j <= liste_pos[0] + longueur - 1
-                        # logging.debug('decalage_avanti='+str(decalage_avant)+', longueur2='+str(j+1-i))
-                        if i < j:  # si la nouvelle chaine n'est pas vide
-                            longueur2 = j + 1 - i
-                            assert longueur2 <= longueur
-                            if longueur2 >= min_size:
-                                cle2 = hash(self.sequences[0][i : j + 1])
-                                tt = [x + decalage_avant for x in liste_pos]
-                                dic_chaine2[(cle2, longueur2)] = tt
-                                # logging.debug('2:'+self.sequences[0][tt[0]:tt[0]+longueur2]+'/'+str(tt))
+                        candidats.append((cle, longueur, liste_pos))
                     else:  # cas standard
                         dic_chaine2[(cle, longueur)] = liste_pos
+        if candidats:
+            dic_chaine2 = self._rogner_mots(candidats, index_sep, min_size)
         # print 'dic_chaine2:'+str(dic_chaine2)
         # print len(dic_chaine2)#,dic_chaine2
         logging.log(
@@ -25,6 +25,7 @@ import html.entities
 import bisect
 from string import Template
 from . import utile as ut
+from . import separateurs
 import numpy as Numeric
 
 
@@ -68,6 +69,8 @@ class BiBlocList(object):
         lSup = resultat.getListeSuppressions()
         lDepT1 = resultat.getListeDeplacementsT1()  # ; print lDepT1
         lDepT2 = resultat.getListeDeplacementsT2()  # ; print lDepT2
+        # fusion des 8 listes triées: indices de leur tête plutôt que pop(0)
+        iBCT1 = iBCT2 = iRempT1 = iRempT2 = iSup = iIns = iDepT1 = iDepT2 = 0
         i = 0
         len_lBCT1 = len(lBCT1)
         len_lBCT2 = len(lBCT2)
@@ -96,74 +99,76 @@ class BiBlocList(object):
             # soit < BC car pas de chevauchement entre sup et dep
             if len_lSup > 0 and (
                 (len_lBCT1 == 0 and len_lDepT1 == 0)
-                or (len_lBCT1 == 0 and lSup[0][0] <= lDepT1[0][0])
-                or (len_lDepT1 == 0 and lSup[0][0] < lBCT1[0][0])
+                or (len_lBCT1 == 0 and lSup[iSup][0] <= lDepT1[iDepT1][0])
+                or (len_lDepT1 == 0 and lSup[iSup][0] < lBCT1[iBCT1][0])
                 or (
                     len_lBCT1 > 0
                     and len_lDepT1 > 0
-                    and lSup[0][0] < lBCT1[0][0]
-                    and lSup[0][0] <= lDepT1[0][0]
+                    and lSup[iSup][0] < lBCT1[iBCT1][0]
+                    and lSup[iSup][0] <= lDepT1[iDepT1][0]
                 )
             ):  # ajout sup
                 # d�coration avec les d�placements
-                depInBloc1 = self.__decoreDep(lSup[0], lDepT1)
+                depInBloc1 = self.__decoreDep(lSup[iSup], lDepT1, iDepT1)
                 # ajout du bibloc
-                liste.append((("S", lSup[0][0], lSup[0][1], depInBloc1), None))
-                lSup.pop(0)
+                liste.append((("S", lSup[iSup][0], lSup[iSup][1], depInBloc1), None))
+                iSup += 1
                 len_lSup -= 1
                 len_lDepT1 -= len(depInBloc1)
+                iDepT1 += len(depInBloc1)
             elif len_lIns > 0 and (
                 (len_lBCT2 == 0 and len_lDepT2 == 0)
-                or (len_lBCT2 == 0 and lIns[0][0] <= lDepT2[0][0])
-                or (len_lDepT2 == 0 and lIns[0][0] < lBCT2[0][0])
+                or (len_lBCT2 == 0 and lIns[iIns][0] <= lDepT2[iDepT2][0])
+                or (len_lDepT2 == 0 and lIns[iIns][0] < lBCT2[iBCT2][0])
                 or (
                     len_lBCT2 > 0
                     and len_lDepT2 > 0
-                    and lIns[0][0] < lBCT2[0][0]
-                    and lIns[0][0] <= lDepT2[0][0]
+                    and lIns[iIns][0] < lBCT2[iBCT2][0]
+                    and lIns[iIns][0] <= lDepT2[iDepT2][0]
                 )
             ):  # ajout ins
                 # d�coration avec les d�placements
-                depInBloc2 = self.__decoreDep(lIns[0], lDepT2)
+                depInBloc2 = self.__decoreDep(lIns[iIns], lDepT2, iDepT2)
                 # ajout du bibloc
-                liste.append((None, ("I", lIns[0][0], lIns[0][1], depInBloc2)))
-                lIns.pop(0)
+                liste.append((None, ("I", lIns[iIns][0], lIns[iIns][1], depInBloc2)))
+                iIns += 1
                 len_lIns -= 1
                 len_lDepT2 -= len(depInBloc2)
+                iDepT2 += len(depInBloc2)
             # si depT1 < rempT1 et BCT1, ajout dep comme une sup
             elif len_lDepT1 > 0 and (
                 (len_lBCT1 == 0 and len_lRempT1 == 0)
-                or (len_lBCT1 == 0 and lDepT1[0][0] < lRempT1[0][0])
-                or (len_lRempT1 == 0 and lDepT1[0][0] < lBCT1[0][0])
+                or (len_lBCT1 == 0 and lDepT1[iDepT1][0] < lRempT1[iRempT1][0])
+                or (len_lRempT1 == 0 and lDepT1[iDepT1][0] < lBCT1[iBCT1][0])
                 or (
                     len_lBCT1 > 0
                     and len_lRempT1 > 0
-                    and lDepT1[0][0] < lBCT1[0][0]
-                    and lDepT1[0][0] < lRempT1[0][0]
+                    and lDepT1[iDepT1][0] < lBCT1[iBCT1][0]
+                    and lDepT1[iDepT1][0] < lRempT1[iRempT1][0]
                 )
             ):
                 liste.append(
                     (
                         (
                             "S",
-                            lDepT1[0][0],
-                            lDepT1[0][1],
-                            [[lDepT1[0][0], lDepT1[0][1]]],
+                            lDepT1[iDepT1][0],
+                            lDepT1[iDepT1][1],
+                            [[lDepT1[iDepT1][0], lDepT1[iDepT1][1]]],
                         ),
                         None,
                     )
                 )  # ajout du bibloc
-                lDepT1.pop(0)
+                iDepT1 += 1
                 len_lDepT1 -= 1
             elif len_lDepT2 > 0 and (
                 (len_lBCT2 == 0 and len_lRempT2 == 0)
-                or (len_lBCT2 == 0 and lDepT2[0][0] < lRempT2[0][0])
-                or (len_lRempT2 == 0 and lDepT2[0][0] < lBCT2[0][0])
+                or (len_lBCT2 == 0 and lDepT2[iDepT2][0] < lRempT2[iRempT2][0])
+                or (len_lRempT2 == 0 and lDepT2[iDepT2][0] < lBCT2[iBCT2][0])
                 or (
                     len_lBCT2 > 0
                     and len_lRempT2 > 0
-                    and lDepT2[0][0] < lBCT2[0][0]
-                    and lDepT2[0][0] < lRempT2[0][0]
+                    and lDepT2[iDepT2][0] < lBCT2[iBCT2][0]
+                    and lDepT2[iDepT2][0] < lRempT2[iRempT2][0]
                 )
             ):  # ajout dep comme une ins
                 liste.append(
@@ -171,50 +176,55 @@ class BiBlocList(object):
                         None,
                         (
                             "I",
-                            lDepT2[0][0],
-                            lDepT2[0][1],
-                            [[lDepT2[0][0], lDepT2[0][1]]],
+                            lDepT2[iDepT2][0],
+                            lDepT2[iDepT2][1],
+                            [[lDepT2[iDepT2][0], lDepT2[iDepT2][1]]],
                         ),
                     )
                 )  # ajout du bibloc
-                lDepT2.pop(0)
+                iDepT2 += 1
                 len_lDepT2 -= 1
             elif (
                 len_lRempT1 > 0
                 and len_lRempT2 > 0
                 and (
                     (len_lBCT1 == 0 and len_lBCT2 == 0)
-                    or (lRempT1[0][0] < lBCT1[0][0] and lRempT2[0][0] < lBCT2[0][0])
+                    or (
+                        lRempT1[iRempT1][0] < lBCT1[iBCT1][0]
+                        and lRempT2[iRempT2][0] < lBCT2[iBCT2][0]
+                    )
                 )
             ):
                 # d�coration avec les d�placements
-                depInBloc1 = self.__decoreDep(lRempT1[0], lDepT1)
+                depInBloc1 = self.__decoreDep(lRempT1[iRempT1], lDepT1, iDepT1)
                 # d�coration avec les d�placements
-                depInBloc2 = self.__decoreDep(lRempT2[0], lDepT2)
+                depInBloc2 = self.__decoreDep(lRempT2[iRempT2], lDepT2, iDepT2)
                 liste.append(
                     (
-                        ("R", lRempT1[0][0], lRempT1[0][1], depInBloc1),
-                        ("R", lRempT2[0][0], lRempT2[0][1], depInBloc2),
+                        ("R", lRempT1[iRempT1][0], lRempT1[iRempT1][1], depInBloc1),
+                        ("R", lRempT2[iRempT2][0], lRempT2[iRempT2][1], depInBloc2),
                     )
                 )  # ajout du bibloc
                 # print liste[-1][0],liste[-1][1]
-                lRempT1.pop(0)
+                iRempT1 += 1
                 len_lRempT1 -= 1
                 len_lDepT1 -= len(depInBloc1)
-                lRempT2.pop(0)
+                iDepT1 += len(depInBloc1)
+                iRempT2 += 1
                 len_lRempT2 -= 1
                 len_lDepT2 -= len(depInBloc2)
+                iDepT2 += len(depInBloc2)
 
             else:  # ajout BC
                 liste.append(
                     (
-                        ("BC", lBCT1[0][0], lBCT1[0][1], []),
-                        ("BC", lBCT2[0][0], lBCT2[0][1], []),
+                        ("BC", lBCT1[iBCT1][0], lBCT1[iBCT1][1], []),
+                        ("BC", lBCT2[iBCT2][0], lBCT2[iBCT2][1], []),
                     )
                 )  # ajout du bibloc
-                lBCT1.pop(0)
+                iBCT1 += 1
                 len_lBCT1 -= 1
-                lBCT2.pop(0)
+                iBCT2 += 1
                 len_lBCT2 -= 1
 
         self.liste = liste  # liste des biblocs
@@ -223,63 +233,64 @@ class BiBlocList(object):
             logging.debug("extractRemplacements()")
             self.extractRemplacements()
 
-    def __decoreDep(self, intervalle, lDep):
-        """Extrait de la liste g�n�rale des d�placement lDep les d�placements se situant � l'int�rieur du bloc
+    def __decoreDep(self, intervalle, lDep, debut=0):
+        """Extrait de la liste générale des déplacement lDep les déplacements se situant à l'intérieur du bloc
 
-        Attention !! modifie lDep et retourne res2
-        Ici assertion d'ordre sur les dep, recherhe d'un dep en temps lin�aire
-        comme lDep[0] est toujours >= intervalle (parce que l'ordre est maintenu par la
-        fonction appelante), on commence la recherche � partir de l�
+        Ici assertion d'ordre sur les dep, recherhe d'un dep en temps linéaire
+        comme lDep[debut] est toujours >= intervalle (parce que l'ordre est
+        maintenu par la fonction appelante), on commence la recherche à partir
+        de là; l'appelant avance ensuite debut de la longueur du résultat
         """
-        if len(lDep) == 0:
-            return []
-        res2 = []
-        i = 0
-
+        fin = debut
         while (
-            len(lDep) > 0
-            and (lDep[0][0] >= intervalle[0])
-            and (lDep[0][1] <= intervalle[1])
+            fin < len(lDep)
+            and (lDep[fin][0] >= intervalle[0])
+            and (lDep[fin][1] <= intervalle[1])
         ):
-            i += 1
-            res2.append(lDep.pop(0))  # mofifie lDep !!
-        return res2
+            fin += 1
+        return lDep[debut:fin]
 
     def extractRemplacements(self):
-        """Recherche les S et I correspondant au crit�re de transformation en R et les convertit.
+        """Recherche les S et I correspondant au critère de transformation en R et les convertit.
 
         Convertit chaque paire de bibloc (S,None) et (None,I) se suivant en un bibloc (R,R)
-        Modifie directement self.liste plut�t que de recr�er une nouvelle liste
-        ce qui est memory expensive"""
+        Un bibloc I ne peut être le S d'une autre paire: les paires sont
+        indépendantes et la nouvelle liste se construit en un parcours"""
         if len(self.liste) == 0:
             return
         ratio_min_remplacement = float(100) / self.parameters.ratio
-        i = len(self.liste) - 2
-        while i >= 0:
+        liste = []
+        i = 0
+        while i < len(self.liste):
             if i % 1000 == 0:
-                logging.debug("it�rationR %d", i)
+                logging.debug("itérationR %d", i)
             biBloc = self.liste[i]  # bibloc courant
-            biBlocSuiv = self.liste[i + 1]  # bibloc suivant
             # on cherche un biblox S et un bibloc I qui se suivent et compatilbes
-            # pour �tre transform�s en (R,R)
-            if (
-                biBloc[0] is not None
-                and biBloc[0][0] == "S"
-                and biBlocSuiv[1] is not None
-                and biBlocSuiv[1][0] == "I"
-                and ut.adequation_remplacement(
-                    self.texte[biBloc[0][1] : biBloc[0][2]],
-                    self.texte[biBlocSuiv[1][1] : biBlocSuiv[1][2]],
-                    ratio_min_remplacement,
-                )
-            ):
-                self.liste[i : i + 2] = [
-                    (
-                        ("R", biBloc[0][1], biBloc[0][2], biBloc[0][3]),
-                        ("R", biBlocSuiv[1][1], biBlocSuiv[1][2], biBlocSuiv[1][3]),
+            # pour être transformés en (R,R)
+            if i + 1 < len(self.liste):
+                biBlocSuiv = self.liste[i + 1]  # bibloc suivant
+                if (
+                    biBloc[0] is not None
+                    and biBloc[0][0] == "S"
+                    and biBlocSuiv[1] is not None
+                    and biBlocSuiv[1][0] == "I"
+                    and ut.adequation_remplacement(
+                        self.texte[biBloc[0][1] : biBloc[0][2]],
+                        self.texte[biBlocSuiv[1][1] : biBlocSuiv[1][2]],
+                        ratio_min_remplacement,
+                    )
+                ):
+                    liste.append(
+                        (
+                            ("R", biBloc[0][1], biBloc[0][2], biBloc[0][3]),
+                            ("R", biBlocSuiv[1][1], biBlocSuiv[1][2], biBlocSuiv[1][3]),
+                        )
                     )
-                ]
-            i -= 1
+                    i += 2
+                    continue
+            liste.append(biBloc)
+            i += 1
+        self.liste = liste
 
     def toResultat(self):
         """Transfomre la liste de biblocs en un Resultat
@@ -338,11 +349,13 @@ class BiBlocList(object):
         # sep = """ !\r,\n:\t;-?"'`�()"""
         # sep_ = """ !\r,\n:\t;-?"'`\\u2019()"""
         # breakpoint()
-        sep = self.parameters.sep
+        # frontières de mots: caractère courant ou précédent séparateur
+        en_frontiere = separateurs.IndexSeparateurs(
+            self.texte, self.parameters.sep
+        ).en_frontiere
         seq1 = self.lgSource
         seq2 = len(self.texte) - seq1
         # assert len(self.liste)==1754
-        texte = self.texte
         ins = sup = remp1 = remp2 = bc1 = bc2 = dep1 = dep2 = 0.0
         nb_bc1 = nb_bc2 = nb_dep1 = nb_dep2 = nb_sup = nb_ins = nb_remp1 = nb_remp2 = 0
         front_bloc = front_bloc_sep = 0
@@ -361,7 +374,7 @@ class BiBlocList(object):
                     bisect.insort_right(lSup, B1[2] - B1[1])
                     if B1[1] == 0:
                         front_bloc_sep += 1
-                    elif (texte[B1[1]] in sep) or (texte[B1[1] - 1] in sep):
+                    elif en_frontiere(B1[1]):
                         front_bloc_sep += 1
                 elif B1_type == "R":
                     remp1 += B1[2] - B1[1]
@@ -370,7 +383,7 @@ class BiBlocList(object):
                     bisect.insort_right(lRemp, B1[2] - B1[1])
                     if B1[1] == 0:
                         front_bloc_sep += 1
-                    elif (texte[B1[1]] in sep) or (texte[B1[1] - 1] in sep):
+                    elif en_frontiere(B1[1]):
                         front_bloc_sep += 1
                 elif B1_type == "BC":
                     bc1 += B1[2] - B1[1]
@@ -379,7 +392,7 @@ class BiBlocList(object):
                     bisect.insort_right(lBC, B1[2] - B1[1])
                     if B1[1] == 0:
                         front_bloc_sep += 1
-                    elif (texte[B1[1]] in sep) or (texte[B1[1] - 1] in sep):
+                    elif en_frontiere(B1[1]):
                         front_bloc_sep += 1
                 if B1_type == "D":
                     dep1 += B1[2] - B1[1]
@@ -388,7 +401,7 @@ class BiBlocList(object):
                     bisect.insort_right(lDep, B1[2] - B1[1])
                     if B1[1] == 0:
                         front_bloc_sep += 1
-                    elif (texte[B1[1]] in sep) or (texte[B1[1] - 1] in sep):
+                    elif en_frontiere(B1[1]):
                         front_bloc_sep += 1
                 else:
                     for d, f in B1[3]:  # boucle sur les dep internes
@@ -404,7 +417,7 @@ class BiBlocList(object):
                     bisect.insort_right(lIns, B2[2] - B2[1])
                     if B2[1] == seq1:
                         front_bloc_sep += 1
-                    elif (texte[B2[1]] in sep) or (texte[B2[1] - 1] in sep):
+                    elif en_frontiere(B2[1]):
                         front_bloc_sep += 1
                 elif B2_type == "R":
                     remp2 += B2[2] - B2[1]
@@ -413,7 +426,7 @@ class BiBlocList(object):
                     bisect.insort_right(lRemp, B2[2] - B2[1])
                     if B2[1] == seq1:
                         front_bloc_sep += 1
-                    elif (texte[B2[1]] in sep) or (texte[B2[1] - 1] in sep):
+                    elif en_frontiere(B2[1]):
                         front_bloc_sep += 1
                 elif B2_type == "BC":
                     bc2 += B2[2] - B2[1]
@@ -422,7 +435,7 @@ class BiBlocList(object):
                     bisect.insort_right(lBC, B2[2] - B2[1])
                     if B2[1] == seq1:
                         front_bloc_sep += 1
-                    elif (texte[B2[1]] in sep) or (texte[B2[1] - 1] in sep):
+                    elif en_frontiere(B2[1]):
                         front_bloc_sep += 1
                 if B2_type == "D":
                     dep2 += B2[2] - B2[1]
@@ -431,7 +444,7 @@ class BiBlocList(object):
                     bisect.insort_right(lDep, B2[2] - B2[1])
                     if B2[1] == seq1:
                         front_bloc_sep += 1
-                    elif (texte[B2[1]] in sep) or (texte[B2[1] - 1] in sep):
+                    elif en_frontiere(B2[1]):
                         front_bloc_sep += 1
                 else:
                     for d, f in B2[3]:  # boucle sur les dep internes
@@ -705,37 +718,42 @@ class BiBlocListWD(BiBlocList):
         Teste les blocs ins�r�s et supprim�s.
         Si le rapport des d�placements � l'int�rieur d'un bloc est sup�rieur au seuil
         Alors ce bloc est scind� en une liste de blocs (I ou S) et D
-        Modifie directement self.liste
+        Chaque bibloc est traité indépendamment des autres: la nouvelle liste
+        se construit en un parcours
 
         AssertionError: 270455 ('D', 270444, 270455, []) ('D', 270450, 270455, [])"""
         ratio_seuil_lissage = float(self.parameters.ratio) / 100
-        # nouvelleListe = []
-        i = len(self.liste) - 1
-        while i >= 0:
+        nouvelleListe = []
+        for i, (B1, B2) in enumerate(self.liste):
             if i % 1000 == 0:
-                logging.debug("it�rationD %d", i)
-            (B1, B2) = self.liste[i]
-            if B1 is not None and B1[0] == "S":  # bloc S
+                logging.debug("itérationD %d", i)
+            # un bloc sans déplacement reste tel quel
+            if B1 is not None and B1[0] == "S" and B1[3]:  # bloc S
                 assert B2 is None
-                supMoinsDep = ut.soustr_l_intervalles(
-                    [[B1[1], B1[2]]], B1[3]
+                supMoinsDep = ut.Intervalles([B1[1]], [B1[2]]).soustraction(
+                    ut.Intervalles.depuis(B1[3])
                 )  # bloc S moins les dep
-                ratio_lissage = float(ut.longueur(supMoinsDep)) / (
+                ratio_lissage = float(supMoinsDep.longueur()) / (
                     B1[2] - B1[1]
                 )  # ratio du bloc
                 if ratio_lissage <= ratio_seuil_lissage:
-                    self.liste[i : i + 1] = self.__extractDepInsSup(
-                        supMoinsDep, B1[3], "S"
+                    nouvelleListe.extend(
+                        self.__extractDepInsSup(supMoinsDep.liste(), B1[3], "S")
                     )
-            elif B2 is not None and B2[0] == "I":  # bloc I
+                    continue
+            elif B2 is not None and B2[0] == "I" and B2[3]:  # bloc I
                 assert B1 is None
-                insMoinsDep = ut.soustr_l_intervalles([[B2[1], B2[2]]], B2[3])
-                ratio_lissage = float(ut.longueur(insMoinsDep)) / (B2[2] - B2[1])
+                insMoinsDep = ut.Intervalles([B2[1]], [B2[2]]).soustraction(
+                    ut.Intervalles.depuis(B2[3])
+                )
+                ratio_lissage = float(insMoinsDep.longueur()) / (B2[2] - B2[1])
                 if ratio_lissage <= ratio_seuil_lissage:
-                    self.liste[i : i + 1] = self.__extractDepInsSup(
-                        insMoinsDep, B2[3], "I"
+                    nouvelleListe.extend(
+                        self.__extractDepInsSup(insMoinsDep.liste(), B2[3], "I")
                     )
-            i -= 1
+                    continue
+            nouvelleListe.append((B1, B2))
+        self.liste = nouvelleListe
 
     def __extractDepInsSup(self, lSupOrIns, listeDep, SorI):
         """On scinde effectivement le blocs en une liste de blocs (S ou I) et D
@@ -743,63 +761,28 @@ class BiBlocListWD(BiBlocList):
         lSupOrIns: liste de (I ou S)
         listeDep: liste de D
         SorI: traite-on des S ou des I ?
+        Fusion des 2 listes triées par indices, sans les modifier
         pre: isinstance(lSupOrIns,list) and isinstance(listeDep,list)
              (SorI == 'S' or SorI == 'I')"""
         nouvelleListe = []
-        len_listeDep = len(listeDep)
-        prevdeb = nbDep = 0
-        while len(lSupOrIns) > 0 or len(listeDep) > 0:
-            # on a ajout� tous les D, on peut ajouter le reste des (I ou S)
-            if len(listeDep) == 0:
-                for deb, fin in lSupOrIns:  # pour chaque bloc (I ou S)
-                    assert prevdeb <= deb  # assertion d'ordre
-                    prevdeb = deb
-                    if SorI == "S":
-                        nouvelleListe.append(
-                            (("S", deb, fin, []), None)
-                        )  # ajout effectif
-                    else:
-                        nouvelleListe.append((None, ("I", deb, fin, [])))
-                lSupOrIns = []
-            # on a ajout� tous les (I ou S), on peut ajouter les reste des D
-            elif len(lSupOrIns) == 0:
-                for deb, fin in listeDep:  # pour chaque bloc D
-                    assert prevdeb <= deb
-                    prevdeb = deb
-                    if SorI == "S":
-                        nouvelleListe.append((("D", deb, fin, []), None))
-                    else:
-                        nouvelleListe.append((None, ("D", deb, fin, [])))
-                    nbDep += 1
-                listeDep = []
-            # si bloc courant (I ou S) <= bloc courant D alors on l'ajoute
-            elif lSupOrIns[0][0] <= listeDep[0][0]:
-                assert prevdeb <= lSupOrIns[0][0]
-                prevdeb = lSupOrIns[0][0]
-                if SorI == "S":
-                    nouvelleListe.append(
-                        (("S", lSupOrIns[0][0], lSupOrIns[0][1], []), None)
-                    )
-                else:
-                    nouvelleListe.append(
-                        (None, ("I", lSupOrIns[0][0], lSupOrIns[0][1], []))
-                    )
-                # lSupOrIns = lSupOrIns[1:]
-                lSupOrIns.pop(0)
+        i = j = prevdeb = 0
+        while i < len(lSupOrIns) or j < len(listeDep):
+            # si bloc courant (I ou S) <= bloc courant D, ou s'il n'y a plus
+            # de D, on ajoute le (I ou S), sinon le D
+            if j == len(listeDep) or (
+                i < len(lSupOrIns) and lSupOrIns[i][0] <= listeDep[j][0]
+            ):
+                deb, fin = lSupOrIns[i]
+                bloc = (SorI, deb, fin, [])
+                i += 1
             else:
-                assert prevdeb <= listeDep[0][0]
-                prevdeb = listeDep[0][0]
-                if SorI == "S":
-                    nouvelleListe.append(
-                        (("D", listeDep[0][0], listeDep[0][1], []), None)
-                    )
-                else:
-                    nouvelleListe.append(
-                        (None, ("D", listeDep[0][0], listeDep[0][1], []))
-                    )
-                listeDep.pop(0)
-                nbDep += 1
-        # les 2 listes ont du etre trait�es enti�rement
-        assert len(listeDep) == len(lSupOrIns) == 0
-        assert nbDep == len_listeDep
+                deb, fin = listeDep[j]
+                bloc = ("D", deb, fin, [])
+                j += 1
+            assert prevdeb <= deb  # assertion d'ordre
+            prevdeb = deb
+            if SorI == "S":
+                nouvelleListe.append((bloc, None))  # ajout effectif
+            else:
+                nouvelleListe.append((None, bloc))
         return nouvelleListe
@@ -113,6 +113,110 @@ def longueur(
     return n
 
 
+class Intervalles(object):
+    """Liste trie d'intervalles [debut, fin), stocke dans 2 tableaux numpy
+
+    Remplace les listes construites par bisect.insort_right et les fonctions
+    soustr_l_intervalles et longueur, quadratiques: la construction trie en
+    n.log(n) et les autres oprations sont linaires,  une recherche
+    dichotomique prs. Comme avec addition_intervalle, les intervalles ne sont
+    pas fusionns et peuvent se chevaucher."""
+
+    def __init__(self, debuts=(), fins=(), trier=True):
+        """trier: si faux, debuts et fins sont dj dans l'ordre voulu"""
+        self.debuts = numpy.asarray(debuts, numpy.int64)
+        self.fins = numpy.asarray(fins, numpy.int64)
+        if trier and len(self.debuts) > 1:
+            # tri stable par (debut, fin): l'ordre de bisect.insort_right
+            ordre = numpy.lexsort((self.fins, self.debuts))
+            self.debuts = self.debuts[ordre]
+            self.fins = self.fins[ordre]
+
+    @classmethod
+    def depuis(cls, L):
+        """Intervalles de la liste de couples (debut, fin) L"""
+        tableau = numpy.asarray(L, numpy.int64).reshape(-1, 2)
+        return cls(tableau[:, 0], tableau[:, 1])
+
+    def __len__(self):
+        return len(self.debuts)
+
+    def fusion(self, autre):
+        """Intervalles de self et de autre, ceux de self d'abord  galit"""
+        return Intervalles(
+            numpy.concatenate((self.debuts, autre.debuts)),
+            numpy.concatenate((self.fins, autre.fins)),
+        )
+
+    def reunion(self):
+        """Intervalles disjoints couvrant les mmes positions que self, les
+        intervalles qui se chevauchent ou se touchent sont fusionns"""
+        if len(self) == 0:
+            return Intervalles()
+        ordre = numpy.argsort(self.debuts, kind="stable")
+        debuts = self.debuts[ordre]
+        fins = numpy.maximum.accumulate(self.fins[ordre])
+        # un nouvel intervalle commence aprs la fin de tous les prcdents
+        nouveau = numpy.empty(len(debuts), bool)
+        nouveau[0] = True
+        nouveau[1:] = debuts[1:] > fins[:-1]
+        premiers = numpy.flatnonzero(nouveau)
+        derniers = numpy.append(premiers[1:] - 1, len(debuts) - 1)
+        return Intervalles(debuts[premiers], fins[derniers], trier=False)
+
+    def soustraction(self, autre):
+        """self priv des positions couvertes par autre: chaque intervalle de
+        self est remplac,  sa place, par ses morceaux hors de autre
+        (cf. soustr_l_intervalles)"""
+        if len(self) == 0 or len(autre) == 0:
+            return Intervalles(self.debuts, self.fins, trier=False)
+        union = autre.reunion()
+        # trous de l'union: [-inf, debut0), [fin0, debut1), ..., [fin_n, +inf)
+        bornes = numpy.iinfo(numpy.int64)
+        debuts_trous = numpy.concatenate(([bornes.min], union.fins))
+        fins_trous = numpy.concatenate((union.debuts, [bornes.max]))
+        # trous qui rencontrent chaque intervalle: de premier  dernier exclu
+        premier = numpy.searchsorted(fins_trous, self.debuts, "right")
+        dernier = numpy.searchsorted(debuts_trous, self.fins, "left")
+        nombre = numpy.maximum(dernier - premier, 0)
+        intervalles = numpy.repeat(numpy.arange(len(self)), nombre)
+        rangs = numpy.arange(len(intervalles)) - numpy.repeat(
+            numpy.cumsum(nombre) - nombre, nombre
+        )
+        trous = premier[intervalles] + rangs
+        return Intervalles(
+            numpy.maximum(self.debuts[intervalles], debuts_trous[trous]),
+            numpy.minimum(self.fins[intervalles], fins_trous[trous]),
+            trier=False,
+        )
+
+    def miroir(self, debut, fin):
+        """Complment de self dans [debut, fin), comme miroir(L, debut, fin)"""
+        precedents = numpy.concatenate(([debut], self.fins))
+        suivants = numpy.concatenate((self.debuts, [fin]))
+        trous = precedents < suivants
+        return Intervalles(precedents[trous], suivants[trous], trier=False)
+
+    def longueur(self):
+        """Somme des longueurs des intervalles, cf. longueur(L)"""
+        return int((self.fins - self.debuts).sum())
+
+    def liste(self):
+        """Liste des [debut, fin]"""
+        return numpy.column_stack((self.debuts, self.fins)).tolist()
+
+    def couples(self):
+        """Liste des (debut, fin)"""
+        return list(zip(self.debuts.tolist(), self.fins.tolist()))
+
+
+def codes_caracteres(texte):
+    """Points de code des caractres de texte, tableau numpy int64"""
+    return numpy.frombuffer(
+        texte.encode("utf-32-le", "surrogatepass"), dtype="<u4"
+    ).astype(numpy.int64)
+
+
 def chaine_blanche(texte):
     for c in texte:
         if c not in " \n\t\r":